@@ -0,0 +1,211 @@
+"""
+active_share.py
+
+Coverage as a function of the active-domain share, on the graph itself.
+Figures 1 and 3 compare 43% vs 50% active .co.uk domains by shrinking
+N; on a graph an inactive domain should also stop passing links on.
+webgraph_bfs's engines take an `active` bitmap for one share at a time;
+this module evaluates many shares in one pass:
+
+    - every node gets a key in [0, KEY_LEVELS - 1), uniformly at random
+      or by rank of a score (likely-active nodes first); the node is
+      active at share a iff key < level(a) = round(a * (KEY_LEVELS - 1))
+    - b_h(v) = min over paths of at most h links from a seed to v of the
+      largest key on the path (a min-max relaxation, one Jacobi round
+      per hop over the out-edges of the nodes whose b dropped)
+    - v is reached within h hops at share a iff b_h(v) < level(a)
+
+So max_hops edge passes give coverage for every share and hop, where
+one masked BFS per share would repeat them per share. The result equals
+multi_source_bfs(..., active=mask_from_keys(keys, a)) exactly.
+
+Usage:
+    python active_share.py --synthetic 1000000 --seeds 1000 --max-hops 3
+    python active_share.py --graph ../output/uk_graph --seed-file seeds.txt --shares 0.43 0.5 --compare
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from webgraph_bfs import MAX_HOPS, multi_source_bfs, pack_mask
+from webgraph_csr import gather_segments
+
+KEY_LEVELS = 1 << 16           # keys are uint16; KEY_LEVELS - 1 = never active
+SHARES = tuple(np.round(np.arange(0.1, 1.0001, 0.05), 2))
+PAPER_SHARES = (0.43, 0.50)
+MAX_HOPS_DEFAULT = 3
+
+
+def activity_keys(n: int, score=None, seed: int = 42) -> np.ndarray:
+    """
+    uint16 activity key per node. Without a score the keys are uniform
+    (every share is a random subset); with one, nodes are ranked by
+    descending score (random tie-break), so higher-scored nodes turn
+    active first.
+    """
+    rng = np.random.default_rng(seed)
+    top = KEY_LEVELS - 1
+    if score is None:
+        return rng.integers(0, top, size=n, dtype=np.uint16)
+    order = np.lexsort((rng.random(n), -np.asarray(score, dtype=np.float64)))
+    keys = np.empty(n, dtype=np.uint16)
+    keys[order] = (np.arange(n, dtype=np.int64) * top // max(n, 1)).astype(np.uint16)
+    return keys
+
+
+def share_level(share: float) -> int:
+    return int(round(float(share) * (KEY_LEVELS - 1)))
+
+
+def mask_from_keys(keys: np.ndarray, share: float) -> np.ndarray:
+    """Packed active bitmap of the nodes with key < level(share)."""
+    return pack_mask(keys < share_level(share))
+
+
+def minmax_levels(graph, seeds, keys: np.ndarray,
+                  max_hops: int = MAX_HOPS_DEFAULT) -> np.ndarray:
+    """
+    (max_hops + 1, KEY_LEVELS) cumulative counts: entry [h, l] is the
+    number of nodes reached within h hops when the nodes with key < l
+    are active.
+    """
+    n = graph.n_nodes
+    limit = min(max_hops, MAX_HOPS)
+    top = np.uint16(KEY_LEVELS - 1)
+    best = np.full(n, top, dtype=np.uint16)
+    frontier = np.unique(graph.node_ids(seeds))
+    best[frontier] = keys[frontier]
+    indptr = graph.indptr if hasattr(graph, "indptr") else None
+
+    def counts():
+        return np.cumsum(np.bincount(best, minlength=KEY_LEVELS)[:KEY_LEVELS])
+
+    out = np.zeros((limit + 1, KEY_LEVELS + 1), dtype=np.int64)
+    out[0, 1:] = counts()
+    for hop in range(1, limit + 1):
+        if frontier.size == 0:
+            out[hop] = out[hop - 1]
+            continue
+        if indptr is not None:
+            deg = indptr[frontier + 1] - indptr[frontier]
+            dst = gather_segments(indptr, graph.indices, frontier)
+            src = np.repeat(frontier, deg)
+        else:
+            src, dst = graph._decode(frontier, with_src=True)
+        cand = np.maximum(best[src], keys[dst])
+        better = cand < best[dst]
+        dst, cand = dst[better], cand[better]
+        new = best.copy()
+        np.minimum.at(new, dst, cand)
+        frontier = np.flatnonzero(new < best)
+        best = new
+        out[hop, 1:] = counts()
+    # column l holds the count of b < l
+    return out[:, :KEY_LEVELS]
+
+
+def share_sweep(graph, seeds, shares=SHARES, keys=None,
+                max_hops: int = MAX_HOPS_DEFAULT, seed: int = 42) -> pd.DataFrame:
+    """
+    Coverage within 1..max_hops hops for every share, as a DataFrame
+    with columns share, active, reached_h{h}, coverage_h{h}. Coverage is
+    relative to the active nodes (the N of the analytical model).
+    """
+    if keys is None:
+        keys = activity_keys(graph.n_nodes, seed=seed)
+    reached = minmax_levels(graph, seeds, keys, max_hops)
+    key_counts = np.concatenate(([0], np.cumsum(np.bincount(keys, minlength=KEY_LEVELS))))
+    rows = []
+    for share in shares:
+        level = share_level(share)
+        active = int(key_counts[level])
+        row = {"share": float(share), "active": active}
+        for h in range(1, reached.shape[0]):
+            row[f"reached_h{h}"] = int(reached[h, level])
+            row[f"coverage_h{h}"] = reached[h, level] / active if active else 0.0
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coverage vs active-domain share in one pass")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", help="directory from save_csr / save_compressed")
+    src.add_argument("--synthetic", type=int, metavar="N_NODES")
+    seeds = parser.add_mutually_exclusive_group(required=True)
+    seeds.add_argument("--seeds", type=int, help="number of random seeds")
+    seeds.add_argument("--seed-file", help="one domain name or ID per line")
+    parser.add_argument("--shares", type=float, nargs="+", default=None,
+                        help="active shares (default 0.10..1.00 plus 0.43 / 0.50)")
+    parser.add_argument("--max-hops", type=int, default=MAX_HOPS_DEFAULT)
+    parser.add_argument("--rank-by", choices=("random", "outdegree", "indegree"),
+                        default="random", help="which nodes turn active first")
+    parser.add_argument("--compare", action="store_true",
+                        help="check every share against a masked multi_source_bfs")
+    parser.add_argument("--out", default="../output/active_share_sweep.csv")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.graph:
+        from webgraph_compressed import load_graph
+        graph = load_graph(args.graph, mmap=True)
+    else:
+        from webgraph_csr import synthetic_webgraph
+        graph = synthetic_webgraph(args.synthetic, seed=args.seed)
+    n = graph.n_nodes
+    if args.seed_file:
+        from domain_names import load_seed_list
+        seed_ids = load_seed_list(args.seed_file, graph.names)
+    else:
+        seed_ids = np.random.default_rng(args.seed).choice(n, size=args.seeds, replace=False)
+
+    score = None
+    if args.rank_by == "outdegree":
+        score = np.diff(graph.indptr) if hasattr(graph, "indptr") else graph.out_degree()
+    elif args.rank_by == "indegree":
+        csr = graph if hasattr(graph, "indices") else graph.to_csr()
+        score = np.bincount(csr.indices, minlength=n)
+    keys = activity_keys(n, score, args.seed)
+    shares = args.shares or sorted(set(SHARES) | set(PAPER_SHARES))
+
+    t0 = time.perf_counter()
+    df = share_sweep(graph, seed_ids, shares, keys, args.max_hops)
+    seconds = time.perf_counter() - t0
+
+    print("=" * 80)
+    print(f"ACTIVE-SHARE SWEEP: {n:,} nodes, {len(seed_ids):,} seeds, "
+          f"{len(shares)} shares in {seconds:.2f}s")
+    print("=" * 80)
+    hops = range(1, args.max_hops + 1)
+    print(f"  {'share':>6} {'active':>12} " + " ".join(f"{f'<= {h} hop':>10}" for h in hops))
+    for row in df.itertuples(index=False):
+        row = row._asdict()
+        print(f"  {row['share']:>6.0%} {row['active']:>12,} "
+              + " ".join(f"{row[f'coverage_h{h}']:>10.2%}" for h in hops))
+
+    if args.compare:
+        t0 = time.perf_counter()
+        for share, row in zip(shares, df.to_dict("records")):
+            dist = multi_source_bfs(graph, seed_ids, args.max_hops,
+                                    active=mask_from_keys(keys, share))
+            for h in hops:
+                if int((dist <= h).sum()) != row[f"reached_h{h}"]:
+                    raise SystemExit(f"  Masked BFS differs at share {share:.2%}, hop {h}")
+        print(f"  Masked BFS per share: identical ({time.perf_counter() - t0:.2f}s)")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out, index=False)
+    print(f"✓ Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
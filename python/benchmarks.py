@@ -0,0 +1,553 @@
+"""
+benchmarks.py
+
+Benchmark suite for the model and simulation hot paths, with a JSON
+history file for regression tracking.
+
+Workloads are fixed and seeded, so two runs on the same box measure the
+same work:
+
+    - T_k / estimate_coverage / estimate_ttfi: scalar loop vs batched
+      (numpy) evaluation, sweep sizes 10^3 .. 10^7
+    - build_multi_hop_table and the Figures 1-8 pipeline
+    - synthetic web graphs of 10^4 .. 10^7 nodes: generation and
+      multi-source BFS + TTFI summary, on CSR and compressed adjacency,
+      the direction-optimizing BFS and the semi-external BFS
+      (external_bfs.py, adjacency read from disk)
+    - traversal kernels (traversal_kernels.py) on every installed
+      backend, numpy reference vs numba
+    - KLL quantile sketch bulk updates (quantile_sketch.py)
+
+Every case runs in its own forked child so that peak RSS (VmHWM) is
+attributable to that case alone. Everything runs offline.
+
+Usage:
+    python benchmarks.py run [--profile quick|full] [--only PATTERN]
+    python benchmarks.py compare [--baseline -2] [--candidate -1] [--threshold 0.10]
+    python benchmarks.py list
+"""
+
+import argparse
+import fnmatch
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+HISTORY_FILE = Path("../output/benchmark_history.json")
+HISTORY_VERSION = 1
+BENCH_SEED = 2025
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10   # flag >10% slowdowns
+
+PROFILES = {
+    # analytic sweep sizes (batched), scalar sweep sizes, graph sizes
+    "quick": {
+        "batched": [10**3, 10**4, 10**5],
+        "scalar": [10**3, 10**4, 10**5],
+        "graph": [10**4, 10**5],
+    },
+    "full": {
+        "batched": [10**3, 10**4, 10**5, 10**6, 10**7],
+        "scalar": [10**3, 10**4, 10**5, 10**6],
+        "graph": [10**4, 10**5, 10**6, 10**7],
+    },
+}
+
+
+@dataclass
+class Case:
+    """
+    One benchmark workload. setup() builds the (untimed) input state,
+    run(state) is the timed section, items is the work done per run;
+    teardown(state), if given, releases what setup() created.
+    """
+    name: str
+    setup: Callable[[], object]
+    run: Callable[[object], object]
+    items: int
+    unit: str
+    teardown: Callable[[object], None] | None = None
+
+
+# --------------------------
+# Workload definitions
+# --------------------------
+
+def _analytic_inputs(size: int):
+    rng = np.random.default_rng(BENCH_SEED)
+    seeds = rng.integers(100, 100_000, size=size)
+    ks = rng.integers(1, 11, size=size)
+    return seeds, ks
+
+
+def _analytic_cases(size: int, scalar: bool) -> list[Case]:
+    import generate_tables_and_figures as m
+
+    if scalar:
+        def tk(state):
+            _, ks = state
+            return [m.T_k(m.D, m.r, m.s, int(k)) for k in ks]
+
+        def cov(state):
+            seeds, ks = state
+            return [m.estimate_coverage(m.N_UK, int(n), m.D, m.r, m.s,
+                                        m.theta, int(k))
+                    for n, k in zip(seeds, ks)]
+
+        def ttfi(state):
+            seeds, ks = state
+            return [m.estimate_ttfi(m.D, m.N_UK, int(n), m.tau_hop,
+                                    k_horizon=int(k))
+                    for n, k in zip(seeds, ks)]
+        kind = "scalar"
+    else:
+        def tk(state):
+            _, ks = state
+            return m.T_k_array(m.D, m.r, m.s, ks)
+
+        def cov(state):
+            seeds, ks = state
+            return m.estimate_coverage_array(m.N_UK, seeds, m.D, m.r, m.s,
+                                             m.theta, ks)
+
+        def ttfi(state):
+            seeds, ks = state
+            return m.estimate_ttfi_array(m.D, m.N_UK, seeds, m.tau_hop,
+                                         k_horizon=ks)
+        kind = "batched"
+
+    setup = lambda: _analytic_inputs(size)  # noqa: E731
+    return [
+        Case(f"T_k/{kind}/{size}", setup, tk, size, "evals"),
+        Case(f"estimate_coverage/{kind}/{size}", setup, cov, size, "evals"),
+        Case(f"estimate_ttfi/{kind}/{size}", setup, ttfi, size, "evals"),
+    ]
+
+
+def _table_case(size: int) -> Case:
+    import generate_tables_and_figures as m
+
+    def setup():
+        seeds, _ = _analytic_inputs(size)
+        return [int(n) for n in seeds]
+
+    return Case(f"build_multi_hop_table/{size}", setup,
+                lambda seeds: m.build_multi_hop_table(m.N_UK, seeds, "UK"),
+                size, "rows")
+
+
+def _figure_case() -> Case:
+    def setup():
+        import matplotlib
+        matplotlib.use("Agg")
+        cwd, workdir = os.getcwd(), tempfile.mkdtemp(prefix="seedsites_bench_")
+        os.chdir(workdir)
+        Path("output").mkdir(exist_ok=True)
+        return cwd, workdir
+
+    def teardown(state):
+        cwd, workdir = state
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    def run(_):
+        import contextlib
+        import io
+        import generate_tables_and_figures as m
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_uk = m.build_multi_hop_table(m.N_UK, m.seeds_UK, "UK (.co.uk)")
+            for plot in (m.plot_figure_1_couk_active,
+                         m.plot_figure_2_twohop_seeds_vs_coverage,
+                         m.plot_figure_3_seeds_90pct_by_active_share,
+                         m.plot_figure_4_threehop_seeds_vs_coverage,
+                         m.plot_figure_5_seeds_90pct_two_vs_three_hops,
+                         m.plot_figure_6_ttfi_vs_seeds,
+                         m.plot_figure_7_coverage_vs_seeds_se_vs_uk,
+                         m.plot_figure_8_ttfi_vs_seeds_se_vs_uk):
+                plot()
+            m.plot_multi_hop_coverage_and_ttfi(df_uk, "UK_co_uk")
+
+    return Case("figure_pipeline", setup, run, 10, "figures", teardown)
+
+
+def _sketch_case(size: int) -> Case:
+    from quantile_sketch import KLLSketch
+
+    def setup():
+        rng = np.random.default_rng(BENCH_SEED)
+        return np.array_split(rng.lognormal(1.0, 0.5, size), max(1, size // 1_000_000))
+
+    def run(chunks):
+        sketch = KLLSketch(seed=BENCH_SEED)
+        for chunk in chunks:
+            sketch.update(chunk)
+        return sketch.quantile([0.5, 0.95, 0.99])
+
+    return Case(f"kll_update/{size}", setup, run, size, "values")
+
+
+def _graph_cases(size: int) -> list[Case]:
+    from webgraph_csr import synthetic_webgraph
+    from webgraph_bfs import (direction_optimizing_bfs, multi_source_bfs,
+                              ttfi_summary)
+
+    n_seeds = max(1, size // 1000)
+
+    def setup_graph():
+        graph = synthetic_webgraph(size, seed=BENCH_SEED)
+        rng = np.random.default_rng(BENCH_SEED)
+        seeds = rng.choice(size, size=n_seeds, replace=False)
+        return graph, seeds
+
+    def setup_compressed():
+        from webgraph_compressed import compress
+        graph, seeds = setup_graph()
+        return compress(graph), seeds
+
+    def setup_reverse():
+        graph, seeds = setup_graph()
+        return graph, seeds, graph.transpose()
+
+    def setup_external():
+        from external_bfs import ExternalCSR
+        from webgraph_csr import save_csr
+        graph, seeds = setup_graph()
+        tmp = tempfile.TemporaryDirectory(prefix="seedsites_bench_")
+        save_csr(graph, tmp.name)
+        return ExternalCSR(tmp.name), seeds, tmp
+
+    def bfs(state):
+        graph, seeds = state
+        dist = multi_source_bfs(graph, seeds)
+        return ttfi_summary(dist)
+
+    def bfs_do(state):
+        graph, seeds, reverse = state
+        dist = direction_optimizing_bfs(graph, seeds, reverse=reverse)
+        return ttfi_summary(dist)
+
+    def bfs_external(state):
+        from external_bfs import external_bfs
+        graph, seeds, _ = state
+        return ttfi_summary(external_bfs(graph, seeds))
+
+    # Edge count is only known after generation; use the expected value.
+    from webgraph_csr import SYNTH_AVG_DEG
+    edges = int(size * SYNTH_AVG_DEG)
+    return [
+        Case(f"synthetic_graph/{size}", lambda: None,
+             lambda _: synthetic_webgraph(size, seed=BENCH_SEED),
+             edges, "edges"),
+        Case(f"bfs_ttfi/{size}", setup_graph, bfs, edges, "edges"),
+        Case(f"bfs_ttfi_compressed/{size}", setup_compressed, bfs, edges, "edges"),
+        Case(f"bfs_do_ttfi/{size}", setup_reverse, bfs_do, edges, "edges"),
+        Case(f"bfs_external_ttfi/{size}", setup_external, bfs_external, edges, "edges"),
+    ]
+
+
+def _kernel_cases(size: int) -> list[Case]:
+    import traversal_kernels as tk
+    from webgraph_csr import SYNTH_AVG_DEG
+
+    edges = int(size * SYNTH_AVG_DEG)
+
+    def setup():
+        return tk._kernels(*tk._workload(size, max(1, size // 1000), BENCH_SEED))
+
+    cases = []
+    for name in ("bfs", "or_pull", "max_pull"):
+        for backend in tk.BACKENDS:
+            def run(kernels, name=name, backend=backend):
+                return kernels[name][0](backend)
+            cases.append(Case(f"kernel_{name}/{backend}/{size}", setup, run, edges, "edges"))
+    return cases
+
+
+def build_cases(profile: str) -> list[Case]:
+    sizes = PROFILES[profile]
+    cases = []
+    for size in sizes["scalar"]:
+        cases += _analytic_cases(size, scalar=True)
+    for size in sizes["batched"]:
+        cases += _analytic_cases(size, scalar=False)
+        cases.append(_sketch_case(size))
+    cases.append(_table_case(sizes["scalar"][-1]))
+    cases.append(_figure_case())
+    for size in sizes["graph"]:
+        cases += _graph_cases(size)
+        cases += _kernel_cases(size)
+    return cases
+
+
+# --------------------------
+# Measurement
+# --------------------------
+
+def _reset_peak_rss() -> bool:
+    """
+    Reset the kernel's peak-RSS counter (Linux: "5" > /proc/self/clear_refs).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _rss_kb(field: str) -> int:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _child(case: Case, repeat: int, conn):
+    try:
+        state = case.setup()
+        try:
+            base_kb = _rss_kb("VmRSS")
+            _reset_peak_rss()
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                case.run(state)
+                times.append(time.perf_counter() - t0)
+            peak_kb = _rss_kb("VmHWM")
+        finally:
+            if case.teardown is not None:
+                case.teardown(state)
+        conn.send({"times": times, "base_kb": base_kb, "peak_kb": peak_kb})
+    except Exception as exc:  # report, don't hang the parent
+        conn.send({"error": f"{type(exc).__name__}: {exc}"})
+    finally:
+        conn.close()
+
+
+def measure(case: Case, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Run one case in a forked child and return its metrics. A child that
+    dies without reporting (OOM kill, segfault) yields an error result
+    with its exit code; a negative code is the killing signal.
+    """
+    ctx = mp.get_context("fork")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(case, repeat, child))
+    proc.start()
+    child.close()
+    try:
+        msg = parent.recv()
+    except EOFError:
+        msg = None
+    finally:
+        parent.close()
+    proc.join()
+    if msg is None:
+        return {"error": f"child exited with code {proc.exitcode} before reporting",
+                "exit_code": proc.exitcode}
+    if "error" in msg:
+        return {"error": msg["error"]}
+
+    wall = float(np.median(msg["times"]))
+    return {
+        "wall_s": wall,
+        "wall_min_s": float(min(msg["times"])),
+        "throughput": case.items / wall if wall > 0 else float("inf"),
+        "unit": f"{case.unit}/s",
+        "items": case.items,
+        "peak_rss_mb": msg["peak_kb"] / 1024.0,
+        "setup_rss_mb": msg["base_kb"] / 1024.0,
+        "repeat": repeat,
+    }
+
+
+# --------------------------
+# History file
+# --------------------------
+
+def _git_rev() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def load_history(path: Path = HISTORY_FILE) -> dict:
+    path = Path(path)
+    if not path.exists():
+        return {"version": HISTORY_VERSION, "runs": []}
+    return json.loads(path.read_text())
+
+
+def save_history(history: dict, path: Path = HISTORY_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(history, indent=2))
+    os.replace(tmp, path)
+
+
+def _select_run(history: dict, ref: str) -> dict:
+    """
+    A run is selected by list index ("-1" = latest) or by run_id.
+    """
+    runs = history["runs"]
+    try:
+        return runs[int(ref)]
+    except IndexError:
+        pass
+    except ValueError:
+        for run in runs:
+            if run["run_id"] == ref:
+                return run
+    raise KeyError(f"No benchmark run matches {ref!r}")
+
+
+def compare_runs(baseline: dict, candidate: dict,
+                 threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    Compare wall time and peak RSS of cases present in both runs.
+    A case regresses if either metric grew by more than `threshold`.
+    """
+    rows = []
+    for name, cand in candidate["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or "error" in base or "error" in cand:
+            continue
+        wall_ratio = cand["wall_s"] / base["wall_s"] if base["wall_s"] else float("inf")
+        rss_ratio = (cand["peak_rss_mb"] / base["peak_rss_mb"]
+                     if base["peak_rss_mb"] else 1.0)
+        rows.append({
+            "case": name,
+            "base_wall_s": base["wall_s"],
+            "cand_wall_s": cand["wall_s"],
+            "wall_ratio": wall_ratio,
+            "rss_ratio": rss_ratio,
+            "regression": wall_ratio > 1.0 + threshold or rss_ratio > 1.0 + threshold,
+        })
+    return rows
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def cmd_run(args) -> int:
+    cases = build_cases(args.profile)
+    if args.only:
+        cases = [c for c in cases if fnmatch.fnmatch(c.name, args.only)]
+
+    run = {
+        "run_id": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_rev": _git_rev(),
+        "profile": args.profile,
+        "host": {
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "results": {},
+    }
+
+    print(f"{'case':<42} {'wall (s)':>10} {'throughput':>16} {'peak RSS':>10}")
+    print("-" * 82)
+    for case in cases:
+        res = measure(case, repeat=args.repeat)
+        run["results"][case.name] = res
+        if "error" in res:
+            print(f"{case.name:<42} ERROR {res['error']}")
+            continue
+        print(f"{case.name:<42} {res['wall_s']:>10.4f} "
+              f"{res['throughput']:>12.3g} {case.unit:<3} "
+              f"{res['peak_rss_mb']:>8.1f}MB")
+
+    history = load_history(args.history)
+    history["runs"].append(run)
+    save_history(history, args.history)
+    print(f"\n✓ Run {run['run_id']} appended to: {args.history}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    history = load_history(args.history)
+    if len(history["runs"]) < 2 and args.baseline == "-2":
+        print("Need at least two runs in the history to compare.")
+        return 2
+    try:
+        base = _select_run(history, args.baseline)
+        cand = _select_run(history, args.candidate)
+    except KeyError as exc:
+        print(exc.args[0])
+        return 2
+    rows = compare_runs(base, cand, args.threshold)
+
+    print(f"Baseline:  {base['run_id']} ({base['git_rev']})")
+    print(f"Candidate: {cand['run_id']} ({cand['git_rev']})")
+    print(f"Threshold: +{args.threshold * 100:.0f}%\n")
+    print(f"{'case':<42} {'base (s)':>10} {'cand (s)':>10} {'time':>8} {'RSS':>8}")
+    print("-" * 82)
+    for row in rows:
+        flag = "  ⚠ REGRESSION" if row["regression"] else ""
+        print(f"{row['case']:<42} {row['base_wall_s']:>10.4f} "
+              f"{row['cand_wall_s']:>10.4f} {row['wall_ratio']:>7.2f}x "
+              f"{row['rss_ratio']:>7.2f}x{flag}")
+
+    n_reg = sum(row["regression"] for row in rows)
+    print(f"\n{n_reg} regression(s) in {len(rows)} comparable case(s)")
+    return 1 if n_reg else 0
+
+
+def cmd_list(args) -> int:
+    for case in build_cases(args.profile):
+        print(case.name)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--history", type=Path, default=HISTORY_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="run the suite and append to history")
+    p_run.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    p_run.add_argument("--only", help="glob over case names, e.g. 'bfs_*'")
+    p_run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    p_run.set_defaults(func=cmd_run)
+
+    p_cmp = sub.add_parser("compare", help="compare two runs from history")
+    p_cmp.add_argument("--baseline", default="-2", help="index or run_id")
+    p_cmp.add_argument("--candidate", default="-1", help="index or run_id")
+    p_cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    p_cmp.set_defaults(func=cmd_compare)
+
+    p_list = sub.add_parser("list", help="list case names")
+    p_list.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    p_list.set_defaults(func=cmd_list)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
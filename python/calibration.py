@@ -0,0 +1,438 @@
+"""
+calibration.py
+
+Empirical calibration of the model parameters D, r, s and theta (and
+tau_hop, when crawl logs carry timestamps), written as a new version of
+model_params.json so every model picks them up.
+
+From a graph (webgraph_csr.CSRGraph, typically memory-mapped):
+
+    1. D = E / N, read from indptr alone (no pass over the edges), or
+       distinct links / N from a graph_profile.py report
+    2. sample seeds uniformly and run a *local* BFS from each, up to
+       max_hops, recording new nodes per hop -- cost is proportional
+       to the size of the sampled balls, not the graph
+    3. hop-normalised counts z_h = new_h / D^h estimate the model's
+       per-hop factors (z_2 ~ r, z_h ~ s for h >= 3); the least-squares
+       fit of a constant is the mean, so r and s come from one matrix
+       product, for the point estimate and every bootstrap replicate
+    4. theta = 1 - |union of balls| / sum |ball|, over groups of sampled
+       seeds (cross-seed overlap at that seed density)
+
+From crawl logs: a CSV with columns seed, hop, domain[, timestamp],
+one row per fetch, streamed in chunks.
+
+Usage:
+    python calibration.py graph --graph DIR [--samples 2000] [--write]
+    python calibration.py graph --graph DIR --profile graph_profile.json
+    python calibration.py log --log crawl.csv [--write]
+    python calibration.py synthetic --nodes 1000000 [--write]
+"""
+
+import argparse
+import hashlib
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from model_params import save_model_params, params_path
+
+DEFAULT_SAMPLES = 2_000
+DEFAULT_MAX_HOPS = 3
+DEFAULT_BOOTSTRAP = 1_000
+DEFAULT_OVERLAP_HOPS = 2
+DEFAULT_OVERLAP_GROUP = 100
+CI_LEVEL = 0.95
+BOOT_BLOCK_CELLS = 10_000_000  # bootstrap weights materialised per block
+LOG_CHUNK_ROWS = 1_000_000
+DOMAIN_HASH_BITS = 40      # (seed_id << 40) | hash keeps keys in an int64
+LOG_BUCKETS = 256          # crawl-log spill files, deduplicated one at a time
+LOG_RECORD = np.dtype([("key", "<i8"), ("row", "<i8"), ("seed", "<i4"),
+                       ("hop", "<i4"), ("ts", "<f8")])
+
+
+# --------------------------
+# Graph sampling
+# --------------------------
+
+def local_ball(graph, seed: int, max_hops: int):
+    """
+    BFS from a single seed without touching any per-graph state.
+
+    Returns (new_per_hop[max_hops], edges_per_hop[max_hops], nodes_by_hop)
+    where nodes_by_hop[h] is the sorted array of nodes first seen at hop h.
+    """
+    visited = np.array([seed], dtype=np.int64)
+    frontier = visited
+    new_counts = np.zeros(max_hops, dtype=np.int64)
+    edge_counts = np.zeros(max_hops, dtype=np.int64)
+    layers = [visited]
+    for h in range(max_hops):
+        nbrs = np.unique(graph.successors(frontier))
+        edge_counts[h] = graph.indptr[frontier + 1].sum() - graph.indptr[frontier].sum()
+        frontier = np.setdiff1d(nbrs, visited, assume_unique=True)
+        new_counts[h] = frontier.size
+        layers.append(frontier)
+        if frontier.size == 0:
+            layers.extend([frontier] * (max_hops - h - 1))
+            break
+        visited = np.union1d(visited, frontier)
+    return new_counts, edge_counts, layers
+
+
+def sample_hop_profiles(graph, n_samples: int = DEFAULT_SAMPLES,
+                        max_hops: int = DEFAULT_MAX_HOPS,
+                        overlap_hops: int = DEFAULT_OVERLAP_HOPS,
+                        seed: int = 42):
+    """
+    Sample seeds uniformly and record per-hop new-node counts.
+
+    Returns (seeds, new_counts[n_samples, max_hops],
+             edge_counts[n_samples, max_hops], balls) where balls[i] holds
+    the nodes within overlap_hops of seed i (for the overlap estimate).
+    """
+    rng = np.random.default_rng(seed)
+    n = graph.n_nodes
+    seeds = rng.choice(n, size=min(n_samples, n), replace=False)
+    new_counts = np.zeros((seeds.size, max_hops), dtype=np.int64)
+    edge_counts = np.zeros((seeds.size, max_hops), dtype=np.int64)
+    balls = []
+    for i, u in enumerate(seeds):
+        new_counts[i], edge_counts[i], layers = local_ball(graph, int(u), max_hops)
+        balls.append(np.concatenate(layers[:overlap_hops + 1]))
+    return seeds, new_counts, edge_counts, balls
+
+
+# --------------------------
+# Fitting
+# --------------------------
+
+def fit_dedup_factors(new_counts: np.ndarray, D: float,
+                      n_boot: int = DEFAULT_BOOTSTRAP, seed: int = 42) -> dict:
+    """
+    Fit the per-hop factors of T_k to sampled counts.
+
+    z[i, h] = new_counts[i, h] / D^(h+1). The least-squares constant for
+    hop 2 is r = mean(z[:, 1]); for hops >= 3 a single s = mean(z[:, 2:]).
+    Bootstrap replicates reweight seeds with multinomial counts, so a
+    block of B fits is one (B x n) @ (n x H) product.
+    """
+    n, H = new_counts.shape
+    z = new_counts / D ** np.arange(1, H + 1, dtype=float)
+
+    def fit(hop_means):
+        out = {"hop1_factor": hop_means[..., 0]}
+        if H >= 2:
+            out["r"] = hop_means[..., 1]
+        if H >= 3:
+            out["s"] = hop_means[..., 2:].mean(axis=-1)
+        return out
+
+    point = {k: float(v) for k, v in fit(z.mean(axis=0)).items()}
+    point["hop_factors"] = z.mean(axis=0).tolist()
+
+    rng = np.random.default_rng(seed)
+    block = max(1, BOOT_BLOCK_CELLS // n)
+    hop_means = np.concatenate([
+        (rng.multinomial(n, np.full(n, 1.0 / n), size=min(block, n_boot - lo)) / n) @ z
+        for lo in range(0, n_boot, block)
+    ])
+    boot = fit(hop_means)
+    alpha = (1.0 - CI_LEVEL) / 2.0
+    ci = {k: [float(np.quantile(v, alpha)), float(np.quantile(v, 1 - alpha))]
+          for k, v in boot.items()}
+    return {"point": point, "ci": ci}
+
+
+def estimate_overlap(balls: list, group_size: int = DEFAULT_OVERLAP_GROUP,
+                     n_boot: int = DEFAULT_BOOTSTRAP, seed: int = 42) -> dict:
+    """
+    theta = 1 - |union| / sum |ball_i| over disjoint groups of seeds.
+    The CI bootstraps over groups.
+    """
+    group_size = max(1, min(group_size, len(balls)))
+    thetas = []
+    for lo in range(0, len(balls) - group_size + 1, group_size):
+        group = balls[lo:lo + group_size]
+        total = sum(b.size for b in group)
+        union = np.unique(np.concatenate(group)).size
+        thetas.append(1.0 - union / total if total else 0.0)
+    thetas = np.asarray(thetas)
+
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, thetas.size, size=(n_boot, thetas.size))
+    boot = thetas[idx].mean(axis=1)
+    alpha = (1.0 - CI_LEVEL) / 2.0
+    return {"theta": float(thetas.mean()),
+            "ci": [float(np.quantile(boot, alpha)), float(np.quantile(boot, 1 - alpha))],
+            "groups": int(thetas.size), "group_size": group_size}
+
+
+def calibrate_graph(graph, n_samples: int = DEFAULT_SAMPLES,
+                    max_hops: int = DEFAULT_MAX_HOPS,
+                    overlap_hops: int = DEFAULT_OVERLAP_HOPS,
+                    overlap_group: int = DEFAULT_OVERLAP_GROUP,
+                    n_boot: int = DEFAULT_BOOTSTRAP, seed: int = 42,
+                    profile: dict | None = None) -> dict:
+    """
+    Full graph calibration; returns {params, ci, calibration} ready for
+    model_params.save_model_params. With a graph_profile.py report, D
+    counts distinct links only (no self-loops or duplicates) and the
+    report's skew / reciprocity statistics are kept with the calibration.
+    """
+    D = graph.n_edges / float(graph.n_nodes)
+    if profile is not None:
+        if profile["n_nodes"] != graph.n_nodes or profile["n_edges"] != graph.n_edges:
+            raise ValueError(f"Profile {profile['graph']} does not match this graph "
+                             f"({profile['n_nodes']:,} nodes, {profile['n_edges']:,} links)")
+        D = profile["D_distinct"]
+    seeds, new_counts, edge_counts, balls = sample_hop_profiles(
+        graph, n_samples, max_hops, overlap_hops, seed)
+    fit = fit_dedup_factors(new_counts, D, n_boot, seed)
+    overlap = estimate_overlap(balls, overlap_group, n_boot, seed)
+
+    params = {"D": D, "theta": overlap["theta"]}
+    params.update({k: fit["point"][k] for k in ("r", "s") if k in fit["point"]})
+    ci = {k: fit["ci"][k] for k in ("r", "s") if k in fit["ci"]}
+    ci["theta"] = overlap["ci"]
+
+    dup = 1.0 - new_counts.sum(axis=0) / np.maximum(edge_counts.sum(axis=0), 1)
+    result = {
+        "params": params,
+        "ci": ci,
+        "calibration": {
+            "method": "graph",
+            "n_nodes": graph.n_nodes,
+            "n_edges": graph.n_edges,
+            "samples": int(seeds.size),
+            "max_hops": max_hops,
+            "hop_factors": fit["point"]["hop_factors"],
+            "hop1_factor": fit["point"]["hop1_factor"],
+            "duplicate_ratio_by_hop": dup.tolist(),
+            "overlap": overlap,
+        },
+    }
+    if profile is not None:
+        result["calibration"]["profile"] = {
+            "D_all_links": profile["D"],
+            "reciprocity": profile["reciprocity"],
+            "tld_local_share": profile["tld_local_share"],
+            "clustering": profile["clustering"]["average_local"],
+            "gini_out": profile["out_degree"]["gini"],
+            "gini_in": profile["in_degree"]["gini"],
+            "top_share_out": profile["out_degree"]["top_share"],
+            "tail_alpha_in": profile["in_degree"]["tail_alpha"],
+        }
+    return result
+
+
+# --------------------------
+# Crawl logs
+# --------------------------
+
+def _domain_keys(domains: pd.Series) -> np.ndarray:
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(d.encode(), digest_size=5).digest(), "little")
+         for d in domains),
+        dtype=np.int64, count=len(domains))
+
+
+def _spill_log(path, chunksize: int, buckets: int, spill_dir: Path):
+    """
+    Stream the log into `buckets` spill files of LOG_RECORD rows, keyed
+    by domain hash so every (seed, domain) key -- and every seed that
+    found a domain -- lands in one bucket. Returns the seed-name map,
+    the largest hop and the timestamp origin (None without timestamps).
+    """
+    files = [open(spill_dir / f"bucket{b:04d}.bin", "wb") for b in range(buckets)]
+    seed_ids: dict[str, int] = {}
+    max_hop, t_ref, row0 = -1, None, 0
+    try:
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            rec = np.empty(len(chunk), dtype=LOG_RECORD)
+            sid = np.array([seed_ids.setdefault(s, len(seed_ids))
+                            for s in chunk["seed"].astype(str)], dtype=np.int64)
+            domain = _domain_keys(chunk["domain"].astype(str))
+            rec["key"] = (sid << DOMAIN_HASH_BITS) | domain
+            rec["row"] = np.arange(row0, row0 + len(chunk))
+            rec["seed"] = sid
+            rec["hop"] = chunk["hop"].to_numpy(dtype=np.int64)
+            rec["ts"] = np.nan
+            if "timestamp" in chunk:
+                # seconds since the epoch, whatever resolution pandas infers
+                ts = ((pd.to_datetime(chunk["timestamp"], utc=True)
+                       - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)).to_numpy()
+                if t_ref is None and len(ts):
+                    t_ref = float(np.nanmin(ts))
+                rec["ts"] = ts - t_ref
+            row0 += len(chunk)
+            if len(chunk):
+                max_hop = max(max_hop, int(rec["hop"].max()))
+            bucket = domain % buckets
+            order = np.argsort(bucket, kind="stable")
+            bounds = np.searchsorted(bucket[order], np.arange(buckets + 1))
+            for b in np.flatnonzero(np.diff(bounds)):
+                rec[order[bounds[b]:bounds[b + 1]]].tofile(files[b])
+    finally:
+        for f in files:
+            f.close()
+    return seed_ids, max_hop, t_ref
+
+
+def calibrate_log(path, n_boot: int = DEFAULT_BOOTSTRAP, seed: int = 42,
+                  chunksize: int = LOG_CHUNK_ROWS, buckets: int = LOG_BUCKETS,
+                  spill_dir=None) -> dict:
+    """
+    Calibrate from a crawl log CSV (seed, hop, domain[, timestamp]).
+
+    A fetch is "new" if its domain had not yet been seen from the same
+    seed. The log is spilled to disk in buckets by domain hash and each
+    bucket is deduplicated on its own (first row per (seed, domain)
+    key), so memory is bounded by chunksize and the largest bucket, not
+    the log. D is taken from the hop-1 fan-out, r / s from the
+    hop-normalised new counts, theta from how many seeds discovered
+    each domain. With timestamps, tau_hop is the slope of
+    first-discovery time against hop.
+    """
+    with tempfile.TemporaryDirectory(prefix="calibration_", dir=spill_dir) as tmp:
+        seed_ids, max_hop, t_ref = _spill_log(path, chunksize, buckets, Path(tmp))
+        n_seeds = len(seed_ids)
+        if n_seeds == 0:
+            raise ValueError(f"Crawl log {path} has no fetches")
+        if max_hop < 1:
+            raise ValueError(f"Crawl log {path} has no fetches with hop >= 1")
+
+        new = np.zeros(n_seeds * (max_hop + 1), dtype=np.int64)
+        keys_total, domains_total = 0, 0
+        # tau_hop accumulators: per-seed first time, sum(t * h), sum(h)
+        t0 = np.full(n_seeds, np.inf)
+        th = np.zeros(n_seeds)
+        h_sum = np.zeros(n_seeds)
+        h_sq = 0.0
+        for b in range(buckets):
+            rec = np.fromfile(Path(tmp) / f"bucket{b:04d}.bin", dtype=LOG_RECORD)
+            if rec.size == 0:
+                continue
+            rec = rec[np.lexsort((rec["row"], rec["key"]))]
+            first = rec[np.r_[True, rec["key"][1:] != rec["key"][:-1]]]
+            sid, hop = first["seed"].astype(np.int64), first["hop"].astype(np.int64)
+            new += np.bincount(sid * (max_hop + 1) + hop, minlength=new.size)
+
+            keys_total += first.size
+            domains_total += np.unique(first["key"] & ((1 << DOMAIN_HASH_BITS) - 1)).size
+
+            if t_ref is not None:
+                ts = first["ts"]
+                np.minimum.at(t0, sid, ts)
+                mask = hop > 0
+                np.add.at(th, sid[mask], ts[mask] * hop[mask])
+                np.add.at(h_sum, sid[mask], hop[mask])
+                h_sq += float((hop[mask] ** 2).sum())
+
+    counts = new.reshape(n_seeds, max_hop + 1)[:, 1:]
+    D = float(counts[:, 0].mean())
+    fit = fit_dedup_factors(counts, D, n_boot, seed)
+
+    theta = 1.0 - domains_total / float(keys_total)
+
+    params = {"D": D, "theta": theta}
+    params.update({k: fit["point"][k] for k in ("r", "s") if k in fit["point"]})
+    ci = {k: fit["ci"][k] for k in ("r", "s") if k in fit["ci"]}
+
+    if t_ref is not None and h_sq > 0:
+        # least-squares slope through the origin: (t - t0[seed]) ~ tau_hop * hop
+        used = h_sum > 0
+        dt_h = (th[used] - t0[used] * h_sum[used]).sum()
+        params["tau_hop"] = float(dt_h / h_sq)
+
+    return {
+        "params": params,
+        "ci": ci,
+        "calibration": {
+            "method": "crawl_log",
+            "log": str(path),
+            "seeds": n_seeds,
+            "hop_factors": fit["point"]["hop_factors"],
+            "hop1_factor": fit["point"]["hop1_factor"],
+        },
+    }
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def _report(result: dict):
+    print("\nCalibrated parameters")
+    print("-" * 60)
+    for key, value in result["params"].items():
+        ci = result["ci"].get(key)
+        ci_txt = f"  [{ci[0]:.4f}, {ci[1]:.4f}]" if ci else ""
+        print(f"  {key:<8} {value:10.4f}{ci_txt}")
+    factors = result["calibration"]["hop_factors"]
+    print("  per-hop factors new_h / D^h:",
+          ", ".join(f"h{h + 1}={f:.4f}" for h, f in enumerate(factors)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate D, r, s, theta")
+    sub = parser.add_subparsers(dest="source", required=True)
+
+    for name in ("graph", "synthetic"):
+        p = sub.add_parser(name)
+        if name == "graph":
+            p.add_argument("--graph", required=True, help="directory from save_csr")
+            p.add_argument("--profile", help="graph_profile.py report for this graph")
+        else:
+            p.add_argument("--nodes", type=int, default=1_000_000)
+        p.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+        p.add_argument("--max-hops", type=int, default=DEFAULT_MAX_HOPS)
+        p.add_argument("--overlap-group", type=int, default=DEFAULT_OVERLAP_GROUP)
+
+    p_log = sub.add_parser("log")
+    p_log.add_argument("--log", required=True, help="CSV: seed,hop,domain[,timestamp]")
+
+    for p in sub.choices.values():
+        p.add_argument("--bootstrap", type=int, default=DEFAULT_BOOTSTRAP)
+        p.add_argument("--seed", type=int, default=42)
+        p.add_argument("--write", action="store_true",
+                       help="write a new version of the parameter file")
+        p.add_argument("--params", help="parameter file (default: model_params.json)")
+
+    args = parser.parse_args(argv)
+
+    if args.source == "log":
+        try:
+            result = calibrate_log(args.log, args.bootstrap, args.seed)
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+        source = f"crawl log {args.log}"
+    else:
+        profile = None
+        if args.source == "graph":
+            from webgraph_csr import load_csr
+            graph = load_csr(args.graph, mmap=True)
+            source = f"graph {args.graph}"
+            if args.profile:
+                profile = json.loads(Path(args.profile).read_text())
+        else:
+            from webgraph_csr import synthetic_webgraph
+            graph = synthetic_webgraph(args.nodes, seed=args.seed)
+            source = f"synthetic graph ({args.nodes:,} nodes)"
+        result = calibrate_graph(graph, args.samples, args.max_hops,
+                                 overlap_group=args.overlap_group,
+                                 n_boot=args.bootstrap, seed=args.seed,
+                                 profile=profile)
+
+    _report(result)
+    if args.write:
+        doc = save_model_params(result["params"], args.params, source=source,
+                                ci=result["ci"], extra=result["calibration"])
+        print(f"\n✓ Wrote version {doc['version']} to: {params_path(args.params)}")
+
+
+if __name__ == "__main__":
+    main()
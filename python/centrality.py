@@ -0,0 +1,274 @@
+"""
+centrality.py
+
+Centrality stage for seed selection over a CSR (or compressed) graph:
+
+    - PageRank           : pull-style power iteration, float32 state
+    - personalized PR    : teleport only to an existing seed set, so the
+                           ranking favours domains those seeds reach
+    - harmonic (sampled) : H(v) ~ n/k * sum_{pivots p} 1 / d(v, p), from
+                           k BFS runs on the transposed graph
+
+This replaces the "normalised in-degree" PageRank proxy of the
+Mathematica classifier prototype. Power iteration is blocked by edge
+ranges so temporaries stay bounded, stops at an L1 tolerance, and can
+warm-start from a previous score vector (e.g. last month's crawl).
+
+Usage:
+    python centrality.py pagerank --graph ../output/couk_graph --top 10000
+    python centrality.py ppr --graph ../output/couk_graph --seeds seeds.txt
+    python centrality.py harmonic --synthetic 1000000 --samples 32
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from domain_names import load_seed_list
+from webgraph_bfs import UNREACHED, direction_optimizing_bfs
+
+DAMPING = 0.85
+TOL = 1e-6               # L1 change between iterations
+MAX_ITER = 100
+BLOCK_EDGES = 16_000_000     # edges gathered per pull block
+HARMONIC_SAMPLES = 32
+
+
+# --------------------------
+# PageRank
+# --------------------------
+
+def _pull_blocks(reverse):
+    """
+    Precompute, per block of target nodes, the in-edge range and the
+    reduceat offsets of targets with at least one in-edge.
+    """
+    indptr = reverse.indptr
+    n = reverse.n_nodes
+    blocks = []
+    lo = 0
+    while lo < n:
+        hi = int(np.searchsorted(indptr, indptr[lo] + BLOCK_EDGES, side="right")) - 1
+        hi = min(max(hi, lo + 1), n)
+        seg = np.asarray(indptr[lo:hi + 1])
+        nz = np.flatnonzero(np.diff(seg) > 0)
+        blocks.append((lo, hi, int(seg[0]), int(seg[-1]), nz + lo, seg[nz] - seg[0]))
+        lo = hi
+    return blocks
+
+
+def _pull(reverse, blocks, contrib: np.ndarray, out: np.ndarray):
+    """
+    out[v] = sum of contrib[u] over in-neighbours u of v.
+    """
+    for lo, hi, a, b, targets, starts in blocks:
+        out[lo:hi] = 0.0
+        if targets.size:
+            vals = contrib[reverse.indices[a:b]]
+            out[targets] = np.add.reduceat(vals, starts)
+
+
+def pagerank(graph, reverse=None, damping: float = DAMPING,
+             personalization=None, x0=None, tol: float = TOL,
+             max_iter: int = MAX_ITER, verbose: bool = False):
+    """
+    PageRank scores (float32, summing to 1). Returns (scores, info) where
+    info has iterations, final L1 change and whether tol was reached.
+
+    personalization: None (uniform teleport), or node IDs / domain names
+    to teleport to uniformly (personalized PageRank). Dangling mass
+    follows the teleport vector.
+    x0: warm start (any non-negative vector, renormalised).
+    """
+    n = graph.n_nodes
+    if reverse is None:
+        csr = graph if hasattr(graph, "transpose") else graph.to_csr()
+        reverse = csr.transpose()
+    out_deg = np.diff(graph.indptr) if hasattr(graph, "indptr") else graph.out_degree()
+    inv_out = np.zeros(n, dtype=np.float32)
+    has_out = out_deg > 0
+    inv_out[has_out] = 1.0 / out_deg[has_out]
+    dangling = np.flatnonzero(~has_out)
+
+    if personalization is None:
+        teleport = np.float32(1.0 / n)
+    else:
+        ids = np.unique(graph.node_ids(personalization))
+        teleport = np.zeros(n, dtype=np.float32)
+        teleport[ids] = 1.0 / ids.size
+
+    if x0 is None:
+        x = np.broadcast_to(teleport, (n,)).astype(np.float32)
+    else:
+        x = np.asarray(x0, dtype=np.float32).copy()
+        if x.size != n:
+            raise ValueError(f"Warm start has {x.size:,} entries, graph has {n:,} nodes")
+        x /= x.sum(dtype=np.float64)
+
+    blocks = _pull_blocks(reverse)
+    pulled = np.empty(n, dtype=np.float32)
+    contrib = np.empty(n, dtype=np.float32)
+    err, it = float("inf"), 0
+    for it in range(1, max_iter + 1):
+        np.multiply(x, inv_out, out=contrib)
+        _pull(reverse, blocks, contrib, pulled)
+        leak = float(x[dangling].sum(dtype=np.float64))
+        x_new = damping * pulled + np.float32(1.0 - damping + damping * leak) * teleport
+        x_new /= np.float32(x_new.sum(dtype=np.float64))
+        err = float(np.abs(x_new - x).sum(dtype=np.float64))
+        x = x_new
+        if verbose:
+            print(f"  iter {it:3d}  L1 change {err:.3e}")
+        if err < tol:
+            break
+    return x, {"iterations": it, "l1_change": err, "converged": err < tol}
+
+
+def personalized_pagerank(graph, seeds, **kwargs):
+    """
+    PageRank teleporting only to `seeds` (IDs or domain names).
+    """
+    return pagerank(graph, personalization=seeds, **kwargs)
+
+
+# --------------------------
+# Harmonic centrality
+# --------------------------
+
+def harmonic_centrality(graph, reverse=None, samples: int = HARMONIC_SAMPLES,
+                        max_hops: int | None = None, seed: int = 42) -> np.ndarray:
+    """
+    Sampled out-harmonic centrality: how close each node is to the rest
+    of the graph along outlinks, estimated from `samples` random pivots.
+
+    A BFS from pivot p on the transposed graph gives d(v, p) for every
+    v; each pivot contributes n / samples * 1 / d(v, p).
+    """
+    n = graph.n_nodes
+    # direction_optimizing_bfs reads indptr of both directions
+    csr = graph if hasattr(graph, "indptr") else graph.to_csr()
+    if reverse is None:
+        reverse = csr.transpose()
+    rng = np.random.default_rng(seed)
+    pivots = rng.choice(n, size=min(samples, n), replace=False)
+    inv_hop = np.zeros(256, dtype=np.float32)
+    inv_hop[1:UNREACHED] = 1.0 / np.arange(1, UNREACHED)
+
+    scores = np.zeros(n, dtype=np.float32)
+    for p in pivots:
+        dist = direction_optimizing_bfs(reverse, [int(p)], max_hops=max_hops,
+                                        reverse=csr)
+        scores += inv_hop[dist]
+    scores *= np.float32(n / pivots.size)
+    return scores
+
+
+# --------------------------
+# Seed candidates
+# --------------------------
+
+def rank_candidates(scores: np.ndarray, top: int, names=None,
+                    exclude=None) -> pd.DataFrame:
+    """
+    Top-`top` nodes by score (ties by ID), skipping `exclude` (e.g. the
+    seeds already in use).
+    """
+    scores = np.asarray(scores)
+    order = np.lexsort((np.arange(scores.size), -scores))
+    if exclude is not None and len(exclude):
+        order = order[~np.isin(order, np.asarray(exclude, dtype=np.int64))]
+    order = order[:top]
+    df = pd.DataFrame({"Rank": np.arange(1, order.size + 1), "Node": order,
+                       "Score": scores[order]})
+    if names is not None:
+        df.insert(2, "Domain", names.names(order))
+    return df
+
+
+def write_candidates(df: pd.DataFrame, out_prefix, header: str = "") -> tuple[Path, Path]:
+    """
+    Write <prefix>.csv (with scores) and <prefix>.txt, a seed list that
+    domain_names.load_seed_list reads directly.
+    """
+    out_prefix = Path(out_prefix)
+    out_prefix.parent.mkdir(parents=True, exist_ok=True)
+    csv_path = out_prefix.with_suffix(".csv")
+    txt_path = out_prefix.with_suffix(".txt")
+    df.to_csv(csv_path, index=False)
+    column = "Domain" if "Domain" in df else "Node"
+    with open(txt_path, "w", encoding="utf-8") as fh:
+        if header:
+            fh.write(f"# {header}\n")
+        for item in df[column]:
+            fh.write(f"{item}\n")
+    return csv_path, txt_path
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Centrality ranking of seed candidates")
+    parser.add_argument("method", choices=["pagerank", "ppr", "harmonic"])
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", help="directory from save_csr / save_compressed")
+    src.add_argument("--synthetic", type=int, metavar="N_NODES")
+    parser.add_argument("--seeds", help="seed list (PPR teleport set; excluded from output)")
+    parser.add_argument("--warm-start", help=".npy scores from a previous run")
+    parser.add_argument("--damping", type=float, default=DAMPING)
+    parser.add_argument("--tol", type=float, default=TOL)
+    parser.add_argument("--max-iter", type=int, default=MAX_ITER)
+    parser.add_argument("--samples", type=int, default=HARMONIC_SAMPLES)
+    parser.add_argument("--top", type=int, default=10_000)
+    parser.add_argument("--out", default="../output/seed_candidates")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.graph:
+        from webgraph_compressed import load_graph
+        graph = load_graph(args.graph)
+    else:
+        from webgraph_csr import synthetic_webgraph
+        graph = synthetic_webgraph(args.synthetic, seed=args.seed)
+    seeds = load_seed_list(args.seeds, graph.names) if args.seeds else None
+    if args.method == "ppr" and seeds is None:
+        parser.error("ppr needs --seeds")
+
+    t0 = time.perf_counter()
+    csr = graph if hasattr(graph, "transpose") else graph.to_csr()
+    reverse = csr.transpose()
+    info = {}
+    if args.method == "harmonic":
+        scores = harmonic_centrality(csr, reverse, args.samples, seed=args.seed)
+    else:
+        x0 = np.load(args.warm_start) if args.warm_start else None
+        scores, info = pagerank(graph, reverse, args.damping,
+                                personalization=seeds if args.method == "ppr" else None,
+                                x0=x0, tol=args.tol, max_iter=args.max_iter,
+                                verbose=True)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 80)
+    print(f"{args.method.upper()}: {graph.n_nodes:,} nodes, {graph.n_edges:,} edges "
+          f"in {elapsed:.1f}s" + (f", {info['iterations']} iterations "
+                                  f"(L1 {info['l1_change']:.2e})" if info else ""))
+    print("=" * 80)
+
+    df = rank_candidates(scores, args.top, graph.names, exclude=seeds)
+    print(df.head(10).to_string(index=False))
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    np.save(out.with_name(out.name + f"_{args.method}_scores.npy"), scores)
+    csv_path, txt_path = write_candidates(
+        df, out, header=f"{args.method} top {args.top:,} " + json.dumps(info))
+    print(f"✓ Saved: {csv_path}")
+    print(f"✓ Saved: {txt_path}")
+
+
+if __name__ == "__main__":
+    main()
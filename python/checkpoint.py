@@ -0,0 +1,229 @@
+"""
+checkpoint.py
+
+Periodic, atomic checkpoints for long simulations and sweeps.
+
+A checkpoint is a directory of plain .npy arrays (memory-mappable, no
+pickles) plus a small state.json (counters, completed sweep cells,
+RNG state). Each save goes to a fresh directory; once every file is
+fsynced, a pointer file <name>.json is swapped in with os.replace, so a
+crash mid-save leaves the previous checkpoint intact. Writing the state
+of a 10M-node BFS (uint8 distances + frontier) takes tens of ms.
+
+    store = CheckpointStore("../output/checkpoints")
+    ckpt = Checkpointer(store, "bfs_uk_1000", every=1, resume=True)
+    dist = multi_source_bfs(graph, seeds, checkpoint=ckpt)
+
+Engines call ckpt.restore() once at start and ckpt.maybe_save(...)
+after each step; a resumed run continues from the last saved step and
+produces bit-identical results.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Not JSON serialisable: {type(obj).__name__}")
+
+
+def _fsync_write(path: Path, data: bytes):
+    with open(path, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def _fsync_dir(path: Path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:          # not supported on this platform
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# --------------------------
+# RNG state
+# --------------------------
+
+def rng_state(rng: np.random.Generator) -> dict:
+    """
+    JSON-serialisable state of a numpy Generator.
+    """
+    return rng.bit_generator.state
+
+
+def rng_from_state(state: dict) -> np.random.Generator:
+    """
+    Generator continuing exactly where rng_state() was taken.
+    """
+    bit_gen = getattr(np.random, state["bit_generator"])()
+    bit_gen.state = state
+    return np.random.Generator(bit_gen)
+
+
+# --------------------------
+# Store
+# --------------------------
+
+class CheckpointStore:
+    """
+    Directory of named checkpoints; only the latest of each name is kept.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _pointer(self, name: str) -> Path:
+        return self.root / f"{name}.json"
+
+    def _current(self, name: str) -> dict | None:
+        try:
+            return json.loads(self._pointer(name).read_text())
+        except FileNotFoundError:
+            return None
+
+    def exists(self, name: str) -> bool:
+        return self._current(name) is not None
+
+    def save(self, name: str, arrays: dict, state: dict) -> Path:
+        """
+        Atomically replace checkpoint `name` with `arrays` (written as
+        <key>.npy) and `state` (JSON).
+        """
+        current = self._current(name)
+        seq = current["seq"] + 1 if current else 0
+        final = self.root / f"{name}.{seq}"
+        tmp = self.root / f".{name}.{seq}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        for key, arr in arrays.items():
+            with open(tmp / f"{key}.npy", "wb") as fh:
+                np.save(fh, np.ascontiguousarray(arr))
+                fh.flush()
+                os.fsync(fh.fileno())
+        _fsync_write(tmp / "state.json",
+                     json.dumps(state, default=_json_default).encode())
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+
+        pointer = {"format": FORMAT_VERSION, "seq": seq, "dir": final.name,
+                   "arrays": sorted(arrays), "saved_at": time.time()}
+        ptr_tmp = self.root / f".{name}.json.tmp"
+        _fsync_write(ptr_tmp, json.dumps(pointer).encode())
+        os.replace(ptr_tmp, self._pointer(name))
+        _fsync_dir(self.root)
+        if current:
+            shutil.rmtree(self.root / current["dir"], ignore_errors=True)
+        return final
+
+    def load(self, name: str, mmap: bool = True):
+        """
+        (arrays, state) of the latest checkpoint, or None. Arrays are
+        memory-mapped read-only unless mmap=False.
+        """
+        current = self._current(name)
+        if current is None:
+            return None
+        if current.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Checkpoint {name!r} has unsupported format {current.get('format')}")
+        directory = self.root / current["dir"]
+        mode = "r" if mmap else None
+        arrays = {key: np.load(directory / f"{key}.npy", mmap_mode=mode)
+                  for key in current["arrays"]}
+        state = json.loads((directory / "state.json").read_text())
+        return arrays, state
+
+    def clear(self, name: str):
+        current = self._current(name)
+        if current:
+            self._pointer(name).unlink(missing_ok=True)
+            shutil.rmtree(self.root / current["dir"], ignore_errors=True)
+
+
+# --------------------------
+# Engine hook
+# --------------------------
+
+class Checkpointer:
+    """
+    Save policy for one run: checkpoint every `every` steps and/or at
+    most once per `interval` seconds (whichever allows a save first).
+    Without `resume`, any earlier checkpoint of the same name is
+    discarded at start.
+    """
+
+    def __init__(self, store: CheckpointStore, name: str, every: int = 1,
+                 interval: float = 0.0, resume: bool = False):
+        self.store = store
+        self.name = name
+        self.every = max(1, every)
+        self.interval = interval
+        self.resume = resume
+        self.saves = 0
+        self.save_seconds = 0.0
+        self.fingerprint = None
+        self._last = time.perf_counter()
+
+    def restore(self, fingerprint: dict | None = None):
+        """
+        (arrays, state) to continue from, or None for a fresh start.
+        `fingerprint` (e.g. graph size and seed hash) is stored with every
+        later save and must match the one in an existing checkpoint.
+        """
+        self.fingerprint = fingerprint
+        if not self.resume:
+            self.store.clear(self.name)
+            return None
+        saved = self.store.load(self.name, mmap=True)
+        if saved is None:
+            return None
+        arrays, state = saved
+        if fingerprint is not None and state.get("fingerprint") != fingerprint:
+            raise ValueError(f"Checkpoint {self.name!r} was written for a different run: "
+                             f"{state.get('fingerprint')} != {fingerprint}")
+        return arrays, state
+
+    def maybe_save(self, step: int, arrays: dict, state: dict,
+                   force: bool = False) -> bool:
+        """
+        Save if the policy says step `step` is due (or `force`).
+        """
+        now = time.perf_counter()
+        due = step % self.every == 0 or (self.interval > 0 and now - self._last >= self.interval)
+        if not (due or force):
+            return False
+        if self.fingerprint is not None:
+            state = {**state, "fingerprint": self.fingerprint}
+        self.store.save(self.name, arrays, state)
+        self._last = time.perf_counter()
+        self.saves += 1
+        self.save_seconds += self._last - now
+        return True
+
+
+def seed_fingerprint(n_nodes: int, seeds: np.ndarray, **extra) -> dict:
+    """
+    Identity of a traversal run: graph size, seed count and a hash of
+    the (sorted, unique) seed IDs, plus any extra settings.
+    """
+    seeds = np.unique(np.asarray(seeds, dtype=np.int64))
+    return {"n_nodes": int(n_nodes), "n_seeds": int(seeds.size),
+            "seed_hash": hashlib.blake2b(seeds.tobytes(), digest_size=8).hexdigest(),
+            **extra}
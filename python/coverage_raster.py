@@ -0,0 +1,280 @@
+"""
+coverage_raster.py
+
+Rasterised coverage figures for real traversal output (hop depth per
+node, as returned by multi_source_bfs), replacing the 100-node
+spring_layout drawings of generate_toy_graphs.py for graphs with
+10^5 - 10^7 nodes.
+
+Layout (computed once per graph, cached as .npy, shared by every
+scenario figure):
+
+    angle  : node ID order around the circle, so host-ordered IDs of a
+             real crawl (and synthetic locality) stay close together
+    radius : in-degree rank, hubs in the centre; sqrt keeps the disc
+             evenly filled
+
+Two views of the same layout:
+
+    layout : nodes at their layout position, coloured by hop depth
+    rings  : same angle, but radius banded by hop depth (seeds in the
+             centre, unreached nodes on the outer ring)
+
+Nodes are binned straight into a NumPy RGB buffer (mean colour per
+pixel, alpha by log density) and a sample of discovery edges
+(dist[v] == dist[u] + 1) is drawn underneath as line densities.
+No per-node matplotlib artists, so 10^7 nodes render in seconds.
+
+Usage:
+    python coverage_raster.py --synthetic 1000000 --seeds 100 1000 5000 --hops 2
+    python coverage_raster.py --graph ../output/couk_graph --seed-file seeds.txt --mode layout
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from webgraph_bfs import UNREACHED, multi_source_bfs
+
+IMAGE_SIZE = 1600            # pixels per side
+EDGE_SAMPLES = 20_000        # discovery edges drawn per figure
+UNREACHED_RGB = (0.85, 0.85, 0.85)
+EDGE_RGB = (0.55, 0.6, 0.65)
+BACKGROUND_RGB = (1.0, 1.0, 1.0)
+MIN_ALPHA = 0.35             # alpha of a pixel holding a single node
+
+
+# --------------------------
+# Layout
+# --------------------------
+
+def graph_layout(graph, cache=None, seed: int = 0) -> np.ndarray:
+    """
+    (2, n) float32 positions in the unit disc. With `cache`, positions
+    are read from / written to that .npy file. Ties in in-degree are
+    broken at random, so equal-degree nodes fill their annulus instead
+    of forming a spiral along the ID order.
+    """
+    n = graph.n_nodes
+    if cache is not None and Path(cache).exists():
+        pos = np.load(cache)
+        if pos.shape == (2, n):
+            return pos
+    in_deg = np.bincount(graph.indices, minlength=n)
+    order = np.lexsort((np.random.default_rng(seed).random(n), -in_deg))   # hubs first
+    rank = np.empty(n, dtype=np.float64)
+    rank[order] = (np.arange(n) + 0.5) / n
+    radius = np.sqrt(rank)
+    angle = 2.0 * np.pi * (np.arange(n) + 0.5) / n
+    pos = np.stack([radius * np.cos(angle), radius * np.sin(angle)]).astype(np.float32)
+    if cache is not None:
+        Path(cache).parent.mkdir(parents=True, exist_ok=True)
+        np.save(cache, pos)
+    return pos
+
+
+def ring_layout(pos: np.ndarray, dist: np.ndarray, max_hops: int) -> np.ndarray:
+    """
+    Re-band the cached layout by hop depth: hop h occupies radii
+    [h, h + 1] / (max_hops + 2), unreached nodes the outermost band.
+    The position within a band keeps the layout radius.
+    """
+    radius = np.hypot(pos[0], pos[1])
+    band = np.minimum(dist, max_hops + 1).astype(np.float32)
+    new_r = (band + radius) / (max_hops + 2)
+    scale = np.divide(new_r, radius, out=np.zeros_like(new_r), where=radius > 0)
+    return pos * scale
+
+
+# --------------------------
+# Rasterisation
+# --------------------------
+
+def hop_colors(max_hops: int) -> np.ndarray:
+    """
+    RGB per class: hops 0..max_hops (viridis), then unreached.
+    """
+    from matplotlib import colormaps
+
+    cmap = colormaps["viridis"]
+    hops = cmap(np.linspace(0.0, 0.9, max_hops + 1))[:, :3]
+    return np.vstack([hops, UNREACHED_RGB])
+
+
+def _pixels(pos: np.ndarray, size: int) -> np.ndarray:
+    ix = np.clip(((pos[0] + 1.0) * 0.5 * (size - 1)).round(), 0, size - 1).astype(np.int64)
+    iy = np.clip(((1.0 - pos[1]) * 0.5 * (size - 1)).round(), 0, size - 1).astype(np.int64)
+    return iy * size + ix
+
+
+def discovery_edges(graph, dist: np.ndarray, samples: int = EDGE_SAMPLES,
+                    seed: int = 0):
+    """
+    Up to `samples` random edges (u, v) with dist[v] == dist[u] + 1, the
+    links a crawl actually followed to discover v.
+    """
+    rng = np.random.default_rng(seed)
+    if graph.n_edges == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    src, dst = [], []
+    found = 0
+    for _ in range(8):
+        e = rng.integers(0, graph.n_edges, 8 * samples)
+        u = np.searchsorted(graph.indptr, e, side="right") - 1
+        v = np.asarray(graph.indices[e], dtype=np.int64)
+        keep = (dist[u] != UNREACHED) & (dist[v].astype(np.int16) == dist[u].astype(np.int16) + 1)
+        src.append(u[keep])
+        dst.append(v[keep])
+        found += int(keep.sum())
+        if found >= samples:
+            break
+    return np.concatenate(src)[:samples], np.concatenate(dst)[:samples]
+
+
+def _edge_density(pos: np.ndarray, src, dst, size: int) -> np.ndarray:
+    """
+    Per-pixel count of sampled edge segments (one point per pixel step).
+    """
+    scale = 0.5 * (size - 1)
+    x0, y0 = (pos[0, src] + 1.0) * scale, (1.0 - pos[1, src]) * scale
+    x1, y1 = (pos[0, dst] + 1.0) * scale, (1.0 - pos[1, dst]) * scale
+    steps = np.maximum(np.abs(x1 - x0), np.abs(y1 - y0)).astype(np.int64) + 1
+    t = np.arange(int(steps.sum())) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = t / np.repeat(steps, steps)
+    x = np.repeat(x0, steps) + t * np.repeat(x1 - x0, steps)
+    y = np.repeat(y0, steps) + t * np.repeat(y1 - y0, steps)
+    pix = np.clip(y.round(), 0, size - 1).astype(np.int64) * size \
+        + np.clip(x.round(), 0, size - 1).astype(np.int64)
+    return np.bincount(pix, minlength=size * size)
+
+
+def rasterize(pos: np.ndarray, dist: np.ndarray, max_hops: int,
+              size: int = IMAGE_SIZE, edges=None) -> np.ndarray:
+    """
+    (size, size, 3) float32 image: mean node colour per pixel, alpha by
+    log node density, over an optional edge-density layer.
+    """
+    colors = hop_colors(max_hops)
+    cls = np.minimum(dist, max_hops + 1).astype(np.int64)
+    cls[dist == UNREACHED] = max_hops + 1
+    pix = _pixels(pos, size)
+    count = np.bincount(pix, minlength=size * size).astype(np.float32)
+
+    img = np.empty((size * size, 3), dtype=np.float32)
+    img[:] = BACKGROUND_RGB
+    if edges is not None and len(edges[0]):
+        dens = _edge_density(pos, edges[0], edges[1], size).astype(np.float32)
+        a = 0.6 * np.minimum(1.0, dens / max(np.percentile(dens[dens > 0], 99), 1.0))
+        img += a[:, None] * (np.asarray(EDGE_RGB, np.float32) - img)
+
+    mean = np.stack([np.bincount(pix, weights=colors[cls, c], minlength=size * size)
+                     for c in range(3)], axis=1).astype(np.float32)
+    has = count > 0
+    mean[has] /= count[has, None]
+    alpha = np.zeros_like(count)
+    alpha[has] = MIN_ALPHA + (1.0 - MIN_ALPHA) * np.log1p(count[has] - 1) \
+        / max(np.log1p(count.max() - 1), 1.0)
+    img += alpha[:, None] * (mean - img)
+    return img.reshape(size, size, 3)
+
+
+def render_coverage(graph, dist: np.ndarray, max_hops: int, filename,
+                    title: str = "", pos=None, mode: str = "rings",
+                    size: int = IMAGE_SIZE, edge_samples: int = EDGE_SAMPLES):
+    """
+    Rasterise one traversal result and write it as a PNG with a hop
+    legend. Pass the cached `pos` to reuse one layout across figures.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Patch
+
+    if pos is None:
+        pos = graph_layout(graph)
+    view = ring_layout(pos, dist, max_hops) if mode == "rings" else pos
+    edges = discovery_edges(graph, dist, edge_samples) if edge_samples else None
+    img = rasterize(view, dist, max_hops, size, edges)
+
+    colors = hop_colors(max_hops)
+    hop_counts = np.bincount(np.minimum(dist, max_hops + 1), minlength=max_hops + 2)
+    hop_counts[max_hops + 1] = int((dist == UNREACHED).sum())
+    labels = ["seeds"] + [f"hop {h}" for h in range(1, max_hops + 1)] + ["not reached"]
+    handles = [Patch(facecolor=colors[i], edgecolor="#34495e",
+                     label=f"{labels[i]} ({hop_counts[i]:,})")
+               for i in range(max_hops + 2)]
+
+    fig = plt.figure(figsize=(size / 100, size / 100), dpi=100)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.imshow(img, interpolation="nearest")
+    ax.axis("off")
+    ax.legend(handles=handles, loc="upper right", fontsize=10)
+    if title:
+        ax.set_title(title, fontsize=14, fontweight="bold", y=0.97)
+    Path(filename).parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(filename, dpi=100)
+    plt.close(fig)
+    print(f"✓ Saved: {filename}")
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rasterised coverage figures")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", help="directory from save_csr / save_compressed")
+    src.add_argument("--synthetic", type=int, metavar="N_NODES")
+    seeds = parser.add_mutually_exclusive_group(required=True)
+    seeds.add_argument("--seeds", type=int, nargs="+", metavar="N_SEEDS",
+                       help="random seed sets of these sizes, one figure each")
+    seeds.add_argument("--seed-file", help="seed list (domain names or IDs)")
+    parser.add_argument("--hops", type=int, default=2)
+    parser.add_argument("--mode", choices=["rings", "layout"], default="rings")
+    parser.add_argument("--size", type=int, default=IMAGE_SIZE)
+    parser.add_argument("--edges", type=int, default=EDGE_SAMPLES)
+    parser.add_argument("--layout-cache", help="layout .npy (default: next to the graph)")
+    parser.add_argument("--out", default="../output")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.graph:
+        from webgraph_compressed import load_graph
+        graph = load_graph(args.graph)
+        if not hasattr(graph, "indptr"):
+            graph = graph.to_csr()
+        name = Path(args.graph).name
+        cache = args.layout_cache or Path(args.graph) / "layout.npy"
+    else:
+        from webgraph_csr import synthetic_webgraph
+        graph = synthetic_webgraph(args.synthetic, seed=args.seed)
+        name = f"synthetic_{args.synthetic}"
+        cache = args.layout_cache or Path(args.out) / f"layout_{name}.npy"
+
+    t0 = time.perf_counter()
+    pos = graph_layout(graph, cache)
+    print(f"Layout: {graph.n_nodes:,} nodes in {time.perf_counter() - t0:.1f}s ({cache})")
+
+    if args.seed_file:
+        from domain_names import load_seed_list
+        runs = [(Path(args.seed_file).stem, load_seed_list(args.seed_file, graph.names))]
+    else:
+        rng = np.random.default_rng(args.seed)
+        runs = [(f"{n}_seeds", rng.choice(graph.n_nodes, n, replace=False))
+                for n in args.seeds]
+
+    for label, seed_ids in runs:
+        t0 = time.perf_counter()
+        dist = multi_source_bfs(graph, seed_ids, max_hops=args.hops)
+        covered = float((dist != UNREACHED).mean())
+        title = (f"{name}: {len(seed_ids):,} seeds, {args.hops}-hop\n"
+                 f"{covered:.2%} coverage ({int((dist != UNREACHED).sum()):,} domains)")
+        render_coverage(graph, dist, args.hops,
+                        Path(args.out) / f"coverage_raster_{name}_{label}_{args.hops}hop.png",
+                        title, pos, args.mode, args.size, args.edges)
+        print(f"  {label}: {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
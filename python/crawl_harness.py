@@ -0,0 +1,602 @@
+"""
+crawl_harness.py
+
+End-to-end, offline check of the TTFI model: an asyncio crawler fetches
+pages from a local mock web whose link structure is a synthetic or
+ingested domain graph, and the run measures what tau_hop actually is.
+
+Mock web (MockWeb):
+    - one HTTP/1.1 keep-alive server per shard on 127.0.0.1; every
+      domain is virtual-hosted (Host header) on the shard its name
+      hashes to, which stands in for DNS
+    - each domain serves `pages_per_host` pages; the home page links to
+      the others and the domain's outlinks are spread over them as
+      absolute http://<domain>/ hrefs
+    - lognormal response latency, a 503 error rate and a hang rate
+      (responses that never arrive before the client timeout)
+
+Crawler (Crawler):
+    - connection pool per shard address (keep-alive reuse, capped
+      connections) and a per-host concurrency limit
+    - bounded frontier: a FIFO of at most `frontier_limit` ready URLs;
+      discoveries beyond it wait in an in-memory backlog of at most
+      `backlog_limit` URLs, and past that in a FIFO spill file on disk,
+      so memory stays bounded however wide the crawl gets (peaks reported)
+    - retries with exponential backoff on 503 / timeouts / resets
+
+Measured: pages/s, discovery curve, time to first inclusion (first
+successful fetch of a domain) per domain and per hop, and tau_hop as
+the least-squares slope of TTFI against crawl depth through the origin
+(the estimator calibration.py uses for crawl logs). --log writes a
+seed,hop,domain,timestamp CSV that `calibration.py log` accepts.
+
+Usage:
+    python crawl_harness.py crawl --synthetic 20000 --seeds 20 --latency-ms 50
+    python crawl_harness.py crawl --graph ../output/couk_graph --seeds 100 --log crawl.csv
+    python crawl_harness.py serve --synthetic 100000 --shards 4
+"""
+
+import argparse
+import asyncio
+import collections
+import csv
+import json
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from crawl_ingest import HREF_RE
+from quantile_sketch import KLLSketch
+
+DEFAULT_SHARDS = 4
+DEFAULT_LATENCY_MS = 50.0
+DEFAULT_LATENCY_SIGMA = 0.5
+DEFAULT_CONCURRENCY = 64
+DEFAULT_PER_HOST = 2
+DEFAULT_FRONTIER = 10_000
+DEFAULT_BACKLOG = 100_000    # in-memory backlog URLs before spilling to disk
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_RETRIES = 2
+BACKOFF = 0.1                # seconds before the first retry, doubled after
+
+
+# --------------------------
+# Mock web
+# --------------------------
+
+class MockWeb:
+    """
+    Serves a graph (webgraph_csr.CSRGraph or compressed graph with a name
+    table) as virtual-hosted HTML pages over `shards` local servers.
+    """
+
+    def __init__(self, graph, shards: int = DEFAULT_SHARDS,
+                 latency_ms: float = DEFAULT_LATENCY_MS,
+                 latency_sigma: float = DEFAULT_LATENCY_SIGMA,
+                 error_rate: float = 0.0, hang_rate: float = 0.0,
+                 pages_per_host: int = 1, seed: int = 42):
+        if graph.names is None:
+            raise ValueError("MockWeb needs a graph with a name table")
+        self.graph = graph
+        self.shards = shards
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.pages_per_host = max(1, pages_per_host)
+        self.rng = np.random.default_rng(seed)
+        self.ports: list = []
+        self._servers = []
+        self._handlers: set = set()
+        self.requests = 0
+        self.bytes_sent = 0
+
+    # ---- addressing ----
+
+    def shard_of(self, host: str) -> int:
+        return zlib.crc32(host.encode()) % self.shards
+
+    def resolve(self, host: str) -> tuple[str, int]:
+        """
+        (address, port) serving `host` -- the crawler's DNS.
+        """
+        return "127.0.0.1", self.ports[self.shard_of(host)]
+
+    def url(self, node_id: int, page: int = 0) -> str:
+        path = "/" if page == 0 else f"/p/{page}"
+        return f"http://{self.graph.names.name(node_id)}{path}"
+
+    # ---- content ----
+
+    def page(self, host: str, path: str) -> bytes | None:
+        try:
+            node = self.graph.names.id_of(host)
+        except KeyError:
+            return None
+        page = 0
+        if path.startswith("/p/"):
+            try:
+                page = int(path[3:])
+            except ValueError:
+                return None
+        if not 0 <= page < self.pages_per_host or (page == 0 and path != "/"):
+            return None
+        succ = self.graph.successors(np.array([node]))
+        links = [f'<a href="http://{self.graph.names.name(v)}/">x</a>'
+                 for v in succ[page::self.pages_per_host]]
+        if page == 0:
+            links += [f'<a href="http://{host}/p/{p}">p{p}</a>'
+                      for p in range(1, self.pages_per_host)]
+        return (f"<html><head><title>{host}{path}</title></head><body>\n"
+                + "\n".join(links) + "\n</body></html>\n").encode()
+
+    # ---- server ----
+
+    async def _handle(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                parts = request.decode("latin-1").split()
+                path = parts[1] if len(parts) > 1 else "/"
+                host = headers.get("host", "").split(":")[0]
+                self.requests += 1
+
+                await asyncio.sleep(self.rng.lognormal(np.log(self.latency_ms / 1e3)
+                                                       - self.latency_sigma ** 2 / 2,
+                                                       self.latency_sigma))
+                roll = self.rng.random()
+                if roll < self.hang_rate:
+                    await asyncio.sleep(3600)
+                if roll < self.hang_rate + self.error_rate:
+                    status, body = "503 Service Unavailable", b""
+                else:
+                    body = self.page(host, path)
+                    status = "200 OK" if body is not None else "404 Not Found"
+                    body = body or b""
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/html\r\n"
+                             f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n"
+                             .encode() + body)
+                self.bytes_sent += len(body)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def start(self):
+        for _ in range(self.shards):
+            server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+            self._servers.append(server)
+            self.ports.append(server.sockets[0].getsockname()[1])
+        return self
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+        for task in list(self._handlers):      # idle keep-alives, hung responses
+            task.cancel()
+        for server in self._servers:
+            await server.wait_closed()
+
+
+# --------------------------
+# HTTP client
+# --------------------------
+
+class FetchError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Keep-alive connections per (address, port), at most `per_addr` open
+    to each.
+    """
+
+    def __init__(self, per_addr: int, timeout: float):
+        self.per_addr = per_addr
+        self.timeout = timeout
+        self._idle = collections.defaultdict(list)
+        self._slots = {}
+        self.opened = 0
+        self.reused = 0
+
+    async def fetch(self, addr: tuple, host: str, path: str) -> tuple[int, bytes]:
+        slots = self._slots.setdefault(addr, asyncio.Semaphore(self.per_addr))
+        async with slots:
+            writer = None
+            try:
+                if self._idle[addr]:
+                    reader, writer = self._idle[addr].pop()
+                    self.reused += 1
+                else:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(*addr), self.timeout)
+                    self.opened += 1
+                status, body = await asyncio.wait_for(
+                    self._request(reader, writer, host, path), self.timeout)
+            except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError,
+                    IndexError, ValueError) as exc:
+                if writer is not None:
+                    writer.close()
+                raise FetchError(type(exc).__name__) from exc
+            self._idle[addr].append((reader, writer))
+            return status, body
+
+    @staticmethod
+    async def _request(reader, writer, host: str, path: str):
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+                     f"User-Agent: seedsites-harness\r\n\r\n".encode())
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            if key.strip().lower() == "content-length":
+                length = int(value)
+        return status, await reader.readexactly(length)
+
+    def close(self):
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+
+
+# --------------------------
+# Crawler
+# --------------------------
+
+class Crawler:
+    """
+    Concurrent FIFO crawler over a resolver (host -> address). Records
+    per-domain discovery and first-fetch times relative to the start.
+    """
+
+    def __init__(self, resolve, concurrency: int = DEFAULT_CONCURRENCY,
+                 per_host: int = DEFAULT_PER_HOST,
+                 frontier_limit: int = DEFAULT_FRONTIER,
+                 backlog_limit: int = DEFAULT_BACKLOG,
+                 timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 max_pages: int | None = None, max_seconds: float | None = None):
+        self.resolve = resolve
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.retries = retries
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.pool = ConnectionPool(max(2, concurrency // 4), timeout)
+        self.frontier: asyncio.Queue = asyncio.Queue(maxsize=frontier_limit)
+        self.backlog: collections.deque = collections.deque()
+        self.backlog_limit = max(1, backlog_limit)
+        # overflow past backlog_limit: "hop\tseed\turl" lines, read back FIFO
+        self._spill = None
+        self._spill_read = 0
+        self.spilled = 0
+        self.spilled_total = 0
+        self.peak_backlog = self.peak_backlog_memory = 0
+        self._host_slots = {}
+        self.seen_urls: set = set()
+        # host -> [hop, seed, discovered_at, first_fetch_at]
+        self.domains: dict = {}
+        self.pages = self.errors = self.failed = self.bytes = 0
+        self.fetch_seconds = 0.0
+        self.log_rows: list = []
+        self._t0 = 0.0
+
+    def _push(self, item):
+        if not (self.backlog or self.spilled or self.frontier.full()):
+            self.frontier.put_nowait(item)
+            return
+        # once spilling, everything goes to disk until the spill drains (FIFO)
+        if self.spilled or len(self.backlog) >= self.backlog_limit:
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile()
+            url, hop, seed = item
+            self._spill.seek(0, 2)
+            self._spill.write(f"{hop}\t{seed}\t{url}\n".encode("utf-8"))
+            self.spilled += 1
+            self.spilled_total += 1
+        else:
+            self.backlog.append(item)
+            self.peak_backlog_memory = max(self.peak_backlog_memory, len(self.backlog))
+        self.peak_backlog = max(self.peak_backlog, len(self.backlog) + self.spilled)
+
+    def _unspill(self):
+        """Move up to backlog_limit spilled URLs back into the memory backlog."""
+        self._spill.seek(self._spill_read)
+        for _ in range(min(self.spilled, self.backlog_limit)):
+            hop, seed, url = self._spill.readline().decode("utf-8").rstrip("\n").split("\t", 2)
+            self.backlog.append((url, int(hop), seed))
+            self.spilled -= 1
+        self._spill_read = self._spill.tell()
+        if not self.spilled:
+            self._spill.truncate(0)
+            self._spill_read = 0
+
+    def _refill(self):
+        while not self.frontier.full():
+            if not self.backlog:
+                if not self.spilled:
+                    return
+                self._unspill()
+            self.frontier.put_nowait(self.backlog.popleft())
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def _discover(self, url: str, hop: int, seed: str):
+        if url in self.seen_urls:
+            return
+        self.seen_urls.add(url)
+        host = url.split("/")[2]
+        if host not in self.domains:
+            self.domains[host] = [hop, seed, self._now(), None]
+        self._push((url, hop, seed))
+
+    async def _fetch(self, url: str):
+        host = url.split("/")[2]
+        path = "/" + url.split("/", 3)[3] if url.count("/") > 2 else "/"
+        slots = self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+        delay = BACKOFF
+        for attempt in range(self.retries + 1):
+            async with slots:
+                t0 = time.perf_counter()
+                try:
+                    status, body = await self.pool.fetch(self.resolve(host), host, path)
+                except FetchError:
+                    status, body = None, b""
+                self.fetch_seconds += time.perf_counter() - t0
+            if status == 200:
+                return body
+            if status is not None and status < 500:
+                return None                  # 4xx: not worth retrying
+            self.errors += 1
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+                delay *= 2
+        self.failed += 1
+        return None
+
+    async def _worker(self):
+        while True:
+            url, hop, seed = await self.frontier.get()
+            self._refill()
+            try:
+                if self.max_pages is not None and self.pages >= self.max_pages:
+                    continue
+                if self.max_seconds is not None and self._now() > self.max_seconds:
+                    continue
+                body = await self._fetch(url)
+                if body is None:
+                    continue
+                self.pages += 1
+                self.bytes += len(body)
+                host = url.split("/")[2]
+                rec = self.domains[host]
+                if rec[3] is None:
+                    rec[3] = self._now()
+                    self.log_rows.append((seed, rec[0], host, time.time()))
+                for link in HREF_RE.findall(body):
+                    link = link.decode("utf-8", "replace")
+                    same_host = link.split("/")[2] == host
+                    self._discover(link, hop if same_host else hop + 1, seed)
+            finally:
+                self.frontier.task_done()
+
+    async def crawl(self, seed_urls: list) -> dict:
+        self._t0 = time.perf_counter()
+        for url in seed_urls:
+            self._discover(url, 0, url.split("/")[2])
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        await self.frontier.join()
+        seconds = self._now()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self.pool.close()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        return self.report(seconds)
+
+    # ---- results ----
+
+    def report(self, seconds: float) -> dict:
+        recs = [r for r in self.domains.values() if r[3] is not None]
+        hops = np.array([r[0] for r in recs], dtype=np.int64)
+        ttfi = np.array([r[3] for r in recs])
+        sketch = KLLSketch()
+        sketch.update(ttfi)
+        mask = hops > 0
+        tau_hop = float((ttfi[mask] * hops[mask]).sum() / (hops[mask] ** 2).sum()) \
+            if mask.any() else float("nan")
+        per_hop = {int(h): {"domains": int((hops == h).sum()),
+                            "mean_ttfi_s": float(ttfi[hops == h].mean())}
+                   for h in np.unique(hops)}
+        curve_t = np.sort(ttfi)
+        return {
+            "seconds": seconds,
+            "pages": self.pages,
+            "pages_per_s": self.pages / seconds if seconds else 0.0,
+            "mb_per_s": self.bytes / 2**20 / seconds if seconds else 0.0,
+            "domains_discovered": len(self.domains),
+            "domains_fetched": len(recs),
+            "errors": self.errors,
+            "failed_pages": self.failed,
+            "connections_opened": self.pool.opened,
+            "connections_reused": self.pool.reused,
+            "peak_backlog": self.peak_backlog,
+            "peak_backlog_memory": self.peak_backlog_memory,
+            "backlog_spilled": self.spilled_total,
+            "mean_fetch_s": self.fetch_seconds / max(self.pages + self.errors, 1),
+            "tau_hop": tau_hop,
+            "ttfi_quantiles": {f"p{q * 100:g}": float(sketch.quantile(q))
+                               for q in (0.5, 0.9, 0.95, 0.99)} if recs else {},
+            "ttfi_by_hop": per_hop,
+            # fetched domains over time (20 points)
+            "discovery_curve": [[float(curve_t[min(int(f * len(curve_t)), len(curve_t) - 1)]),
+                                 int(f * len(curve_t))]
+                                for f in np.linspace(0.05, 1.0, 20)] if recs else [],
+            "ttfi_sketch": sketch.to_dict(),
+        }
+
+    def write_log(self, path):
+        """
+        seed,hop,domain,timestamp CSV (one row per first fetch of a domain)
+        for calibration.py log.
+        """
+        with open(path, "w", newline="") as fh:
+            out = csv.writer(fh)
+            out.writerow(["seed", "hop", "domain", "timestamp"])
+            for seed, hop, host, ts in self.log_rows:
+                out.writerow([seed, hop, host,
+                              datetime.fromtimestamp(ts, timezone.utc).isoformat()])
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def _load_graph(args):
+    from domain_names import synthetic_names
+    if args.synthetic:
+        from webgraph_csr import synthetic_webgraph
+        graph = synthetic_webgraph(args.synthetic, seed=args.seed)
+    else:
+        from webgraph_compressed import load_graph
+        graph = load_graph(args.graph)
+    if graph.names is None:
+        graph.names = synthetic_names(graph.n_nodes, tld="mock")
+    return graph
+
+
+async def _crawl(args) -> tuple[dict, "Crawler", MockWeb]:
+    graph = _load_graph(args)
+    web = await MockWeb(graph, args.shards, args.latency_ms, args.latency_sigma,
+                        args.error_rate, args.hang_rate, args.pages_per_host,
+                        args.seed).start()
+    rng = np.random.default_rng(args.seed)
+    seeds = rng.choice(graph.n_nodes, size=min(args.seeds, graph.n_nodes), replace=False)
+    crawler = Crawler(web.resolve, args.concurrency, args.per_host, args.frontier,
+                      args.backlog, args.timeout, args.retries, args.max_pages, args.max_seconds)
+    try:
+        report = await crawler.crawl([web.url(int(s)) for s in seeds])
+    finally:
+        await web.stop()
+
+    if args.compare_bfs:
+        from webgraph_bfs import UNREACHED, multi_source_bfs
+        dist = multi_source_bfs(graph, seeds)
+        hosts = list(crawler.domains)
+        ids = graph.names.ids_of(hosts)
+        crawl_hop = np.array([crawler.domains[h][0] for h in hosts])
+        report["bfs_reachable"] = int((dist != UNREACHED).sum())
+        report["hop_matches_bfs"] = float((dist[ids] == crawl_hop).mean())
+    report.update({"n_nodes": graph.n_nodes, "n_seeds": int(seeds.size),
+                   "server_requests": web.requests})
+    return report, crawler, web
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asyncio crawler against a mock web")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_crawl = sub.add_parser("crawl", help="serve a graph and crawl it from seeds")
+    p_serve = sub.add_parser("serve", help="only serve a graph (for external crawlers)")
+    for p in (p_crawl, p_serve):
+        src = p.add_mutually_exclusive_group(required=True)
+        src.add_argument("--graph", help="directory from save_csr / save_compressed")
+        src.add_argument("--synthetic", type=int, metavar="N_NODES")
+        p.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+        p.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+        p.add_argument("--latency-sigma", type=float, default=DEFAULT_LATENCY_SIGMA)
+        p.add_argument("--error-rate", type=float, default=0.0)
+        p.add_argument("--hang-rate", type=float, default=0.0)
+        p.add_argument("--pages-per-host", type=int, default=1)
+        p.add_argument("--seed", type=int, default=42)
+    p_crawl.add_argument("--seeds", type=int, default=20)
+    p_crawl.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    p_crawl.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    p_crawl.add_argument("--frontier", type=int, default=DEFAULT_FRONTIER)
+    p_crawl.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG,
+                         help="in-memory backlog URLs; the rest spill to disk")
+    p_crawl.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    p_crawl.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    p_crawl.add_argument("--max-pages", type=int, default=None)
+    p_crawl.add_argument("--max-seconds", type=float, default=None)
+    p_crawl.add_argument("--compare-bfs", action="store_true",
+                         help="compare crawl depth with multi_source_bfs distances")
+    p_crawl.add_argument("--log", help="write a crawl log CSV for calibration.py log")
+    p_crawl.add_argument("--out", default="../output/crawl_harness.json")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "serve":
+        async def serve():
+            graph = _load_graph(args)
+            web = await MockWeb(graph, args.shards, args.latency_ms, args.latency_sigma,
+                                args.error_rate, args.hang_rate, args.pages_per_host,
+                                args.seed).start()
+            print(f"Serving {graph.n_nodes:,} domains on 127.0.0.1 ports {web.ports} "
+                  f"(shard = crc32(host) % {web.shards}); e.g. {web.url(0)}")
+            await asyncio.Event().wait()
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report, crawler, _ = asyncio.run(_crawl(args))
+    print("=" * 80)
+    print(f"CRAWL HARNESS: {report['n_nodes']:,} domains, {report['n_seeds']} seeds, "
+          f"{args.concurrency} workers, latency {args.latency_ms:g} ms")
+    print("=" * 80)
+    print(f"  Pages fetched:      {report['pages']:,} in {report['seconds']:.1f}s "
+          f"({report['pages_per_s']:,.0f} pages/s, {report['mb_per_s']:.1f} MB/s)")
+    print(f"  Domains:            {report['domains_fetched']:,} fetched / "
+          f"{report['domains_discovered']:,} discovered")
+    print(f"  Errors / failed:    {report['errors']:,} / {report['failed_pages']:,}")
+    print(f"  Connections:        {report['connections_opened']:,} opened, "
+          f"{report['connections_reused']:,} reuses")
+    print(f"  Backlog:            peak {report['peak_backlog']:,} URLs "
+          f"({report['peak_backlog_memory']:,} in memory, "
+          f"{report['backlog_spilled']:,} spilled to disk)")
+    if report["ttfi_quantiles"]:
+        q = report["ttfi_quantiles"]
+        print(f"  TTFI:               p50 {q['p50']:.2f}s  p90 {q['p90']:.2f}s  "
+              f"p99 {q['p99']:.2f}s")
+    for h, v in report["ttfi_by_hop"].items():
+        print(f"    hop {h}: {v['domains']:>9,} domains, mean TTFI {v['mean_ttfi_s']:.2f}s")
+    print(f"  Measured tau_hop:   {report['tau_hop']:.3f}s per hop "
+          f"(mean fetch {report['mean_fetch_s'] * 1e3:.0f} ms)")
+    if "hop_matches_bfs" in report:
+        print(f"  Crawl depth = BFS distance for {report['hop_matches_bfs']:.1%} of domains "
+              f"({report['bfs_reachable']:,} reachable)")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=1))
+    print(f"✓ Saved: {out}")
+    if args.log:
+        crawler.write_log(args.log)
+        print(f"✓ Saved: {args.log}")
+
+
+if __name__ == "__main__":
+    main()
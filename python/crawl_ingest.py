@@ -0,0 +1,630 @@
+"""
+crawl_ingest.py
+
+Streaming ingestion of crawler output into a domain-level CSR graph
+(webgraph_csr.py), so the seed-coverage simulations can run on the
+observed link structure.
+
+Supported inputs (detected by file name, optionally gzipped):
+
+    *.warc[.gz]   WARC response records -- absolute hrefs in HTML payloads
+    *.wat[.gz]    WAT metadata records  -- Envelope/.../HTML-Metadata/Links
+    anything else fetch logs: Heritrix crawl.log lines (url in field 4,
+                  via in field 6) or two-column "source<TAB>target" lines
+
+Pipeline:
+    1. a process pool parses files in parallel; each record yields its
+       source host and target hosts (one regex pass per record), and a
+       batch of records is factorised at once, so each distinct host is
+       collapsed to its registered domain (public-suffix table) and
+       hashed to a 64-bit FNV-1a key once per batch
+    2. workers dedupe (src, dst) key pairs in fixed-size buffers and
+       spill them to hash-partitioned bucket files, together with the
+       sorted names of the domains seen since the last spill, so memory
+       per worker is bounded by the buffer, not the input size
+    3. the sorted name spills are merged straight into the
+       domain_names.NameTable buffer / offsets on disk, keys are hashed
+       vectorised over that buffer to give dense IDs, buckets are
+       deduped one at a time, and the CSR graph is written with save_csr
+
+Usage:
+    python crawl_ingest.py ingest --out ../output/couk_graph crawl/*.wat.gz
+    python crawl_ingest.py fixtures --out /tmp/fixtures   # small offline archives
+"""
+
+import argparse
+import gzip
+import heapq
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from domain_names import NameTable
+from webgraph_csr import from_edges, save_csr
+
+FLUSH_EDGES = 1_000_000     # edge pairs buffered per worker before a spill
+N_BUCKETS = 16              # hash partitions for the merge step
+HOST_CACHE = 1 << 20        # registered-domain lookups cached per worker
+BATCH_RECORDS = 8_192       # records whose hosts are resolved together
+READ_BUFFER = 1 << 20       # bytes buffered over each (gzip) input stream
+GZIP_WINDOW = 16 * 1024     # compressed bytes fed to zlib per call
+NAME_CHUNK = 1_000_000      # name lengths written per block while merging
+FNV_OFFSET = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+
+# Fallback public-suffix rules; pass --psl public_suffix_list.dat for the
+# full Mozilla list.
+DEFAULT_SUFFIXES = """
+com net org info biz edu gov io co eu
+uk co.uk org.uk me.uk ltd.uk plc.uk net.uk sch.uk ac.uk gov.uk nhs.uk
+se org.se pp.se tm.se
+de fr nl dk no fi is ie es it pt be at ch pl cz
+"""
+
+HREF_RE = re.compile(rb"""href\s*=\s*["']?((?:https?:)?//[^"'\s<>]+)""", re.IGNORECASE)
+# host of an absolute href, without userinfo or port; matched against the
+# lower-cased payload (hosts are case-insensitive, and a case-sensitive
+# pattern scans faster than re.IGNORECASE)
+HREF_HOST_RE = re.compile(rb"""href\s*=\s*["']?(?:https?:)?//(?:[^/?#@"'\s<>]*@)?"""
+                          rb"""([^/?#:"'\s<>]+)""")
+# blank line closing a WARC header block
+HEADER_END_RE = re.compile(rb"\r?\n\r?\n")
+# host of each absolute URL in newline-separated text
+URL_HOST_RE = re.compile(rb"^(?:https?:)?//(?:[^/?#@\s]*@)?([^/?#:\s]+)",
+                         re.IGNORECASE | re.MULTILINE)
+
+
+# --------------------------
+# Public-suffix handling
+# --------------------------
+
+def parse_public_suffixes(text: str) -> tuple[frozenset, frozenset, frozenset]:
+    """
+    Parse Public Suffix List syntax into (rules, wildcards, exceptions).
+    """
+    rules, wildcards, exceptions = set(), set(), set()
+    for line in text.splitlines():
+        line = line.strip().lower()
+        if not line or line.startswith("//"):
+            continue
+        rule = line.split()[0]
+        if rule.startswith("!"):
+            exceptions.add(rule[1:])
+        elif rule.startswith("*."):
+            wildcards.add(rule[2:])
+        else:
+            rules.add(rule)
+    return frozenset(rules), frozenset(wildcards), frozenset(exceptions)
+
+
+def load_public_suffixes(path=None):
+    if path is None:
+        return parse_public_suffixes(DEFAULT_SUFFIXES.replace(" ", "\n"))
+    return parse_public_suffixes(Path(path).read_text(encoding="utf-8"))
+
+
+def registered_domain(host: str, suffixes) -> str | None:
+    """
+    Registered domain (public suffix + one label), e.g.
+    www.shop.example.co.uk -> example.co.uk. None for bare suffixes.
+    """
+    rules, wildcards, exceptions = suffixes
+    labels = host.strip(".").lower().split(".")
+    for i in range(len(labels)):
+        candidate = ".".join(labels[i:])
+        if candidate in exceptions:
+            # exception: the rule's suffix is one label shorter
+            return candidate
+        parent = ".".join(labels[i + 1:])
+        if candidate in rules or (parent and parent in wildcards):
+            return ".".join(labels[i - 1:]) if i > 0 else None
+    # implicit "*" rule: the last label is the suffix
+    return ".".join(labels[-2:]) if len(labels) >= 2 else None
+
+
+def url_hosts(urls: bytes) -> list:
+    """
+    Host (no port, no userinfo) of every http(s) or protocol-relative
+    URL in newline-separated bytes; other lines are skipped.
+    """
+    return URL_HOST_RE.findall(urls)
+
+
+def _fnv1a(buffer: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    64-bit FNV-1a of every string buffer[offsets[i]:offsets[i + 1]],
+    one byte column at a time over the strings still that long.
+    """
+    starts = np.asarray(offsets[:-1], dtype=np.int64)
+    lengths = np.diff(np.asarray(offsets, dtype=np.int64))
+    keys = np.full(starts.size, FNV_OFFSET, dtype=np.uint64)
+    rows = np.argsort(-lengths, kind="stable")       # longest first
+    neg_len = -lengths[rows]
+    prime = np.uint64(FNV_PRIME)
+    for j in range(int(-neg_len[0]) if rows.size else 0):
+        live = rows[:np.searchsorted(neg_len, -j, side="left")]
+        byte = np.asarray(buffer[starts[live] + j], dtype=np.uint64)
+        keys[live] = (keys[live] ^ byte) * prime
+    return keys
+
+
+def domain_keys(domains) -> np.ndarray:
+    """64-bit FNV-1a key of each domain name (UTF-8)."""
+    encoded = [d.encode("utf-8") for d in domains]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return _fnv1a(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+
+def name_keys(names: NameTable) -> np.ndarray:
+    """domain_keys of every name in a NameTable, straight from its buffer."""
+    return _fnv1a(names.buffer, names.offsets)
+
+
+# --------------------------
+# Record parsers
+# --------------------------
+
+class _GzipMembers(io.RawIOBase):
+    """
+    Decompressed view of a multi-member gzip file (one member per WARC
+    record), driven by zlib directly: gzip.GzipFile parses every member
+    header in Python, which dominates on small records. Input is fed in
+    GZIP_WINDOW slices so the unused tail zlib copies at each member end
+    stays small.
+    """
+
+    def __init__(self, path):
+        self._raw = open(path, "rb")
+        self._z = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        self._data, self._off = memoryview(b""), 0
+        self._out = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = 0
+        while n < len(b):
+            if not self._out:
+                if self._off >= len(self._data):
+                    self._data, self._off = memoryview(self._raw.read(READ_BUFFER)), 0
+                    if not self._data:
+                        break
+                piece = self._data[self._off:self._off + GZIP_WINDOW]
+                self._out = memoryview(self._z.decompress(piece))
+                self._off += len(piece)
+                if self._z.eof:
+                    self._off -= len(self._z.unused_data)
+                    self._z = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                continue
+            k = min(len(b) - n, len(self._out))
+            b[n:n + k] = self._out[:k]
+            self._out = self._out[k:]
+            n += k
+        return n
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+
+def _open(path):
+    path = str(path)
+    if path.endswith(".gz"):
+        return io.BufferedReader(_GzipMembers(path), buffer_size=READ_BUFFER)
+    return open(path, "rb", buffering=READ_BUFFER)
+
+
+def iter_warc_records(fh):
+    """
+    Yield (headers, block) for every record of a (multi-member) WARC
+    stream. Records are cut out of large reads rather than read line by
+    line.
+    """
+    buf, pos = b"", 0
+    while True:
+        while pos < len(buf) and buf[pos] in b"\r\n":     # record trailer
+            pos += 1
+        match = HEADER_END_RE.search(buf, pos)
+        if match is None:
+            more = fh.read(READ_BUFFER)
+            if not more:
+                if buf[pos:].strip():
+                    raise ValueError(f"Truncated WARC record header: {buf[pos:pos + 40]!r}")
+                return
+            buf, pos = buf[pos:] + more, 0
+            continue
+        lines = buf[pos:match.start()].splitlines()
+        if not lines[0].startswith(b"WARC/"):
+            raise ValueError(f"Not a WARC record header: {buf[pos:pos + 40]!r}")
+        headers = {}
+        for line in lines[1:]:
+            key, _, value = line.decode("utf-8", "replace").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        start = match.end()
+        end = start + int(headers.get("content-length", 0))
+        while len(buf) < end:
+            more = fh.read(max(READ_BUFFER, end - len(buf)))
+            if not more:
+                break
+            buf += more
+        yield headers, buf[start:end]
+        pos = end
+
+
+def _source_host(url: str):
+    hosts = url_hosts(url.encode("utf-8", "replace"))
+    return hosts[0] if hosts else None
+
+
+def warc_links(path):
+    """
+    (source_host, [target_hosts]) per HTML response record, as bytes.
+    """
+    with _open(path) as fh:
+        for headers, block in iter_warc_records(fh):
+            if headers.get("warc-type") != "response":
+                continue
+            http_head, _, payload = block.partition(b"\r\n\r\n")
+            if b"html" not in http_head.lower():
+                continue
+            yield (_source_host(headers.get("warc-target-uri", "")),
+                   HREF_HOST_RE.findall(payload.lower()))
+
+
+def wat_links(path):
+    """
+    (source_host, [target_hosts]) per WAT JSON metadata record, as bytes.
+    """
+    with _open(path) as fh:
+        for headers, block in iter_warc_records(fh):
+            if "json" not in headers.get("content-type", ""):
+                continue
+            try:
+                env = json.loads(block)["Envelope"]
+                links = (env["Payload-Metadata"]["HTTP-Response-Metadata"]
+                         ["HTML-Metadata"]["Links"])
+            except (KeyError, ValueError):
+                continue
+            urls = "\n".join(link.get("url", "") for link in links)
+            yield (_source_host(headers.get("warc-target-uri", "")),
+                   url_hosts(urls.encode("utf-8", "replace")))
+
+
+def log_links(path):
+    """
+    (via_host, [host]) per line of a Heritrix crawl.log, or source/target TSV.
+    """
+    with _open(path) as fh:
+        for raw in fh:
+            fields = raw.split()
+            if len(fields) == 2:
+                src, dst = fields
+            elif len(fields) >= 6 and fields[5] != b"-":
+                src, dst = fields[5], fields[3]
+            else:
+                continue
+            hosts = url_hosts(src + b"\n" + dst)
+            if len(hosts) == 2:
+                yield hosts[0], hosts[1:]
+            elif hosts and URL_HOST_RE.match(src):
+                yield hosts[0], []
+
+
+def detect_format(path) -> str:
+    name = Path(path).name.lower().removesuffix(".gz")
+    if name.endswith(".wat"):
+        return "wat"
+    if name.endswith(".warc"):
+        return "warc"
+    return "log"
+
+
+PARSERS = {"warc": warc_links, "wat": wat_links, "log": log_links}
+
+
+# --------------------------
+# Worker: one input file
+# --------------------------
+
+_SUFFIXES = None
+
+
+def _init_worker(psl_path):
+    global _SUFFIXES
+    _SUFFIXES = load_public_suffixes(psl_path)
+    _host_domain.cache_clear()
+
+
+@lru_cache(maxsize=HOST_CACHE)
+def _host_domain(host: bytes):
+    return registered_domain(host.decode("utf-8", "replace"), _SUFFIXES)
+
+
+def _resolve(src_hosts: list, dst_hosts: list, counts: list, names: set) -> np.ndarray:
+    """
+    (src_key, dst_key) pairs of one record batch. Hosts are factorised
+    once, so each distinct host is resolved once per batch and each
+    distinct domain hashed once (vectorised); the domain names met are
+    added to `names`.
+    """
+    hosts = np.empty(len(src_hosts) + len(dst_hosts), dtype=object)
+    hosts[:len(src_hosts)] = src_hosts
+    hosts[len(src_hosts):] = dst_hosts
+    codes, uniques = pd.factorize(hosts)
+    domains = np.empty(len(uniques) + 1, dtype=object)     # last slot: None source
+    domains[:-1] = [_host_domain(h) for h in uniques]
+    dom_codes, dom_uniques = pd.factorize(domains)
+    names.update(dom_uniques)
+    keys = np.append(domain_keys(dom_uniques), np.uint64(0))
+    ok = np.append(np.ones(len(dom_uniques), dtype=bool), False)
+    dom_codes[dom_codes < 0] = len(dom_uniques)
+    codes = dom_codes[np.where(codes < 0, len(uniques), codes)]
+
+    src = np.repeat(codes[:len(src_hosts)], np.asarray(counts, dtype=np.int64))
+    dst = codes[len(src_hosts):]
+    keep = ok[src] & ok[dst] & (src != dst)
+    return np.stack([keys[src[keep]], keys[dst[keep]]], axis=1)
+
+
+def _unique_pairs(pairs: np.ndarray) -> np.ndarray:
+    """Distinct rows of a (k, 2) uint64 array, sorted (np.unique(axis=0) sorts voids)."""
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    keep = np.ones(len(pairs), dtype=bool)
+    keep[1:] = (pairs[1:] != pairs[:-1]).any(axis=1)
+    return pairs[keep]
+
+
+def _spill(buffer: list, names: set, spill_dir: Path, tag: str, n_spill: int) -> int:
+    with open(spill_dir / f"names_{tag}_{n_spill:05d}.txt", "wb") as fh:
+        fh.writelines(name.encode("utf-8") + b"\n"
+                      for name in sorted(names, key=lambda n: n.encode("utf-8")))
+    if not buffer:
+        return 0
+    pairs = _unique_pairs(np.concatenate(buffer))
+    bucket = (pairs[:, 0] % N_BUCKETS).astype(np.int64)
+    for b in np.unique(bucket):
+        np.save(spill_dir / f"b{b:03d}_{tag}_{n_spill:05d}.npy", pairs[bucket == b])
+    return int(pairs.shape[0])
+
+
+def ingest_file(path, spill_dir, tag: str, flush_edges: int = FLUSH_EDGES) -> dict:
+    """
+    Parse one input file into deduplicated, bucketed domain-key pairs,
+    plus sorted name files of the domains seen (one per spill).
+    """
+    spill_dir = Path(spill_dir)
+    t0 = time.perf_counter()
+    names: set = set()
+    buffer: list = []
+    src_hosts, dst_hosts, counts = [], [], []
+    n_records = n_links = n_spill = n_pairs = n_buffered = 0
+
+    def flush_batch():
+        nonlocal n_buffered
+        pairs = _resolve(src_hosts, dst_hosts, counts, names)
+        buffer.append(pairs)
+        n_buffered += len(pairs)
+        src_hosts.clear(), dst_hosts.clear(), counts.clear()
+
+    for src_host, hosts in PARSERS[detect_format(path)](path):
+        n_records += 1
+        n_links += len(hosts)
+        src_hosts.append(src_host)
+        dst_hosts.extend(hosts)
+        counts.append(len(hosts))
+        if len(src_hosts) >= BATCH_RECORDS:
+            flush_batch()
+            if n_buffered >= flush_edges:
+                n_pairs += _spill(buffer, names, spill_dir, tag, n_spill)
+                n_spill += 1
+                buffer, n_buffered = [], 0
+                names.clear()
+    if src_hosts:
+        flush_batch()
+    n_pairs += _spill(buffer, names, spill_dir, tag, n_spill)
+
+    return {"file": str(path), "records": n_records, "links": n_links,
+            "pairs": n_pairs, "seconds": time.perf_counter() - t0}
+
+
+# --------------------------
+# Merge into CSR
+# --------------------------
+
+def _merge_names(spill_dir: Path) -> NameTable:
+    """
+    k-way merge of the sorted name spills, deduplicated on the fly and
+    written straight to a NameTable buffer / offsets on disk (then
+    memory-mapped), so no per-name Python structure is ever built.
+    """
+    buf_path, len_path = spill_dir / "names.buf", spill_dir / "names.len"
+    files = [open(p, "rb") for p in sorted(spill_dir.glob("names_*.txt"))]
+    lengths: list[int] = []
+    try:
+        with open(buf_path, "wb") as fb, open(len_path, "wb") as fl:
+            last = None
+            for line in heapq.merge(*files):
+                if line == last:
+                    continue
+                last = line
+                fb.write(line[:-1])
+                lengths.append(len(line) - 1)
+                if len(lengths) >= NAME_CHUNK:
+                    np.asarray(lengths, dtype=np.int64).tofile(fl)
+                    lengths.clear()
+            np.asarray(lengths, dtype=np.int64).tofile(fl)
+    finally:
+        for f in files:
+            f.close()
+    lengths = np.fromfile(len_path, dtype=np.int64)
+    offsets = np.zeros(lengths.size + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    buffer = (np.memmap(buf_path, dtype=np.uint8, mode="r") if offsets[-1]
+              else np.empty(0, dtype=np.uint8))
+    return NameTable(buffer, offsets)
+
+
+def merge_spills(spill_dir) -> tuple:
+    """
+    Dedupe bucket by bucket and map domain keys to dense IDs in
+    lexicographic name order. Returns a CSRGraph with its NameTable
+    (memory-mapped from spill_dir, so save it before removing that).
+    """
+    spill_dir = Path(spill_dir)
+    names = _merge_names(spill_dir)
+    keys = name_keys(names)
+    sorter = np.argsort(keys)
+    sorted_keys = keys[sorter]
+
+    def to_ids(k):
+        return sorter[np.searchsorted(sorted_keys, k)].astype(np.int32)
+
+    src_parts, dst_parts = [], []
+    for b in range(N_BUCKETS):
+        files = sorted(spill_dir.glob(f"b{b:03d}_*.npy"))
+        if not files:
+            continue
+        pairs = _unique_pairs(np.concatenate([np.load(f) for f in files]))
+        src_parts.append(to_ids(pairs[:, 0]))
+        dst_parts.append(to_ids(pairs[:, 1]))
+
+    src = np.concatenate(src_parts) if src_parts else np.empty(0, np.int32)
+    dst = np.concatenate(dst_parts) if dst_parts else np.empty(0, np.int32)
+    # successor lists sorted by ID (helps compression and cache locality)
+    order = np.lexsort((dst, src))
+    graph = from_edges(src[order], dst[order], len(names))
+    graph.names = names
+    return graph
+
+
+def ingest(paths, out_dir, workers: int | None = None, psl_path=None,
+           flush_edges: int = FLUSH_EDGES) -> dict:
+    """
+    Run the full pipeline and write the graph to out_dir.
+    """
+    out_dir = Path(out_dir)
+    spill_dir = Path(tempfile.mkdtemp(prefix="seedsites_ingest_"))
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(psl_path,)) as pool:
+            futures = [pool.submit(ingest_file, p, spill_dir, f"f{i:05d}", flush_edges)
+                       for i, p in enumerate(paths)]
+            stats = [f.result() for f in futures]
+        graph = merge_spills(spill_dir)
+        save_csr(graph, out_dir)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    return {
+        "files": stats,
+        "n_nodes": graph.n_nodes,
+        "n_edges": graph.n_edges,
+        "records": sum(s["records"] for s in stats),
+        "links": sum(s["links"] for s in stats),
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# --------------------------
+# Offline fixtures
+# --------------------------
+
+def _warc_record(fh, headers: dict, block: bytes):
+    head = "WARC/1.0\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    head += f"Content-Length: {len(block)}\r\n\r\n"
+    with gzip.GzipFile(fileobj=fh, mode="wb") as gz:   # one member per record
+        gz.write(head.encode() + block + b"\r\n\r\n")
+
+
+def write_fixtures(out_dir, n_nodes: int = 2_000, n_files: int = 2, seed: int = 7) -> list:
+    """
+    Write small WARC, WAT and crawl.log archives generated from a
+    synthetic graph over siteN.co.uk / siteN.se, for offline runs.
+    """
+    from webgraph_csr import synthetic_webgraph
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    graph = synthetic_webgraph(n_nodes, avg_deg=8, seed=seed)
+    host = lambda u: f"www.site{u}.{'co.uk' if u % 3 else 'se'}"  # noqa: E731
+    paths = []
+
+    for part in range(n_files):
+        nodes = range(part, n_nodes, n_files)
+        warc = out_dir / f"fixture-{part}.warc.gz"
+        wat = out_dir / f"fixture-{part}.wat.gz"
+        with open(warc, "wb") as fw, open(wat, "wb") as ft:
+            for u in nodes:
+                targets = graph.indices[graph.indptr[u]:graph.indptr[u + 1]]
+                uri = f"https://{host(u)}/"
+                body = "".join(f'<a href="https://{host(v)}/p">x</a>' for v in targets)
+                http = ("HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n"
+                        f"<html><body>{body}<a href='/local'>l</a></body></html>")
+                _warc_record(fw, {"WARC-Type": "response", "WARC-Target-URI": uri},
+                             http.encode())
+                meta = {"Envelope": {"Payload-Metadata": {"HTTP-Response-Metadata": {
+                    "HTML-Metadata": {"Links": [{"path": "A@/href", "url": f"https://{host(v)}/"}
+                                                for v in targets]}}}}}
+                _warc_record(ft, {"WARC-Type": "metadata", "WARC-Target-URI": uri,
+                                  "Content-Type": "application/json"},
+                             json.dumps(meta).encode())
+        log = out_dir / f"fixture-{part}.crawl.log"
+        with open(log, "w") as fh:
+            for u in nodes:
+                for v in graph.indices[graph.indptr[u]:graph.indptr[u + 1]]:
+                    fh.write(f"2025-01-01T00:00:00Z 200 1024 https://{host(v)}/ L "
+                             f"https://{host(u)}/ text/html #001\n")
+        paths += [warc, wat, log]
+    return paths
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a domain graph from crawl output")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_in = sub.add_parser("ingest")
+    p_in.add_argument("inputs", nargs="+")
+    p_in.add_argument("--out", required=True)
+    p_in.add_argument("--workers", type=int, default=os.cpu_count())
+    p_in.add_argument("--psl", help="public_suffix_list.dat (default: built-in subset)")
+    p_in.add_argument("--flush-edges", type=int, default=FLUSH_EDGES)
+
+    p_fx = sub.add_parser("fixtures")
+    p_fx.add_argument("--out", required=True)
+    p_fx.add_argument("--nodes", type=int, default=2_000)
+
+    args = parser.parse_args(argv)
+    if args.command == "fixtures":
+        for path in write_fixtures(args.out, args.nodes):
+            print(f"✓ Wrote: {path}")
+        return
+
+    result = ingest(args.inputs, args.out, args.workers, args.psl, args.flush_edges)
+    for st in result["files"]:
+        rate = st["records"] / st["seconds"] if st["seconds"] else 0.0
+        print(f"  {Path(st['file']).name:<40} {st['records']:>9,} records "
+              f"{st['links']:>10,} links  {rate:>9,.0f} rec/s")
+    print(f"\n✓ {result['n_nodes']:,} domains, {result['n_edges']:,} edges "
+          f"in {result['seconds']:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+domain_names.py
+
+Compact, immutable domain-name table for mapping between names such as
+"site1.co.uk" and dense integer node IDs.
+
+Layout (two flat arrays, no per-name Python objects):
+
+    buffer  : uint8[total_bytes]  -- all names, sorted, concatenated
+    offsets : int64[N + 1]        -- name i is buffer[offsets[i]:offsets[i+1]]
+
+so 10M .co.uk names cost ~0.25 GB instead of several GB for a dict.
+Both arrays are saved as .npy and can be memory-mapped.
+
+    ID -> name : O(1) slice
+    name -> ID : O(log N) binary search over the sorted names
+    batch      : vectorised binary search over fixed-width byte arrays,
+                 all queries advancing one step per iteration
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+BUFFER_FILE = "names_buf.npy"
+OFFSETS_FILE = "names_off.npy"
+BATCH_CHUNK = 1_000_000     # queries per vectorised search block
+
+
+class NameTable:
+    """
+    Sorted, immutable name table. IDs are positions in sorted order.
+    """
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    # -- construction / IO --
+
+    @classmethod
+    def from_names(cls, names) -> "NameTable":
+        """
+        Build from any iterable of str; duplicates are dropped and the
+        result is sorted (IDs follow byte order of the UTF-8 names).
+        """
+        encoded = sorted({n.encode("utf-8") for n in names})
+        return cls.from_sorted_bytes(encoded)
+
+    @classmethod
+    def from_sorted_bytes(cls, encoded: list) -> "NameTable":
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64,
+                              count=len(encoded))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+        return cls(buffer, offsets)
+
+    def save(self, directory) -> Path:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / BUFFER_FILE, self.buffer)
+        np.save(directory / OFFSETS_FILE, self.offsets)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> "NameTable":
+        directory = Path(directory)
+        mode = "r" if mmap else None
+        return cls(np.load(directory / BUFFER_FILE, mmap_mode=mode),
+                   np.load(directory / OFFSETS_FILE, mmap_mode=mode))
+
+    @staticmethod
+    def exists(directory) -> bool:
+        return (Path(directory) / OFFSETS_FILE).exists()
+
+    # -- lookups --
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.buffer.nbytes + self.offsets.nbytes)
+
+    def _bytes(self, i: int) -> bytes:
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def name(self, node_id: int) -> str:
+        """
+        ID -> name in O(1).
+        """
+        return self._bytes(int(node_id)).decode("utf-8")
+
+    def names(self, ids) -> list:
+        return [self.name(i) for i in np.asarray(ids).ravel()]
+
+    def id_of(self, name: str) -> int:
+        """
+        name -> ID by binary search; KeyError if absent.
+        """
+        key = name.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self._bytes(lo) == key:
+            return lo
+        raise KeyError(name)
+
+    def _fixed_width(self, ids: np.ndarray, width: int) -> np.ndarray:
+        """
+        Names at `ids` as a numpy 'S{width}' array (truncated / NUL-padded).
+        """
+        starts = self.offsets[ids]
+        lengths = np.minimum(self.offsets[ids + 1] - starts, width)
+        cols = np.arange(width)
+        idx = starts[:, None] + cols
+        valid = cols < lengths[:, None]
+        np.minimum(idx, max(len(self.buffer) - 1, 0), out=idx)
+        mat = np.where(valid, self.buffer[idx], 0).astype(np.uint8)
+        return np.ascontiguousarray(mat).view(f"S{width}").ravel()
+
+    def ids_of(self, names, missing: int = -1) -> np.ndarray:
+        """
+        Vectorised name -> ID for many names; absent names map to `missing`.
+
+        Runs ceil(log2 N) lockstep binary-search steps. Table names are
+        compared at width max(len(query)) + 1, which preserves ordering and
+        equality against every query.
+        """
+        encoded = [n.encode("utf-8") if isinstance(n, str) else bytes(n) for n in names]
+        out = np.full(len(encoded), missing, dtype=np.int64)
+        n = len(self)
+        if n == 0 or not encoded:
+            return out
+
+        for lo_q in range(0, len(encoded), BATCH_CHUNK):
+            chunk = encoded[lo_q:lo_q + BATCH_CHUNK]
+            width = max(len(b) for b in chunk) + 1
+            queries = np.array(chunk, dtype=f"S{width}")
+            lo = np.zeros(len(chunk), dtype=np.int64)
+            hi = np.full(len(chunk), n, dtype=np.int64)
+            active = lo < hi
+            while active.any():
+                mid = (lo + hi) // 2
+                sel = np.flatnonzero(active)
+                less = self._fixed_width(mid[sel], width) < queries[sel]
+                lo[sel[less]] = mid[sel[less]] + 1
+                hi[sel[~less]] = mid[sel[~less]]
+                active = lo < hi
+            found = lo < n
+            cand = np.flatnonzero(found)
+            equal = self._fixed_width(lo[cand], width) == queries[cand]
+            hit = cand[equal]
+            out[lo_q + hit] = lo[hit]
+        return out
+
+    def resolve(self, items) -> np.ndarray:
+        """
+        Accept a mix of integer IDs and domain names; return int64 IDs.
+        Unknown names raise KeyError.
+        """
+        items = list(items)
+        out = np.empty(len(items), dtype=np.int64)
+        name_pos = [i for i, x in enumerate(items) if isinstance(x, (str, bytes))]
+        int_pos = [i for i, x in enumerate(items) if not isinstance(x, (str, bytes))]
+        if int_pos:
+            out[int_pos] = np.asarray([items[i] for i in int_pos], dtype=np.int64)
+        if name_pos:
+            ids = self.ids_of([items[i] for i in name_pos])
+            if (ids < 0).any():
+                bad = [items[name_pos[j]] for j in np.flatnonzero(ids < 0)[:5]]
+                raise KeyError(f"Unknown domain(s): {bad}")
+            out[name_pos] = ids
+        return out
+
+
+def synthetic_names(n: int, tld: str = "co.uk") -> NameTable:
+    """
+    Names site00000000.<tld> ... in ID order (zero-padded so that sorted
+    order equals ID order), for synthetic graphs.
+    """
+    width = len(str(max(n - 1, 0)))
+    return NameTable.from_sorted_bytes(
+        [f"site{i:0{width}d}.{tld}".encode() for i in range(n)])
+
+
+def load_seed_list(path, table: NameTable | None = None) -> np.ndarray:
+    """
+    Read a seed list (one domain name or integer ID per line, '#' comments)
+    and return node IDs.
+    """
+    items = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            items.append(int(line) if line.isdigit() else line)
+    if table is None:
+        return np.asarray(items, dtype=np.int64)
+    return table.resolve(items)
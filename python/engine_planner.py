@@ -0,0 +1,324 @@
+"""
+engine_planner.py
+
+Picks how a coverage / TTFI query is executed, so callers do not need
+to know whether a graph fits in RAM. For a graph directory (or just a
+node count), a seed count, a hop limit and a precision it estimates the
+peak memory and runtime of every engine:
+
+    analytical   webgraph_simulation.estimate_coverage / estimate_ttfi
+                 with model_params (precision "model", hops 2-3 only)
+    sampling     calibration.calibrate_graph on sampled BFS balls, then
+                 the analytical model with the calibrated D, r, s, theta
+                 (precision "sampled")
+    compressed   webgraph_bfs.multi_source_bfs over a webgraph_compressed
+                 directory
+    external     external_bfs.external_bfs over a CSR directory,
+                 adjacency streamed from disk
+
+The exact engines (compressed, external) return identical distances.
+There is no in-memory CSR engine: on CSR directories external_bfs
+was both faster (3.2e7 vs 9e6 links/s, warm page cache) and smaller
+than multi_source_bfs over the mapped arrays, so it could never be
+chosen. The planner keeps the engines that exist for the graph's
+format, reach the requested precision ("exact" < "sampled" < "model"
+in strictness) and fit the memory budget, and picks the fastest. The
+budget defaults to MEMORY_FRACTION of MemAvailable.
+
+Cost coefficients are per link / per node and were measured on a
+synthetic 3M-node, 31M-link graph (full BFS, peak RSS including the
+memory-mapped pages); they are deliberately conservative, since the
+point is to avoid OOMs rather than to predict runtimes closely.
+
+Usage:
+    python engine_planner.py --graph ../output/uk_graph --seeds 1000 --hops 3
+    python engine_planner.py --graph ../output/uk_graph --seeds 1000 --memory-gb 2 --run
+    python engine_planner.py --nodes 8400000 --seeds 1000 --precision model
+"""
+
+import argparse
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from model_params import load_model_params
+
+ENGINES = ("analytical", "sampling", "compressed", "external")
+PRECISIONS = ("exact", "sampled", "model")
+ENGINE_PRECISION = {"analytical": "model", "sampling": "sampled",
+                    "compressed": "exact", "external": "exact"}
+MEMORY_FRACTION = 0.7          # share of MemAvailable the planner may plan for
+CALIBRATION_SAMPLES = 500
+
+# Measured cost coefficients (see module docstring)
+BASE_BYTES = 64 * 2**20         # interpreter, numpy, pandas
+COMPRESSED_TEMP_PER_EDGE = 28.0
+EXTERNAL_TEMP_PER_EDGE = 12.0   # per link of one frontier chunk
+SAMPLE_NODE_BYTES = 40.0        # degree arrays, visited marks, mapped indptr pages
+SAMPLE_BYTES = 16 * 1024        # per calibration ball
+COMPRESSED_EDGES_PER_S = 4.4e6
+EXTERNAL_EDGES_PER_S = 3.2e7    # warm; cold runs add the disk term
+DISK_BYTES_PER_S = 400e6        # cold reads of indices.npy
+SAMPLE_SECONDS = 1e-3           # per calibration ball, plus a fixed 0.5s
+
+
+@dataclass
+class Estimate:
+    engine: str
+    precision: str
+    peak_bytes: float
+    seconds: float
+    usable: bool = True
+    reason: str = ""
+
+
+@dataclass
+class Plan:
+    engine: str
+    budget_bytes: float
+    precision: str
+    n_nodes: int
+    n_edges: int
+    graph_format: str | None
+    estimates: list[Estimate] = field(default_factory=list)
+
+    def report(self) -> str:
+        lines = [f"  {'engine':<11} {'precision':<9} {'peak memory':>12} {'runtime':>10}  note"]
+        for e in self.estimates:
+            mark = "->" if e.engine == self.engine else "  "
+            note = e.reason if not e.usable else ("chosen" if e.engine == self.engine else "")
+            lines.append(f"{mark}{e.engine:<11} {e.precision:<9} "
+                         f"{e.peak_bytes / 2**20:>9,.0f} MB {e.seconds:>9.2f}s  {note}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# --------------------------
+# Resources
+# --------------------------
+
+def available_memory() -> int:
+    """MemAvailable in bytes (Linux), else free physical pages."""
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def graph_info(graph_dir) -> dict:
+    """Format, size and on-disk bytes of a save_csr / save_compressed directory."""
+    directory = Path(graph_dir)
+    meta = json.loads((directory / "meta.json").read_text())
+    files = {p.name: p.stat().st_size for p in directory.iterdir() if p.is_file()}
+    return {"format": meta.get("format", "csr"), "n_nodes": int(meta["n_nodes"]),
+            "n_edges": int(meta["n_edges"]), "disk_bytes": sum(files.values()),
+            "files": files}
+
+
+# --------------------------
+# Cost model
+# --------------------------
+
+def estimate_engines(n_nodes: int, n_edges: int, graph_format: str | None,
+                     disk_bytes: float = 0.0, hops: int = 3,
+                     samples: int = CALIBRATION_SAMPLES) -> list[Estimate]:
+    """Peak memory / runtime estimate of every engine, usable or not."""
+    from external_bfs import FRONTIER_CHUNK
+
+    n, m = float(n_nodes), float(n_edges)
+    avg_deg = m / max(n, 1.0)
+    out = [Estimate("analytical", "model", BASE_BYTES, 1e-3,
+                    usable=hops in (2, 3), reason="" if hops in (2, 3) else "hops 2-3 only")]
+    if graph_format is None:
+        for engine in ENGINES[1:]:
+            out.append(Estimate(engine, ENGINE_PRECISION[engine], 0.0, 0.0, False, "no graph"))
+        return out
+
+    is_csr = graph_format == "csr"
+    out.append(Estimate("sampling", "sampled",
+                        BASE_BYTES + SAMPLE_NODE_BYTES * n + samples * SAMPLE_BYTES,
+                        0.5 + samples * SAMPLE_SECONDS,
+                        usable=hops in (2, 3) and is_csr,
+                        reason="hops 2-3 only" if hops not in (2, 3)
+                        else ("" if is_csr else f"{graph_format} directory")))
+    out.append(Estimate("compressed", "exact",
+                        BASE_BYTES + disk_bytes + n + COMPRESSED_TEMP_PER_EDGE * m,
+                        m / COMPRESSED_EDGES_PER_S, usable=graph_format == "compressed",
+                        reason="" if graph_format == "compressed" else "csr directory"))
+    chunk_edges = min(m, FRONTIER_CHUNK * avg_deg)
+    out.append(Estimate("external", "exact",
+                        BASE_BYTES + 9.0 * n + EXTERNAL_TEMP_PER_EDGE * chunk_edges,
+                        m / EXTERNAL_EDGES_PER_S + 4.0 * m / DISK_BYTES_PER_S, usable=is_csr,
+                        reason="" if is_csr else f"{graph_format} directory"))
+    return out
+
+
+def plan_query(graph_dir=None, n_seeds: int = 1000, hops: int = 3,
+               precision: str = "exact", memory_budget: float | None = None,
+               n_nodes: int | None = None, avg_deg: float | None = None,
+               samples: int = CALIBRATION_SAMPLES) -> Plan:
+    """
+    Choose an engine for one query. Without graph_dir only the
+    analytical model is available (n_nodes required). Raises
+    MemoryError if no engine of the requested precision fits.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown precision {precision!r}, expected one of {PRECISIONS}")
+    if graph_dir is not None:
+        info = graph_info(graph_dir)
+        n_nodes, n_edges, fmt, disk = (info["n_nodes"], info["n_edges"], info["format"],
+                                       info["disk_bytes"])
+    else:
+        if n_nodes is None:
+            raise ValueError("plan_query needs a graph directory or n_nodes")
+        D = avg_deg if avg_deg is not None else load_model_params()["D"]
+        n_edges, fmt, disk = int(n_nodes * D), None, 0.0
+    budget = memory_budget if memory_budget else MEMORY_FRACTION * available_memory()
+
+    allowed = PRECISIONS[:PRECISIONS.index(precision) + 1]
+    estimates = estimate_engines(n_nodes, n_edges, fmt, disk, hops, samples)
+    for e in estimates:
+        if e.usable and e.precision not in allowed:
+            e.usable, e.reason = False, f"precision {e.precision}"
+        elif e.usable and e.peak_bytes > budget:
+            e.usable, e.reason = False, "over memory budget"
+    usable = [e for e in estimates if e.usable]
+    plan = Plan("", budget, precision, n_nodes, n_edges, fmt, estimates)
+    if not usable:
+        raise MemoryError(f"no {precision} engine fits {budget / 2**30:.1f} GB for "
+                          f"{n_nodes:,} nodes / {n_edges:,} links:\n{plan.report()}")
+    plan.engine = min(usable, key=lambda e: e.seconds).engine
+    return plan
+
+
+# --------------------------
+# Execution
+# --------------------------
+
+def _model_result(n: int, D: float, n_seeds: int, hops: int, params: dict) -> dict:
+    from webgraph_simulation import estimate_coverage, estimate_ttfi
+
+    coverage, discovered = {}, {}
+    for h in (2, 3):
+        if h <= hops:
+            cov, disc = estimate_coverage(n, D, n_seeds, hops=h, r=params["r"],
+                                          s=params["s"], theta=params["theta"])
+            coverage[h], discovered[h] = cov, int(disc)
+    return {"coverage": coverage, "discovered": discovered,
+            "ttfi_mean_s": estimate_ttfi(D, n_seeds, n, params["tau_hop"])}
+
+
+@lru_cache(maxsize=8)
+def _calibrated_params(graph_dir: str, samples: int, seed: int) -> dict:
+    """calibrate_graph fit, cached so repeated queries on a graph sample once."""
+    from calibration import calibrate_graph
+    from webgraph_csr import load_csr
+
+    return calibrate_graph(load_csr(graph_dir, mmap=True), n_samples=samples,
+                           seed=seed)["params"]
+
+
+def run_query(plan: Plan, graph_dir=None, seeds=None, n_seeds: int | None = None,
+              hops: int = 3, seed: int = 42,
+              samples: int = CALIBRATION_SAMPLES, observer=None) -> dict:
+    """
+    Execute a planned query. Exact engines need seed IDs (or draw
+    n_seeds random ones); the model engines only use the seed count.
+    Returns {engine, coverage: {h: fraction}, discovered: {h: nodes},
+    ttfi_mean_s, seconds}. ttfi_mean_s is over the nodes reached at hops
+    1..hops; seeds (hop 0, TTFI 0) are left out, as in estimate_ttfi.
+    An observer (see traversal_metrics.py) is passed to the exact
+    engines and receives their per-hop events.
+    """
+    params = load_model_params()
+    n = plan.n_nodes
+    if seeds is None and n_seeds is not None and plan.engine not in ("analytical", "sampling"):
+        seeds = np.random.default_rng(seed).choice(n, size=min(n_seeds, n), replace=False)
+    count = len(seeds) if seeds is not None else n_seeds
+    t0 = time.perf_counter()
+
+    if plan.engine == "analytical":
+        result = _model_result(n, plan.n_edges / float(n), count, hops, params)
+    elif plan.engine == "sampling":
+        params = {**params, **_calibrated_params(str(graph_dir), samples, seed)}
+        result = _model_result(n, params["D"], count, hops, params)
+    else:
+        from webgraph_bfs import coverage_by_hop
+
+        if plan.engine == "external":
+            from external_bfs import ExternalCSR, external_bfs
+            with ExternalCSR(graph_dir) as graph:
+                dist = external_bfs(graph, graph.node_ids(seeds), hops, observer=observer)
+        else:
+            from webgraph_bfs import multi_source_bfs
+            from webgraph_compressed import load_graph
+            dist = multi_source_bfs(load_graph(graph_dir, mmap=True), seeds, hops,
+                                    observer=observer)
+        reached = coverage_by_hop(dist, hops)
+        per_hop = np.diff(reached)               # nodes first reached at hops 1..hops
+        ttfi = (params["tau_hop"] * (per_hop * np.arange(1, hops + 1)).sum() / per_hop.sum()
+                if per_hop.sum() else float("inf"))
+        result = {"coverage": {h: reached[h] / float(n) for h in range(1, hops + 1)},
+                  "discovered": {h: int(reached[h]) for h in range(1, hops + 1)},
+                  "ttfi_mean_s": float(ttfi)}
+    result["engine"] = plan.engine
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pick and run a coverage / TTFI engine")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", help="directory from save_csr / save_compressed")
+    src.add_argument("--nodes", type=int, help="node count, analytical model only")
+    parser.add_argument("--seeds", type=int, required=True)
+    parser.add_argument("--hops", type=int, default=3)
+    parser.add_argument("--precision", choices=PRECISIONS, default="exact")
+    parser.add_argument("--memory-gb", type=float, default=None,
+                        help=f"memory budget (default {MEMORY_FRACTION:.0%} of available)")
+    parser.add_argument("--samples", type=int, default=CALIBRATION_SAMPLES)
+    parser.add_argument("--run", action="store_true", help="execute the chosen engine")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    budget = args.memory_gb * 2**30 if args.memory_gb else None
+    try:
+        plan = plan_query(args.graph, args.seeds, args.hops, args.precision, budget,
+                          n_nodes=args.nodes, samples=args.samples)
+    except MemoryError as exc:
+        raise SystemExit(str(exc))
+
+    print("=" * 80)
+    print(f"ENGINE PLAN: {plan.n_nodes:,} nodes, {plan.n_edges:,} links, {args.seeds:,} seeds, "
+          f"{args.hops} hop(s), {args.precision} precision")
+    print(f"  budget {plan.budget_bytes / 2**30:.1f} GB of {available_memory() / 2**30:.1f} GB "
+          f"available")
+    print("=" * 80)
+    print(plan.report())
+
+    if args.run:
+        result = run_query(plan, args.graph, n_seeds=args.seeds, hops=args.hops,
+                           seed=args.seed, samples=args.samples)
+        print()
+        print(f"  {result['engine']} finished in {result['seconds']:.2f}s")
+        for h, cov in result["coverage"].items():
+            print(f"  Coverage within {h} hop(s): {cov:.2%} ({result['discovered'][h]:,} nodes)")
+        print(f"  Mean TTFI: {result['ttfi_mean_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
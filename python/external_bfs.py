@@ -0,0 +1,312 @@
+"""
+external_bfs.py
+
+Semi-external multi-source BFS for graphs whose adjacency does not fit
+in RAM (several TLDs combined, page-level graphs). Only per-node state
+is kept in memory -- the uint8 distance array, one byte per node --
+while successor lists are streamed from the save_csr indices.npy file
+with large sequential reads:
+
+    - the frontier of hop h is never stored: it is re-derived from
+      dist == h - 1 in chunks of FRONTIER_CHUNK node IDs, so it arrives
+      sorted and frontier lookups walk the file front to back
+    - the row ranges of a chunk are coalesced into extents (a gap of up
+      to GAP_EDGES unused edges is read through rather than seeked over)
+      of at most EXTENT_EDGES edges, each read with one pread-style call
+    - indptr is memory-mapped and accessed in the same sorted order
+
+Each extent is expanded with traversal_kernels.bfs_step (compiled when
+the numba backend is selected). Distances (hence k-hop coverage,
+nearest-seed hop counts and TTFI) are identical to
+webgraph_bfs.multi_source_bfs. The observer / checkpoint
+hooks are the same; a checkpoint holds only the distance array.
+
+Usage:
+    python external_bfs.py --graph ../output/uk_graph --seeds 1000 --max-hops 3
+    python external_bfs.py --graph ../output/uk_graph --seed-file seeds.txt --compare
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from checkpoint import seed_fingerprint
+from domain_names import NameTable, load_seed_list
+from traversal_kernels import bfs_step, resolve_backend
+from traversal_metrics import HopStats, new_run_id
+from webgraph_bfs import MAX_HOPS, UNREACHED, coverage_by_hop, ttfi_summary
+
+EXTENT_EDGES = 16 * 1024 * 1024     # largest single read (64 MB of int32)
+GAP_EDGES = 32 * 1024               # read through gaps up to 128 KB
+FRONTIER_CHUNK = 4 * 1024 * 1024    # node IDs scanned per frontier chunk
+
+
+# --------------------------
+# On-disk adjacency
+# --------------------------
+
+def _npy_data(path: Path):
+    """
+    (offset of the array data, dtype, shape) of a .npy file, from its
+    header only.
+    """
+    arr = np.load(path, mmap_mode="r")
+    if not arr.flags.c_contiguous:
+        raise ValueError(f"{path} is not C-ordered")
+    out = arr.offset, arr.dtype, arr.shape
+    del arr
+    return out
+
+
+class ExternalCSR:
+    """
+    Read-only view of a save_csr directory that fetches successor lists
+    with explicit, coalesced reads of indices.npy instead of keeping (or
+    memory-mapping) it. Counts the bytes and reads it issues.
+    """
+
+    def __init__(self, directory, extent_edges: int = EXTENT_EDGES,
+                 gap_edges: int = GAP_EDGES):
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / "meta.json").read_text())
+        if meta.get("format") != "csr":
+            raise ValueError(f"{directory} is a {meta.get('format')!r} graph; "
+                             "external BFS needs a save_csr directory")
+        self.indptr = np.load(self.directory / "indptr.npy", mmap_mode="r")
+        path = self.directory / "indices.npy"
+        self._offset, self.dtype, shape = _npy_data(path)
+        if shape[0] != int(self.indptr[-1]):
+            raise ValueError(f"{path} has {shape[0]:,} entries, indptr expects "
+                             f"{int(self.indptr[-1]):,}")
+        self._fh = open(path, "rb", buffering=0)
+        self.names = NameTable.load(self.directory) if NameTable.exists(self.directory) else None
+        self.extent_edges = extent_edges
+        self.gap_edges = gap_edges
+        self.bytes_read = 0
+        self.reads = 0
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self) -> int:
+        return int(self.indptr[-1])
+
+    def node_ids(self, nodes) -> np.ndarray:
+        if self.names is None:
+            return np.asarray(nodes, dtype=np.int64)
+        return self.names.resolve(nodes)
+
+    def close(self):
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_edges(self, lo: int, hi: int) -> np.ndarray:
+        """
+        indices[lo:hi] with one read.
+        """
+        buf = np.empty(hi - lo, dtype=self.dtype)
+        view = memoryview(buf).cast("B")
+        self._fh.seek(self._offset + lo * self.dtype.itemsize)
+        got = 0
+        while got < view.nbytes:
+            n = self._fh.readinto(view[got:])
+            if not n:
+                raise EOFError(f"Short read at edge {lo + got // self.dtype.itemsize:,}")
+            got += n
+        self.bytes_read += view.nbytes
+        self.reads += 1
+        return buf
+
+    def extents(self, starts: np.ndarray, ends: np.ndarray):
+        """
+        Coalesce sorted row ranges into (first row, last row + 1, edge lo,
+        edge hi) read extents: a new extent starts after a gap of more
+        than gap_edges, or once extent_edges have been covered (so an
+        extent is at most extent_edges plus its last row).
+        """
+        nonempty = np.flatnonzero(ends > starts)
+        if nonempty.size == 0:
+            return
+        s, e = starts[nonempty], ends[nonempty]
+        brk = np.r_[True, s[1:] - e[:-1] > self.gap_edges]
+        run_start = s[brk][np.cumsum(brk) - 1]
+        piece = (s - run_start) // self.extent_edges
+        brk[1:] |= piece[1:] != piece[:-1]
+        first = np.flatnonzero(brk)
+        last = np.r_[first[1:], s.size] - 1
+        for i, j in zip(first.tolist(), last.tolist()):
+            yield int(nonempty[i]), int(nonempty[j]) + 1, int(s[i]), int(e[j])
+
+    def blocks_sorted(self, frontier: np.ndarray):
+        """
+        Yield (rel, block) per read extent of a sorted frontier: the
+        extent's edges and interleaved (start, end) offsets of its rows
+        into them. Rows inside an extent need not be adjacent, so rel
+        serves as an indptr with the rows at its even positions.
+        """
+        starts = np.asarray(self.indptr[frontier], dtype=np.int64)
+        ends = np.asarray(self.indptr[frontier + 1], dtype=np.int64)
+        for a, b, lo, hi in self.extents(starts, ends):
+            block = self.read_edges(lo, hi)
+            rel = np.empty(2 * (b - a), dtype=np.int64)
+            rel[0::2], rel[1::2] = starts[a:b] - lo, ends[a:b] - lo
+            yield rel, block
+
+
+# --------------------------
+# Traversal
+# --------------------------
+
+def external_bfs(graph: ExternalCSR, seeds, max_hops: int | None = None,
+                 observer=None, checkpoint=None, backend: str | None = None) -> np.ndarray:
+    """
+    Level-synchronous multi-source BFS over an ExternalCSR; returns the
+    same uint8 distances as webgraph_bfs.multi_source_bfs. `backend`
+    selects the bfs_step kernel (traversal_kernels.resolve_backend).
+    """
+    backend = resolve_backend(backend)
+    n = graph.n_nodes
+    limit = MAX_HOPS if max_hops is None else min(max_hops, MAX_HOPS)
+    dist = np.full(n, UNREACHED, dtype=np.uint8)
+
+    seed_ids = np.unique(graph.node_ids(seeds))
+    dist[seed_ids] = 0
+    hop, examined, frontier_size = 0, 0, int(seed_ids.size)
+    if checkpoint is not None:
+        saved = checkpoint.restore(seed_fingerprint(n, seed_ids, engine="external",
+                                                    max_hops=limit))
+        if saved is not None:
+            arrays, state = saved
+            dist[:] = arrays["dist"]
+            hop, examined = state["hop"], state["edges_examined"]
+            frontier_size = state["frontier_size"]
+
+    if observer is not None:
+        run_id = new_run_id("external")
+        avg_deg = graph.n_edges / float(max(n, 1))
+        t_start = time.perf_counter()
+        reached = int((dist != UNREACHED).sum())
+        observer.on_run_start({"run_id": run_id, "engine": "external",
+                               "n_nodes": n, "n_edges": graph.n_edges,
+                               "n_seeds": int(seed_ids.size), "max_hops": limit,
+                               "resumed_at_hop": hop})
+
+    while frontier_size and hop < limit:
+        hop += 1
+        scanned = new_nodes = 0
+        t_read = t_filter = 0.0
+        bytes_before = graph.bytes_read
+        for lo in range(0, n, FRONTIER_CHUNK):
+            chunk = dist[lo:lo + FRONTIER_CHUNK]
+            frontier = lo + np.flatnonzero(chunk == hop - 1)
+            if frontier.size == 0:
+                continue
+            t0 = time.perf_counter()
+            for rel, block in graph.blocks_sorted(frontier):
+                t1 = time.perf_counter()
+                _, edges = bfs_step(rel, block, np.arange(0, rel.size, 2), dist, hop,
+                                    backend, dedup=False)
+                scanned += edges
+                t_read += t1 - t0
+                t0 = time.perf_counter()
+                t_filter += t0 - t1
+        # count after the hop: duplicate hits within the hop are not new
+        new_nodes = int(np.count_nonzero(dist == hop))
+        examined += scanned
+
+        if observer is not None:
+            reached += new_nodes
+            observer.on_hop(HopStats.from_counts(
+                run_id, "external", hop,
+                frontier_size=frontier_size,
+                edges_scanned=scanned,
+                new_nodes=new_nodes,
+                n_seeds=int(seed_ids.size), avg_deg=avg_deg,
+                phase_seconds={"read": t_read, "filter": t_filter},
+                phase_bytes={"read": graph.bytes_read - bytes_before},
+            ))
+        frontier_size = new_nodes
+        if checkpoint is not None:
+            checkpoint.maybe_save(hop, {"dist": dist},
+                                  {"hop": hop, "edges_examined": examined,
+                                   "frontier_size": frontier_size},
+                                  force=not frontier_size or hop == limit)
+
+    if observer is not None:
+        observer.on_run_end({"run_id": run_id, "engine": "external", "hops": hop,
+                             "reached": reached, "edges_examined": examined,
+                             "bytes_read": graph.bytes_read, "reads": graph.reads,
+                             "seconds": time.perf_counter() - t_start})
+    return dist
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Semi-external multi-source BFS")
+    parser.add_argument("--graph", required=True, help="directory from save_csr")
+    seeds = parser.add_mutually_exclusive_group(required=True)
+    seeds.add_argument("--seeds", type=int, help="number of random seeds")
+    seeds.add_argument("--seed-file", help="one domain name or ID per line")
+    parser.add_argument("--max-hops", type=int, default=None)
+    parser.add_argument("--extent-mb", type=float, default=EXTENT_EDGES * 4 / 2**20)
+    parser.add_argument("--gap-mb", type=float, default=GAP_EDGES * 4 / 2**20)
+    parser.add_argument("--compare", action="store_true",
+                        help="check against the in-memory engine (needs the RAM)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with ExternalCSR(args.graph) as graph:
+        item = graph.dtype.itemsize
+        graph.extent_edges = int(args.extent_mb * 2**20 / item)
+        graph.gap_edges = int(args.gap_mb * 2**20 / item)
+        if args.seed_file:
+            seed_ids = load_seed_list(args.seed_file, graph.names)
+        else:
+            rng = np.random.default_rng(args.seed)
+            seed_ids = rng.choice(graph.n_nodes, size=args.seeds, replace=False)
+
+        t0 = time.perf_counter()
+        dist = external_bfs(graph, seed_ids, args.max_hops)
+        seconds = time.perf_counter() - t0
+        index_bytes = graph.n_edges * item
+
+        print("=" * 80)
+        print(f"EXTERNAL BFS: {graph.n_nodes:,} nodes, {graph.n_edges:,} links, "
+              f"{len(seed_ids):,} seeds")
+        print("=" * 80)
+        print(f"  Time:        {seconds:.2f}s")
+        print(f"  Read:        {graph.bytes_read / 2**20:,.0f} MB in {graph.reads:,} reads "
+              f"({graph.bytes_read / max(index_bytes, 1):.2f}x indices.npy, "
+              f"{graph.bytes_read / 2**20 / seconds:,.0f} MB/s)")
+        hops = int(dist[dist != UNREACHED].max())
+        for k, reached in enumerate(coverage_by_hop(dist, hops)[1:], start=1):
+            print(f"  Coverage within {k} hop(s): {reached / graph.n_nodes:.2%}")
+        summary = ttfi_summary(dist)
+        print(f"  Mean TTFI: {summary['mean_s']:.2f}s  "
+              f"(p50 {summary['p50_s']:.0f}s, p95 {summary['p95_s']:.0f}s)")
+
+    if args.compare:
+        from webgraph_bfs import multi_source_bfs
+        from webgraph_csr import load_csr
+        reference = multi_source_bfs(load_csr(args.graph, mmap=True), seed_ids, args.max_hops)
+        same = np.array_equal(reference, dist)
+        print(f"  In-memory engine: {'identical' if same else 'DIFFERENT'} distances")
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,16 +9,19 @@ import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+from model_params import load_model_params
+
 # -------------------------
 # 1. Model parameters
 # -------------------------
 
-# Baseline graph parameters
-D = 10.37      # effective intra-TLD out-degree
-r = 0.6        # second-hop deduplication factor
-s = 0.45       # third+ hop deduplication factor
-theta = 0.3    # cross-seed overlap
-tau_hop = 3.0  # average latency per hop in seconds
+# Baseline graph parameters (versioned file, see model_params.py)
+PARAMS = load_model_params()
+D = PARAMS["D"]              # effective intra-TLD out-degree
+r = PARAMS["r"]              # second-hop deduplication factor
+s = PARAMS["s"]              # third+ hop deduplication factor
+theta = PARAMS["theta"]      # cross-seed overlap
+tau_hop = PARAMS["tau_hop"]  # average latency per hop in seconds
 
 # Country sizes (active domains)
 N_UK = 8_400_000
@@ -109,6 +112,84 @@ def estimate_ttfi(D: float, N: int, num_seeds: int,
     return tau_hop * dist
 
 
+# -------------------------
+# 2b. Batched (vectorised) versions
+# -------------------------
+
+def T_k_array(D, r, s, k) -> np.ndarray:
+    """
+    Vectorised T_k: broadcasts over array-valued D, r, s and k.
+
+    The hop >= 3 terms use the closed-form geometric sum
+
+        sum_{h=3..k} D^h = D^3 * (D^(k-2) - 1) / (D - 1)
+
+    so the cost per element does not grow with k.
+    """
+    if np.ndim(k) == 0 and k >= 1:
+        # Scalar horizon: only the terms that apply, no per-element masks
+        D, r, s = np.broadcast_arrays(np.asarray(D, dtype=float),
+                                      np.asarray(r, dtype=float),
+                                      np.asarray(s, dtype=float))
+        total = 1.0 + D
+        if k >= 2:
+            total = total + r * D * D
+        if k >= 3:
+            extra = float(k) - 2.0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                geom = np.where(D == 1.0, extra,
+                                D ** 3 * (D ** extra - 1.0) / (D - 1.0))
+            total = total + s * geom
+        return total
+
+    D, r, s, k = np.broadcast_arrays(np.asarray(D, dtype=float),
+                                     np.asarray(r, dtype=float),
+                                     np.asarray(s, dtype=float),
+                                     np.asarray(k, dtype=float))
+    extra = np.maximum(k - 2.0, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        geom = np.where(D == 1.0, extra,
+                        D ** 3 * (D ** extra - 1.0) / (D - 1.0))
+
+    total = 1.0 + np.where(k >= 1, D, 0.0)
+    total = total + np.where(k >= 2, r * D ** 2, 0.0)
+    total = total + np.where(k >= 3, s * geom, 0.0)
+    return np.where(k < 1, 0.0, total)
+
+
+def estimate_coverage_array(N, num_seeds, D, r, s, theta, k):
+    """
+    Vectorised estimate_coverage: every argument may be an array and
+    the usual broadcasting rules apply.
+
+    Returns (coverage_frac, discovered) as float arrays.
+    """
+    T = T_k_array(D, r, s, k)
+    discovered = (np.asarray(num_seeds, dtype=float) * T) / (1.0 - np.asarray(theta, dtype=float))
+    coverage_frac = np.minimum(1.0, discovered / np.asarray(N, dtype=float))
+    return coverage_frac, discovered
+
+
+def expected_distance_array(D, N, num_seeds) -> np.ndarray:
+    """
+    Vectorised expected_distance (clamped at >= 1 hop).
+    """
+    eff_branch = np.maximum(np.asarray(D, dtype=float), 2.0)
+    ratio = np.asarray(N, dtype=float) / np.asarray(num_seeds, dtype=float)
+    dist = np.log(ratio + 1.0) / np.log(eff_branch + 1.0)
+    return np.maximum(1.0, dist)
+
+
+def estimate_ttfi_array(D, N, num_seeds, tau_hop=3.0, k_horizon=None) -> np.ndarray:
+    """
+    Vectorised estimate_ttfi; k_horizon may be None, a scalar or an array.
+    """
+    dist = expected_distance_array(D, N, num_seeds)
+    if k_horizon is not None:
+        dist = np.minimum(dist, np.asarray(k_horizon, dtype=float))
+    return np.asarray(tau_hop, dtype=float) * dist
+
+
 # -------------------------
 # 3. Build summary tables
 # -------------------------
@@ -2,6 +2,7 @@
 generate_toy_graphs.py
 
 Generate toy web graph visualizations for specific coverage scenarios.
+For real traversal output on large graphs see coverage_raster.py.
 """
 
 import random
@@ -0,0 +1,475 @@
+"""
+graph_profile.py
+
+Out-of-core statistics report for an on-disk graph (save_csr or
+save_compressed directory), the graph-scale counterpart of the Mathematica
+degree_skew_analysis.wl (Gini + Lorenz over in-memory lists):
+
+    - out- / in-degree distributions, quantiles, Gini coefficients,
+      Lorenz curve points and top-x% link shares (hub vs random seeds)
+    - Hill estimate of the in-degree power-law tail
+    - reciprocity (share of distinct links u -> v with v -> u)
+    - TLD-local link share (needs the domain name table)
+    - self-loops, duplicate links and D over distinct links
+    - sampled local clustering coefficient and transitivity
+
+Two passes over the edges, each a process pool over blocks of
+~BLOCK_EDGES edges:
+
+    1. per block: degree histograms, in-degree counts, TLD-local links;
+       every link is spilled as an unordered-pair key plus a direction
+       bit into one of 2^b hash buckets (as crawl_ingest.py does)
+    2. per bucket: sort the keys; duplicates and pairs present in both
+       directions are adjacent, which gives distinct links and
+       reciprocity exactly
+
+Workers memory-map the graph, so memory is bounded by one block (or
+bucket) per worker in flight plus an in-degree array in the parent;
+blocks return sparse (ids, counts) in-degrees.
+
+Usage:
+    python graph_profile.py --graph ../output/couk_graph --workers 8
+    python graph_profile.py --synthetic 10000000 --plot
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+
+from webgraph_csr import gather_segments
+
+BLOCK_EDGES = 16_000_000
+BUCKET_EDGES = 16_000_000    # target links per reciprocity bucket
+CLUSTER_SAMPLES = 10_000
+CLUSTER_MAX_DEG = 500        # neighbours kept per sampled node
+LORENZ_POINTS = 101
+TOP_SHARES = (0.001, 0.01, 0.1)
+TAIL_SHARE = 0.01            # top share of nodes used for the Hill estimate
+NAME_CHUNK = 1_000_000
+TLD_WIDTH = 16
+
+_GRAPH = None
+_TLD = None
+
+
+# --------------------------
+# Degree statistics
+# --------------------------
+
+def degree_stats(hist: np.ndarray) -> dict:
+    """
+    Summary of a degree histogram (hist[d] = nodes with degree d):
+    quantiles, Gini, Lorenz points, top-x% link shares, Hill tail
+    exponent. Exact for the histogram, no per-node array needed.
+    """
+    hist = np.asarray(hist, dtype=np.int64)
+    deg = np.flatnonzero(hist)
+    counts = hist[deg]
+    n = int(counts.sum())
+    mass = counts * deg.astype(np.float64)
+    total = float(mass.sum())
+
+    pop_cum = np.r_[0.0, np.cumsum(counts) / n]
+    mass_cum = np.r_[0.0, np.cumsum(mass) / total] if total > 0 else pop_cum
+    # Lorenz curve is linear inside each degree group, so the trapezoid
+    # rule over group boundaries is the exact Gini of the distribution
+    gini = float(1.0 - np.sum(np.diff(pop_cum) * (mass_cum[1:] + mass_cum[:-1])))
+    p = np.linspace(0.0, 1.0, LORENZ_POINTS)
+    lorenz = np.interp(p, pop_cum, mass_cum)
+
+    def quantile(q):
+        return int(deg[np.searchsorted(pop_cum[1:], q)])
+
+    # Hill estimator over the top TAIL_SHARE of nodes
+    tail_n = max(int(n * TAIL_SHARE), 1)
+    above = np.cumsum(counts[::-1])[::-1]          # nodes with degree >= deg
+    x_min = int(deg[max(np.searchsorted(-above, -tail_n, side="right") - 1, 0)])
+    tail = deg >= max(x_min, 1)
+    k = int(counts[tail].sum())
+    log_sum = float((counts[tail] * np.log(deg[tail] / max(x_min, 1))).sum())
+    hill = 1.0 + k / log_sum if log_sum > 0 else float("nan")
+
+    return {
+        "mean": total / n,
+        "median": quantile(0.5),
+        "p90": quantile(0.9),
+        "p99": quantile(0.99),
+        "max": int(deg[-1]),
+        "zero_share": float(hist[0] / n) if hist.size else 0.0,
+        "gini": gini,
+        "top_share": {str(x): float(1.0 - np.interp(1.0 - x, pop_cum, mass_cum))
+                      for x in TOP_SHARES},
+        "tail_alpha": hill,
+        "tail_x_min": x_min,
+        "lorenz": [[float(a), float(b)] for a, b in zip(p, lorenz)],
+        "histogram": [[int(d), int(c)] for d, c in zip(deg, counts)],
+    }
+
+
+# --------------------------
+# TLD codes
+# --------------------------
+
+def tld_codes(names) -> tuple[np.ndarray, list]:
+    """
+    Per-node TLD code (public suffix = everything after the first label,
+    truncated to TLD_WIDTH bytes) and the list of suffixes. Works on the
+    raw name buffer in chunks, no per-name Python strings.
+    """
+    codes = np.empty(len(names), dtype=np.int32)
+    suffixes: dict[bytes, int] = {}
+    cols = np.arange(TLD_WIDTH)
+    for lo in range(0, len(names), NAME_CHUNK):
+        hi = min(lo + NAME_CHUNK, len(names))
+        base = int(names.offsets[lo])
+        buf = np.asarray(names.buffer[base:int(names.offsets[hi])])
+        starts = np.asarray(names.offsets[lo:hi]) - base
+        ends = np.asarray(names.offsets[lo + 1:hi + 1]) - base
+        dots = np.r_[np.flatnonzero(buf == ord(".")), buf.size]
+        first = np.minimum(dots[np.searchsorted(dots, starts)] + 1, ends)
+        idx = np.minimum(first[:, None] + cols, max(buf.size - 1, 0))
+        mat = np.where(cols < (ends - first)[:, None], buf[idx], 0).astype(np.uint8)
+        uniq, inverse = np.unique(mat.view(f"S{TLD_WIDTH}").ravel(), return_inverse=True)
+        lookup = np.array([suffixes.setdefault(bytes(u), len(suffixes)) for u in uniq],
+                          dtype=np.int32)
+        codes[lo:hi] = lookup[inverse.ravel()]
+    return codes, [s.decode("utf-8", "replace") for s in suffixes]
+
+
+# --------------------------
+# Pass 1: blocks
+# --------------------------
+
+def _init_worker(graph_dir, tld_path):
+    global _GRAPH, _TLD
+    from webgraph_compressed import load_graph
+    _GRAPH = load_graph(graph_dir, mmap=True)
+    _TLD = np.load(tld_path, mmap_mode="r") if tld_path else None
+
+
+def _edges_of(graph, rows: np.ndarray):
+    """
+    (src, dst) int64 arrays of every link out of `rows`.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if hasattr(graph, "indptr"):
+        deg = np.asarray(graph.indptr[rows + 1] - graph.indptr[rows])
+        return np.repeat(rows, deg), np.asarray(graph.successors(rows), dtype=np.int64)
+    src, dst = graph._decode(rows, with_src=True)
+    return src, dst.astype(np.int64)
+
+
+def _bucket_of(pair: np.ndarray, bits: int) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        mixed = pair * np.uint64(0x9E3779B97F4A7C15)
+    return (mixed >> np.uint64(64 - bits)).astype(np.int64) if bits else np.zeros(pair.size, np.int64)
+
+
+def _profile_block(lo: int, hi: int, spill_dir, bits: int) -> dict:
+    graph = _GRAPH
+    n = graph.n_nodes
+    src, dst = _edges_of(graph, np.arange(lo, hi))
+    out_deg = np.bincount(src - lo, minlength=hi - lo)
+    loop = src == dst
+    out = {
+        "out_hist": np.bincount(out_deg),
+        "self_loops": int(loop.sum()),
+    }
+    out["in_ids"], out["in_counts"] = np.unique(dst, return_counts=True)
+    if _TLD is not None:
+        out["tld_local"] = int((_TLD[src] == _TLD[dst]).sum())
+
+    src, dst = src[~loop], dst[~loop]
+    lo_id = np.minimum(src, dst).astype(np.uint64)
+    hi_id = np.maximum(src, dst).astype(np.uint64)
+    pair = lo_id * np.uint64(n) + hi_id
+    key = (pair << np.uint64(1)) | (src > dst).astype(np.uint64)
+    bucket = _bucket_of(pair, bits)
+    order = np.argsort(bucket, kind="stable")
+    key, bucket = key[order], bucket[order]
+    bounds = np.searchsorted(bucket, np.arange((1 << bits) + 1))
+    for b in range(1 << bits):
+        if bounds[b + 1] > bounds[b]:
+            np.save(Path(spill_dir) / f"b{b:04d}_{lo:012d}.npy", key[bounds[b]:bounds[b + 1]])
+    return out
+
+
+# --------------------------
+# Pass 2: buckets
+# --------------------------
+
+def _reciprocity_bucket(spill_dir, b: int) -> tuple[int, int]:
+    """
+    (distinct links, links whose reverse exists) in one bucket.
+    """
+    files = sorted(Path(spill_dir).glob(f"b{b:04d}_*.npy"))
+    if not files:
+        return 0, 0
+    keys = np.concatenate([np.load(f) for f in files])
+    keys.sort()
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    pair = keys >> np.uint64(1)
+    both = int((pair[1:] == pair[:-1]).sum())
+    return int(keys.size), 2 * both
+
+
+# --------------------------
+# Sampled clustering
+# --------------------------
+
+def sampled_clustering(graph, samples: int = CLUSTER_SAMPLES,
+                       max_deg: int = CLUSTER_MAX_DEG, seed: int = 42,
+                       out_deg: np.ndarray | None = None) -> dict:
+    """
+    Directed local clustering C(v) = links among N+(v) / (k (k - 1)) for
+    random nodes with out-degree >= 2 (neighbour lists deduplicated,
+    self-loops dropped, hubs capped at max_deg random neighbours), and
+    the pooled ratio over all samples (transitivity).
+    """
+    nan = float("nan")
+    rng = np.random.default_rng(seed)
+    if out_deg is None:
+        out_deg = graph.out_degree()
+    cand = np.flatnonzero(out_deg >= 2)
+    if cand.size == 0:
+        return {"samples": 0, "average_local": nan, "transitivity": nan}
+    nodes = np.sort(rng.choice(cand, size=min(samples, cand.size), replace=False))
+
+    # neighbour sets as sorted (sample index << 32 | neighbour) keys
+    src, nbr = _edges_of(graph, nodes)
+    owner = np.searchsorted(nodes, src)
+    keep = nbr != src
+    keys = np.unique((owner[keep] << 32) | nbr[keep])
+    # hubs: keep a random max_deg neighbours per sample
+    owner = keys >> 32
+    order = np.lexsort((rng.random(keys.size), owner))
+    rank = np.empty(keys.size, dtype=np.int64)
+    rank[order] = np.arange(keys.size)
+    keys = keys[rank - np.searchsorted(owner, owner) < max_deg]
+    owner = keys >> 32
+    members = keys & 0xFFFFFFFF
+    k = np.bincount(owner, minlength=nodes.size).astype(np.float64)
+
+    # links among neighbours: successors of a neighbour that are
+    # themselves (kept) neighbours of the same sample
+    uniq, inverse = np.unique(members, return_inverse=True)
+    hop_src, hop_dst = _edges_of(graph, uniq)
+    hop = np.unique((np.searchsorted(uniq, hop_src) << 32) | hop_dst)
+    row, hop_dst = hop >> 32, hop & 0xFFFFFFFF
+    starts = np.r_[0, np.cumsum(np.bincount(row, minlength=uniq.size))]
+    hop_dst = gather_segments(starts, hop_dst, inverse)
+    hop_owner = np.repeat(owner, np.diff(starts)[inverse])
+    tri = (hop_owner << 32) | hop_dst
+    pos = np.minimum(np.searchsorted(keys, tri), keys.size - 1)
+    inner = (keys[pos] == tri) & (hop_dst != np.repeat(members, np.diff(starts)[inverse]))
+    links = np.bincount(hop_owner[inner], minlength=nodes.size)
+
+    possible = k * (k - 1.0)
+    ok = possible > 0
+    if not ok.any():
+        return {"samples": 0, "average_local": nan, "transitivity": nan}
+    return {"samples": int(ok.sum()),
+            "average_local": float((links[ok] / possible[ok]).mean()),
+            "transitivity": float(links[ok].sum() / possible[ok].sum())}
+
+
+# --------------------------
+# Driver
+# --------------------------
+
+def _blocks(cum: np.ndarray, max_edges: int):
+    """
+    Consecutive node ranges holding about max_edges links each, from the
+    cumulative out-degree array (indptr).
+    """
+    n = cum.size - 1
+    lo = 0
+    while lo < n:
+        hi = int(np.searchsorted(cum, cum[lo] + max_edges, side="right")) - 1
+        hi = min(max(hi, lo + 1), n)
+        yield lo, hi
+        lo = hi
+
+
+def profile_graph(graph_dir, workers: int | None = None, tmp_dir=None,
+                  cluster_samples: int = CLUSTER_SAMPLES, seed: int = 42,
+                  verbose: bool = False) -> dict:
+    """
+    Full report for the graph saved in graph_dir.
+    """
+    from webgraph_compressed import load_graph
+
+    t_start = time.perf_counter()
+    graph = load_graph(graph_dir, mmap=True)
+    n, m = graph.n_nodes, graph.n_edges
+    cum = np.asarray(graph.indptr) if hasattr(graph, "indptr") else \
+        np.r_[0, np.cumsum(graph.out_degree())]
+    bits = max(0, int(np.ceil(np.log2(max(m / BUCKET_EDGES, 1.0)))))
+    work = Path(tempfile.mkdtemp(prefix="seedsites_profile_", dir=tmp_dir))
+
+    try:
+        tld_path, suffixes = None, []
+        if graph.names is not None:
+            codes, suffixes = tld_codes(graph.names)
+            tld_path = work / "tld.npy"
+            np.save(tld_path, codes)
+            del codes
+
+        out_hist = np.zeros(1, dtype=np.int64)
+        in_deg = np.zeros(n, dtype=np.int64)
+        self_loops = tld_local = 0
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(graph_dir), tld_path)) as pool:
+            blocks = _blocks(cum, BLOCK_EDGES)
+            in_flight = 2 * (workers or os.cpu_count() or 1)
+            pending, n_blocks = set(), 0
+            while True:
+                # two blocks per worker in flight; results are merged
+                # and freed as they finish
+                for lo, hi in blocks:
+                    pending.add(pool.submit(_profile_block, lo, hi, work, bits))
+                    n_blocks += 1
+                    if len(pending) >= in_flight:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    r = f.result()
+                    if r["out_hist"].size > out_hist.size:
+                        out_hist = np.pad(out_hist, (0, r["out_hist"].size - out_hist.size))
+                    out_hist[:r["out_hist"].size] += r["out_hist"]
+                    in_deg[r["in_ids"]] += r["in_counts"]
+                    self_loops += r["self_loops"]
+                    tld_local += r.get("tld_local", 0)
+                del done, f, r              # drop the merged block arrays
+            t1 = time.perf_counter()
+            if verbose:
+                print(f"  pass 1: {n_blocks} blocks in {t1 - t0:.1f}s")
+
+            buckets = [pool.submit(_reciprocity_bucket, work, b) for b in range(1 << bits)]
+            distinct = reciprocal = 0
+            for f in buckets:
+                d, r = f.result()
+                distinct += d
+                reciprocal += r
+            if verbose:
+                print(f"  pass 2: {len(buckets)} buckets in {time.perf_counter() - t1:.1f}s")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    t0 = time.perf_counter()
+    clustering = sampled_clustering(graph, cluster_samples, seed=seed, out_deg=np.diff(cum))
+    if verbose:
+        print(f"  clustering: {clustering['samples']:,} samples in {time.perf_counter() - t0:.1f}s")
+
+    return {
+        "graph": str(graph_dir),
+        "n_nodes": n,
+        "n_edges": m,
+        "D": m / n,
+        "D_distinct": distinct / n,
+        "self_loops": self_loops,
+        "duplicate_links": m - self_loops - distinct,
+        "reciprocity": reciprocal / distinct if distinct else float("nan"),
+        "tld_local_share": tld_local / m if suffixes and m else None,
+        "tlds": len(suffixes),
+        "out_degree": degree_stats(out_hist),
+        "in_degree": degree_stats(np.bincount(in_deg)),
+        "clustering": clustering,
+        "seconds": time.perf_counter() - t_start,
+    }
+
+
+def plot_lorenz(report: dict, filename):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(6, 6))
+    for key, label in (("out_degree", "out-links"), ("in_degree", "in-links")):
+        pts = np.array(report[key]["lorenz"])
+        plt.plot(pts[:, 0] * 100, pts[:, 1] * 100,
+                 label=f"{label} (Gini {report[key]['gini']:.3f})")
+    plt.plot([0, 100], [0, 100], "k--", linewidth=0.8, label="equality")
+    plt.xlabel("Cumulative share of domains (%)")
+    plt.ylabel("Cumulative share of links (%)")
+    plt.title("Lorenz curves of domain degree")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(filename, dpi=300)
+    plt.close()
+    print(f"✓ Saved: {filename}")
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Out-of-core graph statistics report")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", help="directory from save_csr / save_compressed")
+    src.add_argument("--synthetic", type=int, metavar="N_NODES")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tmp", help="spill directory (default: system temp)")
+    parser.add_argument("--cluster-samples", type=int, default=CLUSTER_SAMPLES)
+    parser.add_argument("--out", default="../output/graph_profile.json")
+    parser.add_argument("--plot", action="store_true", help="also write Lorenz curves")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    graph_dir = args.graph
+    synth_dir = None
+    if args.synthetic:
+        from domain_names import synthetic_names
+        from webgraph_csr import save_csr, synthetic_webgraph
+        synth_dir = tempfile.mkdtemp(prefix="seedsites_synth_", dir=args.tmp)
+        graph = synthetic_webgraph(args.synthetic, seed=args.seed)
+        graph.names = synthetic_names(args.synthetic)
+        graph_dir = save_csr(graph, synth_dir)
+        del graph
+    try:
+        report = profile_graph(graph_dir, args.workers or os.cpu_count(), args.tmp,
+                               args.cluster_samples, args.seed, verbose=True)
+    finally:
+        if synth_dir:
+            shutil.rmtree(synth_dir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"GRAPH PROFILE: {report['n_nodes']:,} nodes, {report['n_edges']:,} links "
+          f"in {report['seconds']:.1f}s")
+    print("=" * 80)
+    print(f"  D (all / distinct links):  {report['D']:.3f} / {report['D_distinct']:.3f}")
+    print(f"  Self-loops / duplicates:   {report['self_loops']:,} / {report['duplicate_links']:,}")
+    print(f"  Reciprocity:               {report['reciprocity']:.4f}")
+    if report["tld_local_share"] is not None:
+        print(f"  TLD-local link share:      {report['tld_local_share']:.2%} "
+              f"({report['tlds']:,} TLDs)")
+    c = report["clustering"]
+    print(f"  Clustering (sampled):      avg local {c['average_local']:.4f}, "
+          f"transitivity {c['transitivity']:.4f} ({c['samples']:,} nodes)")
+    for key in ("out_degree", "in_degree"):
+        s = report[key]
+        shares = ", ".join(f"top {float(x):.1%}: {v:.1%}" for x, v in s["top_share"].items())
+        print(f"  {key:<11} mean {s['mean']:.2f}  median {s['median']}  p99 {s['p99']}  "
+              f"max {s['max']:,}  Gini {s['gini']:.3f}  tail alpha {s['tail_alpha']:.2f}")
+        print(f"  {'':<11} link share held by {shares}")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=1))
+    print(f"✓ Saved: {out}")
+    if args.plot:
+        plot_lorenz(report, out.with_name(out.stem + "_lorenz.png"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+hop_seed_explorer.py
+
+Extra hops vs extra seeds over a dense (k, n) grid. The paper compares
+k = 5 and k = 10 at four seed counts (build_multi_hop_table); this
+module evaluates every hop horizon 1..K against hundreds of seed counts
+and keeps the Pareto frontier of
+
+    coverage  (maximise)
+    TTFI      (minimise)
+    fetches   (minimise) = n * T_k, the pages the per-seed crawls fetch
+
+Two modes:
+
+    analytical   estimate_coverage_array / estimate_ttfi_array with the
+                 TTFI horizon truncated at k, as in build_multi_hop_table
+    graph        coverage and TTFI measured on a link graph. The seed
+                 sets are nested (the first n seeds of one ordering), so
+                 a single min-rank relaxation gives the whole grid: with
+                 b_h(v) the smallest seed rank within h hops of v, node v
+                 is reached within h hops by the first n seeds iff
+                 b_h(v) < n. K edge passes cover every (k, n) cell, where
+                 a BFS per seed count would repeat them per cell. T_k
+                 for the fetch cost uses D, r, s calibrated on the graph.
+
+Usage:
+    python hop_seed_explorer.py --country UK SE --max-hops 10 --points 300
+    python hop_seed_explorer.py --graph ../output/uk_graph --order outdegree --target 90 --plot
+    python hop_seed_explorer.py --synthetic 1000000 --max-hops 8
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from generate_tables_and_figures import (T_k_array, estimate_coverage_array,
+                                         estimate_ttfi_array, N_UK, N_SE, PARAMS)
+from webgraph_csr import gather_segments
+
+COUNTRIES = {"UK": N_UK, "SE": N_SE}
+MAX_HOPS_DEFAULT = 10
+POINTS_DEFAULT = 200           # seed counts per country
+MIN_SEEDS = 10
+MAX_SEED_SHARE = 0.1           # largest seed count as a share of N
+CALIBRATION_SAMPLES = 500
+OBJECTIVES = {"Coverage_%": "max", "TTFI_s": "min", "Fetches": "min"}
+FRONT_CHUNK = 1024             # rows per block of the dominance check
+
+
+def seed_grid(n_total: int, points: int = POINTS_DEFAULT, lo: int = MIN_SEEDS,
+              hi: int | None = None) -> np.ndarray:
+    """Log-spaced distinct seed counts in [lo, hi] (hi defaults to 10% of N)."""
+    hi = hi if hi is not None else max(lo, int(n_total * MAX_SEED_SHARE))
+    return np.unique(np.geomspace(lo, hi, points).round().astype(np.int64))
+
+
+def _cells(label: str, seeds: np.ndarray, ks: np.ndarray) -> pd.DataFrame:
+    k, n = np.meshgrid(ks, seeds, indexing="ij")
+    return pd.DataFrame({"Country": label, "Hops": k.ravel(), "Seeds": n.ravel()})
+
+
+# --------------------------
+# Analytical grid
+# --------------------------
+
+def analytical_grid(n_total: int, seeds, ks, label: str = "",
+                    params: dict | None = None) -> pd.DataFrame:
+    """
+    Every (k, n) cell of the analytical model, one row per cell with
+    Country, Hops, Seeds, Coverage_%, Discovered, TTFI_s, Fetches.
+    """
+    p = {**PARAMS, **(params or {})}
+    seeds, ks = np.asarray(seeds, dtype=np.int64), np.asarray(ks, dtype=np.int64)
+    df = _cells(label, seeds, ks)
+    k, n = df["Hops"].to_numpy(), df["Seeds"].to_numpy()
+    cov, disc = estimate_coverage_array(n_total, n, p["D"], p["r"], p["s"], p["theta"], k)
+    df["Coverage_%"] = cov * 100.0
+    df["Discovered"] = np.minimum(disc, n_total).astype(np.int64)
+    df["TTFI_s"] = estimate_ttfi_array(p["D"], n_total, n, p["tau_hop"], k_horizon=k)
+    df["Fetches"] = n * T_k_array(p["D"], p["r"], p["s"], k)
+    return df
+
+
+# --------------------------
+# Graph-backed grid
+# --------------------------
+
+def seed_order(graph, order: str = "random", seed: int = 42) -> np.ndarray:
+    """Candidate seeds, best first: random, or by descending out-degree."""
+    n = graph.n_nodes
+    rng = np.random.default_rng(seed)
+    if order == "random":
+        return rng.permutation(n)
+    if order == "outdegree":
+        deg = np.diff(graph.indptr) if hasattr(graph, "indptr") else graph.out_degree()
+        return np.lexsort((rng.random(n), -np.asarray(deg, dtype=np.int64)))
+    raise ValueError(f"unknown seed order {order!r}")
+
+
+def min_rank_reach(graph, ranked_seeds: np.ndarray, max_hops: int = MAX_HOPS_DEFAULT
+                   ) -> np.ndarray:
+    """
+    (max_hops + 1, S + 1) cumulative counts for S = len(ranked_seeds):
+    entry [h, m] is the number of nodes within h hops of the first m
+    seeds.
+    """
+    n, S = graph.n_nodes, len(ranked_seeds)
+    best = np.full(n, S, dtype=np.int32)
+    best[ranked_seeds] = np.arange(S, dtype=np.int32)
+    frontier = np.sort(np.asarray(ranked_seeds, dtype=np.int64))
+    indptr = graph.indptr if hasattr(graph, "indptr") else None
+
+    out = np.zeros((max_hops + 1, S + 1), dtype=np.int64)
+    out[0, 1:] = np.cumsum(np.bincount(best, minlength=S + 1)[:S])
+    for hop in range(1, max_hops + 1):
+        if frontier.size == 0:
+            out[hop] = out[hop - 1]
+            continue
+        if indptr is not None:
+            deg = indptr[frontier + 1] - indptr[frontier]
+            dst = gather_segments(indptr, graph.indices, frontier)
+            cand = np.repeat(best[frontier], deg)
+        else:
+            src, dst = graph._decode(frontier, with_src=True)
+            cand = best[src]
+        better = cand < best[dst]
+        new = best.copy()
+        np.minimum.at(new, dst[better], cand[better])
+        frontier = np.flatnonzero(new < best)
+        best = new
+        out[hop, 1:] = np.cumsum(np.bincount(best, minlength=S + 1)[:S])
+    return out
+
+
+def graph_grid(graph, seeds, ks, order: np.ndarray, label: str = "",
+               params: dict | None = None) -> pd.DataFrame:
+    """
+    Graph-backed (k, n) grid: the seed set of size n is order[:n].
+    TTFI is tau_hop times the mean hop distance of the nodes first
+    reached at hops 1..k; the seeds themselves (hop 0) are left out, as
+    in engine_planner.run_query, so a larger seed set does not lower
+    TTFI just by adding zeros. inf where no non-seed node is reached.
+    """
+    p = {**PARAMS, **(params or {})}
+    seeds, ks = np.asarray(seeds, dtype=np.int64), np.asarray(ks, dtype=np.int64)
+    reach = min_rank_reach(graph, order[:seeds.max()], int(ks.max()))[:, seeds]
+    hops = np.arange(reach.shape[0])[:, None]
+    dist_sum = np.cumsum(np.diff(reach, axis=0, prepend=0) * hops, axis=0)
+
+    df = _cells(label, seeds, ks)
+    reached = reach[ks].ravel()
+    df["Coverage_%"] = reached / float(graph.n_nodes) * 100.0
+    df["Discovered"] = reached
+    beyond = reached - np.broadcast_to(reach[0], reach[ks].shape).ravel()
+    df["TTFI_s"] = np.divide(p["tau_hop"] * dist_sum[ks].ravel(), beyond,
+                             out=np.full(beyond.size, np.inf), where=beyond > 0)
+    df["Fetches"] = df["Seeds"].to_numpy() * T_k_array(p["D"], p["r"], p["s"],
+                                                        df["Hops"].to_numpy())
+    return df
+
+
+# --------------------------
+# Pareto frontier
+# --------------------------
+
+def pareto_mask(df: pd.DataFrame, objectives: dict = OBJECTIVES) -> np.ndarray:
+    """
+    True for the rows no other row dominates (at least as good on every
+    objective, strictly better on one). "max" objectives are negated.
+    """
+    X = np.column_stack([df[c].to_numpy(dtype=float) * (-1.0 if d == "max" else 1.0)
+                         for c, d in objectives.items()])
+    keep = np.ones(len(X), dtype=bool)
+    for i in range(0, len(X), FRONT_CHUNK):
+        block = X[i:i + FRONT_CHUNK, None, :]
+        le = (X[None, :, :] <= block).all(axis=2)
+        lt = (X[None, :, :] < block).any(axis=2)
+        keep[i:i + FRONT_CHUNK] = ~(le & lt).any(axis=1)
+    return keep
+
+
+def pareto_flags(df: pd.DataFrame, objectives: dict = OBJECTIVES) -> np.ndarray:
+    """pareto_mask applied within each Country."""
+    mask = np.zeros(len(df), dtype=bool)
+    for _, g in df.groupby("Country", sort=False):
+        mask[df.index.get_indexer(g.index)] = pareto_mask(g, objectives)
+    return mask
+
+
+def pareto_front(df: pd.DataFrame, objectives: dict = OBJECTIVES) -> pd.DataFrame:
+    """Non-dominated rows per Country, sorted by fetch cost."""
+    return (df[pareto_flags(df, objectives)].sort_values(["Country", "Fetches"], kind="stable")
+            .reset_index(drop=True))
+
+
+def cheapest_for_target(df: pd.DataFrame, target: float) -> pd.DataFrame:
+    """Per Country and hop horizon, the fewest seeds reaching target % coverage."""
+    hit = df[df["Coverage_%"] >= target]
+    return (hit.sort_values("Seeds").groupby(["Country", "Hops"], sort=True).head(1)
+               .sort_values(["Country", "Hops"]).reset_index(drop=True))
+
+
+def plot_front(df: pd.DataFrame, front: pd.DataFrame, path):
+    import matplotlib.pyplot as plt
+
+    countries = list(dict.fromkeys(df["Country"]))
+    fig, axes = plt.subplots(1, len(countries), figsize=(6 * len(countries), 4.5), squeeze=False)
+    for ax, country in zip(axes[0], countries):
+        grid, pf = df[df["Country"] == country], front[front["Country"] == country]
+        ax.scatter(grid["Fetches"], grid["Coverage_%"], s=4, c="lightgrey", label="grid")
+        sc = ax.scatter(pf["Fetches"], pf["Coverage_%"], s=14, c=pf["Hops"], cmap="viridis",
+                        label="Pareto frontier")
+        ax.set_xscale("log")
+        ax.set_xlabel("Fetches (n · T_k)")
+        ax.set_ylabel("Coverage (%)")
+        ax.set_title(f"{country}: hops vs seeds")
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc="lower right")
+        fig.colorbar(sc, ax=ax, label="Hop horizon k")
+    fig.tight_layout()
+    fig.savefig(path, dpi=300)
+    plt.close(fig)
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hop horizon vs seed count trade-off explorer")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--country", nargs="+", choices=sorted(COUNTRIES), default=["UK", "SE"],
+                     help="analytical model at the paper's country sizes")
+    src.add_argument("--graph", help="directory from save_csr / save_compressed")
+    src.add_argument("--synthetic", type=int, metavar="N_NODES")
+    parser.add_argument("--label", default=None, help="Country label for graph rows")
+    parser.add_argument("--max-hops", type=int, default=MAX_HOPS_DEFAULT)
+    parser.add_argument("--points", type=int, default=POINTS_DEFAULT,
+                        help="seed counts per country (log-spaced)")
+    parser.add_argument("--seeds-max", type=int, default=None,
+                        help=f"largest seed count (default {MAX_SEED_SHARE:.0%} of N)")
+    parser.add_argument("--order", choices=("random", "outdegree"), default="random",
+                        help="graph mode: which nodes become seeds first")
+    parser.add_argument("--samples", type=int, default=CALIBRATION_SAMPLES,
+                        help="graph mode: calibration balls for T_k")
+    parser.add_argument("--target", type=float, default=90.0,
+                        help="report the fewest seeds per k reaching this coverage %%")
+    parser.add_argument("--plot", action="store_true")
+    parser.add_argument("--out", default="../output/hop_seed_grid.csv")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    ks = np.arange(1, args.max_hops + 1)
+    t0 = time.perf_counter()
+    if args.graph or args.synthetic:
+        if args.graph:
+            from webgraph_compressed import load_graph
+            graph = load_graph(args.graph, mmap=True)
+        else:
+            from webgraph_csr import synthetic_webgraph
+            graph = synthetic_webgraph(args.synthetic, seed=args.seed)
+        params = {}
+        if hasattr(graph, "indptr"):
+            from calibration import calibrate_graph
+            params = calibrate_graph(graph, n_samples=args.samples, seed=args.seed)["params"]
+        else:
+            params = {"D": graph.n_edges / float(graph.n_nodes)}
+        label = args.label or (Path(args.graph).name if args.graph else "synthetic")
+        seeds = seed_grid(graph.n_nodes, args.points, hi=args.seeds_max)
+        df = graph_grid(graph, seeds, ks, seed_order(graph, args.order, args.seed),
+                        label, params)
+        mode = f"graph, {graph.n_nodes:,} nodes, {args.order} seed order"
+    else:
+        df = pd.concat([analytical_grid(COUNTRIES[c], seed_grid(COUNTRIES[c], args.points,
+                                                                hi=args.seeds_max),
+                                        ks, c) for c in args.country], ignore_index=True)
+        mode = "analytical"
+    df["Pareto"] = pareto_flags(df)
+    front = df[df["Pareto"]].drop(columns="Pareto").sort_values(
+        ["Country", "Fetches"], kind="stable").reset_index(drop=True)
+    seconds = time.perf_counter() - t0
+
+    print("=" * 80)
+    print(f"HOP VS SEED EXPLORER ({mode}): {len(df):,} (k, n) cells, "
+          f"k = 1..{args.max_hops}, in {seconds:.2f}s")
+    print("=" * 80)
+    fmt = {"Coverage_%": "{:.2f}".format, "TTFI_s": "{:.2f}".format,
+           "Fetches": "{:,.3g}".format, "Discovered": "{:,}".format}
+    for country, pf in front.groupby("Country", sort=False):
+        print(f"\n{country}: {len(pf):,} Pareto-optimal cells of "
+              f"{int((df['Country'] == country).sum()):,}")
+        step = max(1, len(pf) // 15)
+        print(pf.iloc[::step].to_string(index=False, formatters=fmt))
+
+    best = cheapest_for_target(df, args.target)
+    print(f"\nFewest seeds reaching {args.target:g}% coverage per hop horizon")
+    if best.empty:
+        print("  none in the grid")
+    else:
+        print(best.to_string(index=False, formatters=fmt))
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out, index=False)
+    print(f"\n✓ Saved: {out}")
+    front_out = out.with_name(out.stem + "_pareto.csv")
+    front.to_csv(front_out, index=False)
+    print(f"✓ Saved: {front_out}")
+    if args.plot:
+        png = out.with_suffix(".png")
+        plot_front(df, front, png)
+        print(f"✓ Saved: {png}")
+
+
+if __name__ == "__main__":
+    main()
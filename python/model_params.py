@@ -0,0 +1,97 @@
+"""
+model_params.py
+
+Single source of truth for the coverage / TTFI model parameters:
+
+    D        -- effective intra-TLD out-degree
+    r        -- second-hop deduplication factor
+    s        -- third+ hop deduplication factor
+    theta    -- cross-seed overlap
+    tau_hop  -- average latency per hop in seconds
+
+Values live in a versioned JSON file (model_params.json next to this
+module, or the path in $SEEDSITES_PARAMS). calibration.py writes new
+versions of that file; generate_tables_and_figures.py,
+webgraph_simulation.py and run_scenarios.py load it on import.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+PARAMS_FILE = Path(__file__).with_name("model_params.json")
+PARAMS_ENV = "SEEDSITES_PARAMS"
+FORMAT_VERSION = 1
+
+# Paper baseline, used when no parameter file exists
+DEFAULT_PARAMS = {
+    "D": 10.37,
+    "r": 0.6,
+    "s": 0.45,
+    "theta": 0.3,
+    "tau_hop": 3.0,
+}
+
+
+def params_path(path=None) -> Path:
+    if path is not None:
+        return Path(path)
+    return Path(os.environ.get(PARAMS_ENV, PARAMS_FILE))
+
+
+def load_params_file(path=None) -> dict:
+    """
+    Return the full parameter document (params, version, provenance, CIs).
+    A missing file yields the built-in defaults as version 0.
+    """
+    path = params_path(path)
+    if not path.exists():
+        return {"format_version": FORMAT_VERSION, "version": 0,
+                "source": "built-in defaults", "params": dict(DEFAULT_PARAMS)}
+    doc = json.loads(path.read_text())
+    if doc.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(f"{path}: format_version {doc['format_version']} "
+                         f"is newer than supported ({FORMAT_VERSION})")
+    return doc
+
+
+def load_model_params(path=None) -> dict:
+    """
+    Return {D, r, s, theta, tau_hop}; keys missing from the file fall
+    back to DEFAULT_PARAMS.
+    """
+    params = dict(DEFAULT_PARAMS)
+    params.update(load_params_file(path)["params"])
+    return params
+
+
+def save_model_params(params: dict, path=None, source: str = "",
+                      ci: dict | None = None, extra: dict | None = None) -> dict:
+    """
+    Write a new version of the parameter file (version = previous + 1).
+    The write is atomic, so readers never see a half-written file.
+    """
+    path = params_path(path)
+    previous = load_params_file(path)
+    merged = dict(DEFAULT_PARAMS)
+    merged.update(previous["params"])
+    merged.update({k: float(v) for k, v in params.items()})
+
+    doc = {
+        "format_version": FORMAT_VERSION,
+        "version": int(previous.get("version", 0)) + 1,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": source,
+        "params": merged,
+    }
+    if ci:
+        doc["ci"] = ci
+    if extra:
+        doc["calibration"] = extra
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(doc, indent=2) + "\n")
+    os.replace(tmp, path)
+    return doc
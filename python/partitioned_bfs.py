@@ -0,0 +1,593 @@
+"""
+partitioned_bfs.py
+
+Partitioned multi-source BFS: the graph is split into P partitions, one
+worker (eventually one machine) per partition, and hops are
+bulk-synchronous rounds of local expansion plus boundary exchange.
+
+    partitions  vertex ranges balanced by edge count, or a multiplicative
+                hash of the node ID (save_partitions writes one directory
+                per partition: owned node IDs, local indptr, global
+                successor IDs)
+    each hop    a worker expands its local frontier, sorts and dedupes
+                the successors, keeps the ones it owns and sends every
+                peer the sorted array of IDs that peer owns
+    wire format sorted IDs as first value + deltas in the narrowest
+                unsigned dtype (uint8 .. uint64), behind a fixed header
+                carrying the hop and the sender's frontier size; a round
+                where every frontier is empty ends the run on all
+                workers without a coordinator
+
+Transports are pluggable (send / receive bytes between ranks):
+
+    QueueTransport   multiprocessing queues, one inbox per rank
+    SocketTransport  TCP full mesh, one reader thread per peer; works
+                     across machines given a host:port list
+
+Distances equal webgraph_bfs.multi_source_bfs. Every run reports IDs,
+messages and bytes exchanged per hop.
+
+Usage:
+    python partitioned_bfs.py run --synthetic 1000000 --parts 4 --scheme hash --transport socket
+    python partitioned_bfs.py partition --graph ../output/uk_graph --parts 8 --out ../output/uk_parts
+    python partitioned_bfs.py worker --parts-dir ../output/uk_parts --rank 3 \\
+        --hosts box0:7000,box1:7000,... --seed-file seeds.txt --out dist_3.npy
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from webgraph_bfs import MAX_HOPS, UNREACHED
+from webgraph_csr import gather_segments
+
+SCHEMES = ("range", "hash")
+PART_CHUNK = 4_000_000       # owned nodes gathered per write when partitioning
+_HEADER = struct.Struct("<iiqqqB")   # hop, sender, active, count, first, width
+_FRAME = struct.Struct("<Q")
+_WIDTHS = (np.uint8, np.uint16, np.uint32, np.uint64)
+_HASH = np.uint64(0x9E3779B97F4A7C15)
+POLL_SECONDS = 1.0           # how often the parent checks for dead workers
+
+
+# --------------------------
+# Partitioning
+# --------------------------
+
+class Partitioner:
+    """
+    Node -> partition map: contiguous ID ranges (`bounds`) or a
+    multiplicative hash modulo `parts`.
+    """
+
+    def __init__(self, scheme: str, parts: int, bounds=None):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown partition scheme {scheme!r}")
+        self.scheme = scheme
+        self.parts = parts
+        self.bounds = None if bounds is None else np.asarray(bounds, dtype=np.int64)
+
+    @classmethod
+    def for_graph(cls, indptr, scheme: str, parts: int) -> "Partitioner":
+        """
+        Range bounds balance edges (ties broken towards equal node counts).
+        """
+        if scheme == "hash":
+            return cls(scheme, parts)
+        n = len(indptr) - 1
+        by_edges = np.searchsorted(indptr, np.linspace(0, int(indptr[-1]), parts + 1))
+        by_nodes = np.linspace(0, n, parts + 1)
+        bounds = np.round((by_edges + by_nodes) / 2).astype(np.int64)
+        bounds[0], bounds[-1] = 0, n
+        return cls(scheme, parts, np.maximum.accumulate(bounds))
+
+    def owner(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.scheme == "range":
+            return np.searchsorted(self.bounds, ids, side="right") - 1
+        with np.errstate(over="ignore"):
+            mixed = ids.astype(np.uint64) * _HASH
+        return ((mixed >> np.uint64(32)) % np.uint64(self.parts)).astype(np.int64)
+
+    def owned(self, rank: int, n: int) -> np.ndarray:
+        if self.scheme == "range":
+            return np.arange(self.bounds[rank], self.bounds[rank + 1], dtype=np.int64)
+        ids = np.arange(n, dtype=np.int64)
+        return ids[self.owner(ids) == rank]
+
+    def to_dict(self) -> dict:
+        return {"scheme": self.scheme, "parts": self.parts,
+                "bounds": None if self.bounds is None else self.bounds.tolist()}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Partitioner":
+        return cls(d["scheme"], d["parts"], d["bounds"])
+
+
+def save_partitions(graph, directory, scheme: str = "range", parts: int = 4) -> Path:
+    """
+    Write part_XXX/{nodes,indptr,indices}.npy plus partitions.json. Each
+    partition holds the rows of the nodes it owns (global target IDs).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    part = Partitioner.for_graph(graph.indptr, scheme, parts)
+    deg = graph.out_degree()
+    for rank in range(parts):
+        out = directory / f"part_{rank:03d}"
+        out.mkdir(exist_ok=True)
+        nodes = part.owned(rank, graph.n_nodes)
+        indptr = np.zeros(nodes.size + 1, dtype=np.int64)
+        np.cumsum(deg[nodes], out=indptr[1:])
+        indices = np.lib.format.open_memmap(out / "indices.npy", mode="w+",
+                                            dtype=graph.indices.dtype,
+                                            shape=(int(indptr[-1]),))
+        for lo in range(0, nodes.size, PART_CHUNK):
+            hi = min(lo + PART_CHUNK, nodes.size)
+            indices[indptr[lo]:indptr[hi]] = gather_segments(graph.indptr, graph.indices,
+                                                             nodes[lo:hi])
+        indices.flush()
+        del indices
+        np.save(out / "nodes.npy", nodes)
+        np.save(out / "indptr.npy", indptr)
+    meta = {"n_nodes": graph.n_nodes, "n_edges": graph.n_edges, **part.to_dict()}
+    (directory / "partitions.json").write_text(json.dumps(meta, indent=2))
+    return directory
+
+
+def load_partition(directory, rank: int):
+    """
+    (meta, Partitioner, nodes, indptr, indices) of one partition, mmapped.
+    """
+    directory = Path(directory)
+    meta = json.loads((directory / "partitions.json").read_text())
+    part_dir = directory / f"part_{rank:03d}"
+    arrays = [np.load(part_dir / f"{name}.npy", mmap_mode="r")
+              for name in ("nodes", "indptr", "indices")]
+    return (meta, Partitioner.from_dict(meta), *arrays)
+
+
+# --------------------------
+# Wire format
+# --------------------------
+
+def encode_ids(hop: int, sender: int, active: int, ids: np.ndarray) -> bytes:
+    """
+    Header plus sorted unique IDs as deltas in the narrowest dtype.
+    """
+    if ids.size == 0:
+        return _HEADER.pack(hop, sender, active, 0, 0, 0)
+    deltas = np.diff(ids)
+    top = int(deltas.max()) if deltas.size else 0
+    width = next(w for w, dt in enumerate(_WIDTHS) if top <= np.iinfo(dt).max)
+    return (_HEADER.pack(hop, sender, active, ids.size, int(ids[0]), width)
+            + deltas.astype(_WIDTHS[width]).tobytes())
+
+
+def decode_ids(data: bytes) -> tuple[int, int, int, np.ndarray]:
+    """
+    (hop, sender, active, ids) from encode_ids output.
+    """
+    hop, sender, active, count, first, width = _HEADER.unpack_from(data)
+    if count == 0:
+        return hop, sender, active, np.empty(0, dtype=np.int64)
+    ids = np.empty(count, dtype=np.int64)
+    ids[0] = first
+    deltas = np.frombuffer(data, dtype=_WIDTHS[width], offset=_HEADER.size)
+    np.cumsum(deltas, out=ids[1:])
+    ids[1:] += first
+    return hop, sender, active, ids
+
+
+# --------------------------
+# Transports
+# --------------------------
+
+class Transport:
+    """
+    Point-to-point byte messages between `size` ranks. Subclasses
+    implement send() and _recv(); exchange() does one bulk-synchronous
+    round and holds back messages peers already sent for later hops.
+    """
+
+    def __init__(self, rank: int, size: int):
+        self.rank = rank
+        self.size = size
+        self._early: dict[int, list] = {}
+
+    def send(self, dst: int, data: bytes):
+        raise NotImplementedError
+
+    def _recv(self) -> bytes:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def exchange(self, hop: int, outgoing: dict) -> list:
+        """
+        Send outgoing[dst] to every other rank, then return the payloads
+        of all size - 1 peers for this hop.
+        """
+        for dst, data in outgoing.items():
+            self.send(dst, data)
+        got = self._early.pop(hop, [])
+        while len(got) < self.size - 1:
+            data = self._recv()
+            tag = struct.unpack_from("<i", data)[0]
+            if tag == hop:
+                got.append(data)
+            else:
+                self._early.setdefault(tag, []).append(data)
+        return got
+
+
+class QueueTransport(Transport):
+    """
+    One multiprocessing.Queue inbox per rank (single machine).
+    """
+
+    def __init__(self, rank: int, inboxes: list):
+        super().__init__(rank, len(inboxes))
+        self.inboxes = inboxes
+
+    def send(self, dst: int, data: bytes):
+        self.inboxes[dst].put(data)
+
+    def _recv(self) -> bytes:
+        return self.inboxes[self.rank].get()
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes | None:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            return None
+        got += k
+    return bytes(buf)
+
+
+class SocketTransport(Transport):
+    """
+    TCP full mesh: rank r listens on addresses[r]; each rank opens one
+    outgoing connection per peer and drains every incoming connection
+    in a reader thread, so large sends never deadlock.
+    """
+
+    def __init__(self, rank: int, addresses: list, listener: socket.socket | None = None,
+                 timeout: float = 60.0):
+        super().__init__(rank, len(addresses))
+        self._inbox: queue.Queue = queue.Queue()
+        if listener is None:
+            listener = socket.create_server(addresses[rank])
+        self._listener = listener
+        self._threads = []
+        acceptor = threading.Thread(target=self._accept, args=(self.size - 1,), daemon=True)
+        acceptor.start()
+
+        self._out = {}
+        deadline = time.monotonic() + timeout
+        for peer, addr in enumerate(addresses):
+            if peer == rank:
+                continue
+            while True:
+                try:
+                    sock = socket.create_connection(tuple(addr), timeout=timeout)
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.05)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._out[peer] = sock
+        acceptor.join(timeout)
+
+    def _accept(self, n: int):
+        for _ in range(n):
+            conn, _ = self._listener.accept()
+            t = threading.Thread(target=self._reader, args=(conn,), daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _reader(self, conn: socket.socket):
+        while True:
+            head = _recv_exact(conn, _FRAME.size)
+            if head is None:
+                break
+            self._inbox.put(_recv_exact(conn, _FRAME.unpack(head)[0]))
+        conn.close()
+
+    def send(self, dst: int, data: bytes):
+        self._out[dst].sendall(_FRAME.pack(len(data)) + data)
+
+    def _recv(self) -> bytes:
+        return self._inbox.get()
+
+    def close(self):
+        for sock in self._out.values():
+            sock.close()
+        self._listener.close()
+
+
+# --------------------------
+# Worker
+# --------------------------
+
+def partition_bfs(transport: Transport, part: Partitioner, nodes, indptr, indices,
+                  seeds, max_hops: int | None = None) -> tuple[np.ndarray, list]:
+    """
+    BFS over one partition, in lockstep with the peers on `transport`.
+    Returns the distances of the owned nodes and one stats dict per hop.
+    """
+    rank, size = transport.rank, transport.size
+    limit = MAX_HOPS if max_hops is None else min(max_hops, MAX_HOPS)
+    ranged = part.scheme == "range"
+    base = int(part.bounds[rank]) if ranged else 0
+
+    def local(ids):
+        return ids - base if ranged else np.searchsorted(nodes, ids)
+
+    dist = np.full(len(nodes), UNREACHED, dtype=np.uint8)
+    seeds = np.unique(np.asarray(seeds, dtype=np.int64))
+    frontier = local(seeds[part.owner(seeds) == rank])
+    dist[frontier] = 0
+    stats = []
+    hop = 0
+    while True:
+        t0 = time.perf_counter()
+        active = int(frontier.size) if hop < limit else 0
+        found = np.empty(0, dtype=np.int64)
+        if active:
+            found = np.unique(gather_segments(indptr, indices, frontier)).astype(np.int64)
+        owners = part.owner(found)
+        order = np.argsort(owners, kind="stable")          # keeps IDs sorted per owner
+        cuts = np.searchsorted(owners[order], np.arange(size + 1))
+        outgoing = {q: encode_ids(hop, rank, active, found[order[cuts[q]:cuts[q + 1]]])
+                    for q in range(size) if q != rank}
+        t1 = time.perf_counter()
+        incoming = [decode_ids(m) for m in transport.exchange(hop, outgoing)]
+        t2 = time.perf_counter()
+        total_active = active + sum(m[2] for m in incoming)
+        if total_active == 0:
+            break
+
+        mine = found[order[cuts[rank]:cuts[rank + 1]]]
+        cand = np.unique(np.concatenate([mine] + [m[3] for m in incoming]))
+        cand = local(cand)
+        new = cand[dist[cand] == UNREACHED]
+        hop += 1
+        dist[new] = hop
+        frontier = new
+        stats.append({
+            "hop": hop, "rank": rank, "frontier": active, "new_nodes": int(new.size),
+            "ids_sent": int(found.size - mine.size),
+            "ids_received": int(sum(m[3].size for m in incoming)),
+            "messages": len(outgoing),
+            "bytes_sent": sum(len(d) for d in outgoing.values()),
+            "expand_seconds": t1 - t0, "exchange_seconds": t2 - t1,
+            "apply_seconds": time.perf_counter() - t2,
+        })
+    transport.close()
+    return dist, stats
+
+
+def _worker(parts_dir, rank, seeds, max_hops, kind, channel, results):
+    _, part, nodes, indptr, indices = load_partition(parts_dir, rank)
+    if kind == "queue":
+        transport = QueueTransport(rank, channel)
+    else:
+        ready, tables = channel
+        listener = socket.create_server(("127.0.0.1", 0))
+        ready.put((rank, listener.getsockname()))
+        transport = SocketTransport(rank, tables[rank].get(), listener)
+    dist, stats = partition_bfs(transport, part, nodes, indptr, indices, seeds, max_hops)
+    results.put((rank, dist, stats))
+
+
+def summarize_hops(stats: list) -> list:
+    """
+    Per-hop totals over all ranks (frontier, new nodes, IDs, messages,
+    bytes, slowest rank's exchange wait).
+    """
+    hops = {}
+    for s in stats:
+        h = hops.setdefault(s["hop"], {"hop": s["hop"], "frontier": 0, "new_nodes": 0,
+                                       "ids_sent": 0, "messages": 0, "bytes_sent": 0,
+                                       "max_exchange_seconds": 0.0})
+        for key in ("frontier", "new_nodes", "ids_sent", "messages", "bytes_sent"):
+            h[key] += s[key]
+        h["max_exchange_seconds"] = max(h["max_exchange_seconds"], s["exchange_seconds"])
+    return [hops[h] for h in sorted(hops)]
+
+
+def _collect(q, procs: list, what: str):
+    """
+    q.get() from the workers, polling for ranks that died first (the
+    surviving ranks would block in exchange() forever): those terminate
+    every worker and raise RuntimeError with the exit codes.
+    """
+    while True:
+        try:
+            return q.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            dead = [(r, p.exitcode) for r, p in enumerate(procs)
+                    if p.exitcode is not None and p.exitcode != 0]
+            if not dead:
+                continue
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
+        codes = ", ".join(f"rank {r} exit code {c}" for r, c in dead)
+        raise RuntimeError(f"Partition worker died before sending its {what} ({codes})")
+
+
+def run_partitioned(parts_dir, seeds, max_hops: int | None = None,
+                    transport: str = "queue") -> tuple[np.ndarray, list]:
+    """
+    Run all partitions of parts_dir as local processes over the given
+    transport ("queue" or "socket"). Returns (global uint8 distances,
+    per-hop communication summary). Raises RuntimeError if a worker
+    dies (bad partition, OOM kill) instead of waiting for it.
+    """
+    meta = json.loads((Path(parts_dir) / "partitions.json").read_text())
+    size = meta["parts"]
+    ctx = mp.get_context()
+    results = ctx.Queue()
+    if transport == "queue":
+        channel = [ctx.Queue() for _ in range(size)]
+    elif transport == "socket":
+        channel = (ctx.Queue(), [ctx.Queue() for _ in range(size)])
+    else:
+        raise ValueError(f"Unknown transport {transport!r}")
+    seeds = np.asarray(seeds, dtype=np.int64)
+    procs = [ctx.Process(target=_worker, daemon=True,
+                         args=(str(parts_dir), r, seeds, max_hops, transport, channel, results))
+             for r in range(size)]
+    for p in procs:
+        p.start()
+    if transport == "socket":
+        ready, tables = channel
+        addresses = [None] * size
+        for _ in range(size):
+            r, addr = _collect(ready, procs, "address")
+            addresses[r] = addr
+        for q in tables:
+            q.put(addresses)
+
+    dist = np.full(meta["n_nodes"], UNREACHED, dtype=np.uint8)
+    stats = []
+    for _ in range(size):
+        rank, local_dist, local_stats = _collect(results, procs, "result")
+        _, part, nodes, _, _ = load_partition(parts_dir, rank)
+        dist[np.asarray(nodes)] = local_dist
+        stats += local_stats
+    for p in procs:
+        p.join()
+    return dist, summarize_hops(stats)
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def _print_summary(hops: list, seconds: float, n_nodes: int):
+    print(f"{'hop':>4}{'frontier':>14}{'new':>14}{'IDs sent':>14}{'msgs':>7}"
+          f"{'bytes':>14}{'B/ID':>7}{'wait (s)':>10}")
+    for h in hops:
+        per_id = h["bytes_sent"] / h["ids_sent"] if h["ids_sent"] else 0.0
+        print(f"{h['hop']:>4}{h['frontier']:>14,}{h['new_nodes']:>14,}{h['ids_sent']:>14,}"
+              f"{h['messages']:>7}{h['bytes_sent']:>14,}{per_id:>7.2f}"
+              f"{h['max_exchange_seconds']:>10.3f}")
+    total = sum(h["bytes_sent"] for h in hops)
+    print(f"  Total exchanged: {total / 2**20:,.1f} MB in {seconds:.2f}s "
+          f"({total / max(n_nodes, 1):.2f} B/node)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partitioned multi-source BFS")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_part = sub.add_parser("partition", help="split a graph into partition directories")
+    p_part.add_argument("--graph", required=True)
+    p_part.add_argument("--out", required=True)
+
+    p_run = sub.add_parser("run", help="run all partitions as local processes")
+    src = p_run.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", help="directory from save_csr")
+    src.add_argument("--synthetic", type=int, metavar="N_NODES")
+    src.add_argument("--parts-dir", help="directory from the partition command")
+    p_run.add_argument("--transport", choices=["queue", "socket"], default="queue")
+    p_run.add_argument("--seeds", type=int, default=1000)
+    p_run.add_argument("--compare", action="store_true",
+                       help="check against multi_source_bfs")
+
+    p_worker = sub.add_parser("worker", help="run one partition (multi-machine)")
+    p_worker.add_argument("--parts-dir", required=True)
+    p_worker.add_argument("--rank", type=int, required=True)
+    p_worker.add_argument("--hosts", required=True, help="host:port per rank, comma-separated")
+    p_worker.add_argument("--seed-file", required=True, help="one node ID per line")
+    p_worker.add_argument("--out", required=True, help="owned nodes' distances (.npy)")
+
+    for p in (p_part, p_run):
+        p.add_argument("--parts", type=int, default=4)
+        p.add_argument("--scheme", choices=SCHEMES, default="range")
+    for p in (p_run, p_worker):
+        p.add_argument("--max-hops", type=int, default=None)
+    p_run.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "partition":
+        from webgraph_csr import load_csr
+        out = save_partitions(load_csr(args.graph), args.out, args.scheme, args.parts)
+        print(f"✓ Saved: {out}")
+        return
+
+    if args.cmd == "worker":
+        _, part, nodes, indptr, indices = load_partition(args.parts_dir, args.rank)
+        hosts = [(h.rsplit(":", 1)[0], int(h.rsplit(":", 1)[1])) for h in args.hosts.split(",")]
+        seeds = np.loadtxt(args.seed_file, dtype=np.int64, comments="#", ndmin=1)
+        dist, stats = partition_bfs(SocketTransport(args.rank, hosts), part, nodes,
+                                    indptr, indices, seeds, args.max_hops)
+        np.save(args.out, dist)
+        Path(args.out).with_suffix(".json").write_text(json.dumps(stats, indent=1))
+        print(f"✓ Saved: {args.out}")
+        return
+
+    from webgraph_csr import load_csr, synthetic_webgraph
+    tmp = None
+    graph = None
+    if args.parts_dir:
+        parts_dir = args.parts_dir
+        n_nodes = json.loads((Path(parts_dir) / "partitions.json").read_text())["n_nodes"]
+    else:
+        graph = (synthetic_webgraph(args.synthetic, seed=args.seed) if args.synthetic
+                 else load_csr(args.graph))
+        tmp = tempfile.mkdtemp(prefix="seedsites_parts_")
+        parts_dir = save_partitions(graph, tmp, args.scheme, args.parts)
+        n_nodes = graph.n_nodes
+    try:
+        rng = np.random.default_rng(args.seed)
+        seeds = rng.choice(n_nodes, size=min(args.seeds, n_nodes), replace=False)
+        t0 = time.perf_counter()
+        try:
+            dist, hops = run_partitioned(parts_dir, seeds, args.max_hops, args.transport)
+        except RuntimeError as exc:
+            raise SystemExit(str(exc))
+        seconds = time.perf_counter() - t0
+
+        meta = json.loads((Path(parts_dir) / "partitions.json").read_text())
+        print("=" * 80)
+        print(f"PARTITIONED BFS: {n_nodes:,} nodes, {meta['parts']} {meta['scheme']} "
+              f"partitions, {args.transport} transport, {len(seeds):,} seeds")
+        print("=" * 80)
+        _print_summary(hops, seconds, n_nodes)
+        if args.compare:
+            from webgraph_bfs import multi_source_bfs
+            if graph is None:
+                raise SystemExit("--compare needs --graph or --synthetic")
+            same = np.array_equal(multi_source_bfs(graph, seeds, args.max_hops), dist)
+            print(f"  Single-node engine: {'identical' if same else 'DIFFERENT'} distances")
+            if not same:
+                raise SystemExit(1)
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+quantile_sketch.py
+
+Mergeable streaming quantile sketch (KLL: Karnin, Lang & Liberty,
+"Optimal Quantile Approximation in Streams", FOCS 2016) for TTFI and
+discovery-time distributions that are too large to keep per node or to
+concatenate across sweep workers.
+
+The sketch is a stack of compactors; items in level h carry weight 2^h.
+When a level exceeds its capacity (k at the top level, shrinking by
+c = 2/3 per level below) it is sorted and every other item, starting at
+a random offset, is promoted to the next level. Each worker fills its
+own sketch with vectorised bulk updates and the results are merged
+level by level. Space is O(k log(n / k)); a single quantile query has
+normalised rank error about 2.3 / k^0.97 (99% confidence; ~1.3% at
+k = 200, the bound Apache DataSketches uses for its KLL).
+
+Weighted updates add each item to the levels of the set bits of its
+(integer) weight, so a 256-bin hop histogram goes in as at most a few
+thousand items rather than one per node.
+
+Usage:
+    python quantile_sketch.py merge run_a.json run_b.json --quantiles 0.5 0.95 0.99
+"""
+
+import argparse
+import base64
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+K_DEFAULT = 200
+SHRINK = 2.0 / 3.0
+MIN_CAPACITY = 8
+_HEADER = struct.Struct("<4sHHqdd")      # magic, k, levels, n, min, max
+_MAGIC = b"KLL1"
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch over float64 values.
+    """
+
+    def __init__(self, k: int = K_DEFAULT, seed: int | None = None):
+        if k < MIN_CAPACITY:
+            raise ValueError(f"k must be >= {MIN_CAPACITY}, got {k}")
+        self.k = k
+        self.n = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    # ---- size ----
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self._levels) - 1 - h
+        return max(MIN_CAPACITY, int(np.ceil(self.k * SHRINK ** depth)))
+
+    @property
+    def retained(self) -> int:
+        return sum(level.size for level in self._levels)
+
+    @property
+    def nbytes(self) -> int:
+        return _HEADER.size + 4 * len(self._levels) + 8 * self.retained
+
+    def rank_error(self) -> float:
+        """
+        Normalised rank error of a single quantile query (99% confidence).
+        """
+        return 2.296 / self.k ** 0.9723
+
+    # ---- updates ----
+
+    def update(self, values, weights=None):
+        """
+        Add values (any array-like). Optional non-negative integer weights
+        count each value that many times.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if weights is None:
+            if values.size == 0:
+                return self
+            self._add(0, values)
+            self.n += values.size
+            lo, hi = values.min(), values.max()
+        else:
+            weights = np.asarray(weights, dtype=np.int64).ravel()
+            if (weights < 0).any():
+                raise ValueError("Weights must be non-negative")
+            values, weights = values[weights > 0], weights[weights > 0]
+            if values.size == 0:
+                return self
+            for h in range(int(weights.max()).bit_length()):
+                self._add(h, values[(weights >> h) & 1 == 1])
+            self.n += int(weights.sum())
+            lo, hi = values.min(), values.max()
+        self.min, self.max = min(self.min, lo), max(self.max, hi)
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch"):
+        """
+        Fold another sketch into this one (in place).
+        """
+        for h, level in enumerate(other._levels):
+            self._add(h, level)
+        self.n += other.n
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _add(self, h: int, values: np.ndarray):
+        while len(self._levels) <= h:
+            self._levels.append(np.empty(0))
+        if values.size:
+            self._levels[h] = np.concatenate([self._levels[h], values])
+
+    def _compress(self):
+        h = 0
+        while h < len(self._levels):
+            level = self._levels[h]
+            if level.size > self._capacity(h):
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                level = np.sort(level)
+                keep = level[:level.size % 2]       # odd item stays behind
+                offset = int(self._rng.integers(2))
+                self._levels[h] = keep
+                self._add(h + 1, level[keep.size + offset::2])
+            h += 1
+
+    # ---- queries ----
+
+    def _weighted(self):
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(level.size, 1 << h, dtype=np.int64)
+                                  for h, level in enumerate(self._levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """
+        Value at normalised rank q (scalar or array), within about
+        rank_error() in rank. NaN for an empty sketch.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.n == 0:
+            return np.full(q.shape, np.nan) if q.ndim else float("nan")
+        values, cum = self._weighted()
+        idx = np.searchsorted(cum, q * cum[-1], side="left")
+        out = values[np.minimum(idx, values.size - 1)]
+        out = np.where(q <= 0.0, self.min, np.where(q >= 1.0, self.max, out))
+        return out if q.ndim else float(out)
+
+    def quantile_bounds(self, q):
+        """
+        (lower, upper) values bracketing the q-quantile at the
+        rank_error() confidence level.
+        """
+        eps = self.rank_error()
+        q = np.asarray(q, dtype=np.float64)
+        return (self.quantile(np.clip(q - eps, 0.0, 1.0)),
+                self.quantile(np.clip(q + eps, 0.0, 1.0)))
+
+    def rank(self, x):
+        """
+        Approximate fraction of values <= x.
+        """
+        if self.n == 0:
+            return float("nan")
+        values, cum = self._weighted()
+        idx = np.searchsorted(values, np.asarray(x, dtype=np.float64), side="right")
+        out = np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0) / cum[-1]
+        return out if np.ndim(x) else float(out)
+
+    # ---- serialisation ----
+
+    def to_bytes(self) -> bytes:
+        """
+        Header, per-level sizes (uint32) and retained values (float64).
+        """
+        sizes = np.array([level.size for level in self._levels], dtype="<u4")
+        header = _HEADER.pack(_MAGIC, self.k, len(self._levels), self.n,
+                              self.min, self.max)
+        return header + sizes.tobytes() + np.concatenate(self._levels).astype("<f8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, seed: int | None = None) -> "KLLSketch":
+        magic, k, n_levels, n, lo, hi = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a KLL sketch")
+        sketch = cls(k, seed)
+        sketch.n, sketch.min, sketch.max = n, lo, hi
+        sizes = np.frombuffer(data, dtype="<u4", count=n_levels, offset=_HEADER.size)
+        values = np.frombuffer(data, dtype="<f8", offset=_HEADER.size + 4 * n_levels)
+        bounds = np.r_[0, np.cumsum(sizes)]
+        sketch._levels = [values[a:b].copy() for a, b in zip(bounds[:-1], bounds[1:])]
+        return sketch
+
+    def to_dict(self) -> dict:
+        """
+        JSON-friendly form (base64 of to_bytes) for result files.
+        """
+        return {"type": "kll", "k": self.k, "n": self.n,
+                "data": base64.b64encode(self.to_bytes()).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, d: dict, seed: int | None = None) -> "KLLSketch":
+        return cls.from_bytes(base64.b64decode(d["data"]), seed)
+
+    def __repr__(self):
+        return (f"KLLSketch(k={self.k}, n={self.n:,}, retained={self.retained:,}, "
+                f"levels={len(self._levels)})")
+
+
+def merge_all(sketches) -> KLLSketch:
+    """
+    Merge an iterable of sketches into a new one.
+    """
+    sketches = list(sketches)
+    out = KLLSketch(max(s.k for s in sketches))
+    for s in sketches:
+        out.merge(s)
+    return out
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def _load_sketches(path) -> dict:
+    """
+    {name: sketch} from a JSON file holding one sketch dict or a mapping
+    of names to sketch dicts.
+    """
+    d = json.loads(Path(path).read_text())
+    if d.get("type") == "kll":
+        return {Path(path).stem: KLLSketch.from_dict(d)}
+    return {name: KLLSketch.from_dict(v) for name, v in d.items()
+            if isinstance(v, dict) and v.get("type") == "kll"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KLL quantile sketch tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("merge", help="merge sketch files (matching names) and query")
+    m.add_argument("files", nargs="+")
+    m.add_argument("--quantiles", type=float, nargs="+", default=[0.5, 0.95, 0.99])
+    m.add_argument("--out", help="write the merged sketches as JSON")
+    args = parser.parse_args(argv)
+
+    merged = {}
+    for path in args.files:
+        for name, sketch in _load_sketches(path).items():
+            merged.setdefault(name, []).append(sketch)
+    merged = {name: merge_all(s) for name, s in merged.items()}
+
+    header = "".join(f"{f'p{q * 100:g}':>14}" for q in args.quantiles)
+    print(f"{'sketch':<20}{'n':>14}{header}")
+    for name, sketch in merged.items():
+        print(f"{name:<20}{sketch.n:>14,}"
+              + "".join(f"{v:>14.4g}" for v in sketch.quantile(args.quantiles)))
+    print(f"(rank error ±{max(s.rank_error() for s in merged.values()):.2%})")
+    if args.out:
+        Path(args.out).write_text(json.dumps({name: s.to_dict() for name, s in merged.items()}))
+        print(f"✓ Saved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
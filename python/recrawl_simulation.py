@@ -0,0 +1,425 @@
+"""
+recrawl_simulation.py
+
+Freshness side of TTFI. estimate_ttfi and the BFS engines assume a seed
+already links to the new domain when the crawl runs; in practice the
+link appears on some page at some time and is only seen when that page
+is next re-crawled. This module simulates that:
+
+    - every page u gets a change rate lambda_u (new outlinks per day,
+      lognormal, scaled by out-degree) and new links appear on it as a
+      Poisson process of that rate
+    - a new domain is born at a uniform time in [0, horizon) and
+      collects 1 + Poisson(inlinks - 1) inlinks; the first appears at
+      birth, the rest after Exponential(link_spread) days, each on a
+      page drawn in proportion to lambda_u (the superposition of the
+      per-page processes)
+    - the crawler re-visits the pages within `hops - 1` of the seeds
+      periodically (random phase) at a rate set by a revisit policy:
+
+          fixed     one interval for seeds, one for other pages
+          adaptive  visits_per_change * lambda_u, clipped to
+                    [min_interval, max_interval]
+          budget    a total of `budget` visits/day split in proportion
+                    to sqrt(lambda_u) -- the allocation that minimises
+                    the mean delay before a new link is seen
+
+      With a budget, fixed and adaptive rates are rescaled to spend it.
+    - TTFI = first visit of a linking page after its link appeared,
+      minus birth, plus tau_hop for the fetch. Domains not found before
+      the end of the horizon count as missed.
+
+All events of a batch of domains are generated and resolved with array
+operations (no event loop), so millions of pages and millions of new
+domains over weeks of simulated time take seconds to minutes. The sweep
+command trades seed count against recrawl budget.
+
+Usage:
+    python recrawl_simulation.py run --synthetic 1000000 --seeds 1000 --policy budget --budget 200000
+    python recrawl_simulation.py sweep --synthetic 1000000 --seeds 100 1000 10000 \\
+        --budgets 50000 200000 1000000
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from checkpoint import (CheckpointStore, Checkpointer, rng_from_state, rng_state,
+                        seed_fingerprint)
+from model_params import load_model_params
+from quantile_sketch import KLLSketch
+from webgraph_bfs import UNREACHED, multi_source_bfs
+from webgraph_simulation import estimate_ttfi
+
+POLICIES = ("fixed", "adaptive", "budget")
+
+HORIZON_DAYS = 28.0
+LINK_RATE = 0.05          # mean new outlinks per page per day
+RATE_SIGMA = 1.0          # lognormal spread of page change rates
+INLINKS = 3.0             # mean inlinks a new domain collects
+LINK_SPREAD_DAYS = 7.0    # mean lag of the later inlinks after birth
+SEED_INTERVAL = 1.0       # days, fixed policy
+PAGE_INTERVAL = 7.0       # days, fixed policy
+MIN_INTERVAL = 1.0 / 24   # days, fastest any page is re-visited
+MAX_INTERVAL = 90.0       # days, slowest re-visit under adaptive
+VISITS_PER_CHANGE = 1.0   # adaptive policy
+HOPS = 2                  # new domains up to this hop from the seeds
+BATCH = 1_000_000         # new domains resolved per batch
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+SECONDS_PER_DAY = 86400.0
+
+
+# --------------------------
+# Pages and policies
+# --------------------------
+
+def change_rates(out_deg: np.ndarray, link_rate: float = LINK_RATE,
+                 sigma: float = RATE_SIGMA, seed: int = 42) -> np.ndarray:
+    """
+    Per-page new-link rate (links/day): lognormal noise times
+    (out_degree + 1), normalised to mean link_rate.
+    """
+    rng = np.random.default_rng(seed)
+    rate = (out_deg + 1.0) * rng.lognormal(-sigma ** 2 / 2.0, sigma, out_deg.size)
+    rate *= link_rate / rate.mean()
+    return rate
+
+
+def crawl_set(graph, seeds, hops: int = HOPS) -> np.ndarray:
+    """
+    uint8 distances to the seeds, UNREACHED beyond hops - 1: the pages
+    whose re-visits can reveal a new domain within `hops` hops.
+    """
+    if hops < 1:
+        raise ValueError(f"hops must be >= 1, got {hops}")
+    return multi_source_bfs(graph, seeds, max_hops=hops - 1)
+
+
+def _spend(weight: np.ndarray, budget: float, max_rate: float) -> np.ndarray:
+    """
+    Rates proportional to weight summing to budget, with no rate above
+    max_rate (the excess is re-spread over the remaining pages).
+    """
+    rate = np.zeros_like(weight)
+    free = weight > 0
+    left = float(budget)
+    while left > 0 and free.any():
+        share = weight[free] * (left / weight[free].sum())
+        capped = share >= max_rate
+        if not capped.any():
+            rate[free] = share
+            break
+        idx = np.flatnonzero(free)[capped]
+        rate[idx] = max_rate
+        free[idx] = False
+        left = budget - rate.sum()
+    return rate
+
+
+def visit_rates(policy: str, dist: np.ndarray, lam: np.ndarray,
+                budget: float | None = None,
+                seed_interval: float = SEED_INTERVAL,
+                page_interval: float = PAGE_INTERVAL,
+                visits_per_change: float = VISITS_PER_CHANGE,
+                min_interval: float = MIN_INTERVAL,
+                max_interval: float = MAX_INTERVAL) -> np.ndarray:
+    """
+    Re-visit rate (visits/day) of every page under `policy`; 0 for
+    pages outside the crawl set (dist == UNREACHED).
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"unknown policy {policy!r}, expected one of {POLICIES}")
+    crawled = dist != UNREACHED
+    seeds = dist == 0
+    max_rate = 1.0 / min_interval
+    if policy == "budget":
+        if not budget:
+            raise ValueError("the budget policy needs a budget (visits/day)")
+        return _spend(np.where(crawled, np.sqrt(lam), 0.0), budget, max_rate)
+
+    if policy == "fixed":
+        weight = np.where(seeds, 1.0 / seed_interval,
+                          np.where(crawled, 1.0 / page_interval, 0.0))
+    else:
+        weight = np.where(crawled, np.clip(visits_per_change * lam,
+                                           1.0 / max_interval, max_rate), 0.0)
+    if budget:
+        return _spend(weight, budget, max_rate)
+    return np.minimum(weight, max_rate)
+
+
+# --------------------------
+# Event generation
+# --------------------------
+
+def simulate_batch(rng, n_domains: int, link_cdf: np.ndarray, period: np.ndarray,
+                   phase: np.ndarray, horizon: float = HORIZON_DAYS,
+                   inlinks: float = INLINKS, link_spread: float = LINK_SPREAD_DAYS,
+                   tau_hop: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Births and TTFIs (days, inf if missed) of n_domains new domains.
+
+    link_cdf is the cumulative page change rate; period / phase the
+    re-visit schedule (period inf for pages never visited).
+    """
+    born = rng.random(n_domains) * horizon
+    n_links = 1 + rng.poisson(max(inlinks - 1.0, 0.0), n_domains)
+    starts = np.zeros(n_domains, dtype=np.int64)
+    np.cumsum(n_links[:-1], out=starts[1:])
+    total = int(n_links.sum())
+
+    lag = rng.exponential(link_spread, total)
+    lag[starts] = 0.0
+    t_link = np.repeat(born, n_links) + lag
+    page = np.searchsorted(link_cdf, rng.random(total) * link_cdf[-1], side="right")
+    page = np.minimum(page, link_cdf.size - 1)
+
+    p = period[page]
+    seen = np.isfinite(p)
+    t_seen = np.full(total, np.inf)
+    t_seen[seen] = t_link[seen] + np.mod(phase[page[seen]] - t_link[seen], p[seen])
+    first = np.minimum.reduceat(t_seen, starts)
+
+    ttfi = first - born + tau_hop / SECONDS_PER_DAY
+    ttfi[first > horizon] = np.inf
+    return born, ttfi
+
+
+def simulate(dist: np.ndarray, lam: np.ndarray, rate: np.ndarray,
+             n_domains: int, horizon: float = HORIZON_DAYS,
+             inlinks: float = INLINKS, link_spread: float = LINK_SPREAD_DAYS,
+             tau_hop: float | None = None, batch: int = BATCH,
+             seed: int = 42, checkpoint=None) -> dict:
+    """
+    TTFI distribution of n_domains new domains under re-visit rates
+    `rate`. Quantiles come from a KLLSketch merged over batches.
+
+    With a checkpoint.Checkpointer, the counters, the sketch and both
+    RNG states are saved after each batch; a resumed run continues with
+    the next batch and returns the same result.
+    """
+    if tau_hop is None:
+        tau_hop = load_model_params()["tau_hop"]
+    rng = np.random.default_rng(seed)
+    with np.errstate(divide="ignore"):
+        period = np.where(rate > 0, 1.0 / rate, np.inf)
+    phase = rng.random(rate.size) * np.where(rate > 0, period, 0.0)
+    link_cdf = np.cumsum(lam)
+
+    sketch = KLLSketch(seed=seed)
+    found, total_ttfi = 0, 0.0
+    within = {1.0: 0, 7.0: 0}
+    start = 0
+    if checkpoint is not None:
+        saved = checkpoint.restore(seed_fingerprint(
+            rate.size, np.flatnonzero(dist == 0), engine="recrawl", n_domains=n_domains,
+            horizon=horizon, inlinks=inlinks, link_spread=link_spread, tau_hop=tau_hop,
+            batch=batch, seed=seed, visits_per_day=float(rate.sum())))
+        if saved is not None:
+            arrays, state = saved
+            start, found, total_ttfi = state["done"], state["found"], state["total_ttfi"]
+            within = {float(days): count for days, count in state["within"]}
+            rng = rng_from_state(state["rng"])
+            sketch = KLLSketch.from_bytes(np.asarray(arrays["sketch"]).tobytes())
+            sketch._rng = rng_from_state(state["sketch_rng"])
+
+    for lo in range(start, n_domains, batch):
+        size = min(batch, n_domains - lo)
+        _, ttfi = simulate_batch(rng, size, link_cdf, period, phase,
+                                 horizon, inlinks, link_spread, tau_hop)
+        hit = ttfi[np.isfinite(ttfi)]
+        sketch.update(hit)
+        found += hit.size
+        total_ttfi += float(hit.sum())
+        for days in within:
+            within[days] += int((hit <= days).sum())
+        if checkpoint is not None:
+            checkpoint.maybe_save(lo // batch + 1,
+                                  {"sketch": np.frombuffer(sketch.to_bytes(), dtype=np.uint8)},
+                                  {"done": lo + size, "found": found, "total_ttfi": total_ttfi,
+                                   "within": list(within.items()), "rng": rng_state(rng),
+                                   "sketch_rng": rng_state(sketch._rng)})
+
+    crawled = rate > 0
+    flow = float(lam[crawled].sum())
+    out = {
+        "n_domains": n_domains,
+        "horizon_days": horizon,
+        "crawl_pages": int(crawled.sum()),
+        "seeds": int((dist == 0).sum()),
+        "visits_per_day": float(rate.sum()),
+        "link_flow_covered": flow / float(lam.sum()),
+        "mean_visit_delay_days": (float((lam[crawled] / (2.0 * rate[crawled])).sum()) / flow
+                                  if flow else float("inf")),
+        "found_frac": found / float(n_domains),
+        "within_1d": within[1.0] / float(n_domains),
+        "within_7d": within[7.0] / float(n_domains),
+        "mean_ttfi_days": total_ttfi / found if found else float("inf"),
+    }
+    for q in QUANTILES:
+        out[f"p{round(q * 100)}_days"] = float(sketch.quantile(q)) if found else float("inf")
+    out["sketch"] = sketch
+    return out
+
+
+# --------------------------
+# Seed count vs budget
+# --------------------------
+
+def pick_seeds(graph, count: int, strategy: str = "random", seed: int = 42) -> np.ndarray:
+    """
+    `count` seed IDs: uniformly at random, or the highest out-degree
+    pages (hubs that list many domains).
+    """
+    if strategy == "random":
+        return np.random.default_rng(seed).choice(graph.n_nodes, size=count, replace=False)
+    if strategy == "outdegree":
+        return np.argsort(-graph.out_degree(), kind="stable")[:count]
+    raise ValueError(f"unknown seed strategy {strategy!r}")
+
+
+def sweep(graph, seed_counts, budgets, policy: str = "budget", hops: int = HOPS,
+          n_domains: int = BATCH, strategy: str = "random", seed: int = 42,
+          verbose: bool = True, **kwargs) -> pd.DataFrame:
+    """
+    One simulate() per (seed count, budget) on shared change rates and
+    the same new domains (same rng seed), as a DataFrame.
+    """
+    lam = change_rates(graph.out_degree(), seed=seed)
+    rows = []
+    for count in seed_counts:
+        dist = crawl_set(graph, pick_seeds(graph, count, strategy, seed), hops)
+        for budget in budgets:
+            rate = visit_rates(policy, dist, lam, budget)
+            res = simulate(dist, lam, rate, n_domains, seed=seed, **kwargs)
+            res.pop("sketch")
+            rows.append({"policy": policy, "budget": budget, **res})
+            if verbose:
+                print(f"  {count:>8,} seeds  {budget:>12,.0f} visits/day  "
+                      f"found {res['found_frac']:6.1%}  p50 {res['p50_days']:6.2f}d  "
+                      f"p95 {res['p95_days']:6.2f}d")
+    return pd.DataFrame(rows)
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def _load(args):
+    if args.graph:
+        from webgraph_compressed import load_graph
+        return load_graph(args.graph, mmap=True)
+    from webgraph_csr import synthetic_webgraph
+    return synthetic_webgraph(args.synthetic, seed=args.seed)
+
+
+def _fmt_days(days: float) -> str:
+    if not np.isfinite(days):
+        return "never"
+    return f"{days * 24:.1f}h" if days < 2 else f"{days:.1f}d"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recrawl / freshness TTFI simulation")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        src = p.add_mutually_exclusive_group(required=True)
+        src.add_argument("--graph", help="directory from save_csr / save_compressed")
+        src.add_argument("--synthetic", type=int, metavar="N_NODES")
+        p.add_argument("--policy", choices=POLICIES, default="budget")
+        p.add_argument("--hops", type=int, default=HOPS)
+        p.add_argument("--domains", type=int, default=BATCH, help="new domains to simulate")
+        p.add_argument("--horizon", type=float, default=HORIZON_DAYS, help="days")
+        p.add_argument("--inlinks", type=float, default=INLINKS)
+        p.add_argument("--link-spread", type=float, default=LINK_SPREAD_DAYS, help="days")
+        p.add_argument("--seed-strategy", choices=("random", "outdegree"), default="random")
+        p.add_argument("--seed", type=int, default=42)
+
+    run = sub.add_parser("run", help="TTFI distribution for one seed set and policy")
+    common(run)
+    run.add_argument("--seeds", type=int, required=True)
+    run.add_argument("--budget", type=float, default=None, help="visits/day")
+    run.add_argument("--seed-interval", type=float, default=SEED_INTERVAL, help="days")
+    run.add_argument("--page-interval", type=float, default=PAGE_INTERVAL, help="days")
+    run.add_argument("--visits-per-change", type=float, default=VISITS_PER_CHANGE)
+    run.add_argument("--out", default=None, help="JSON report")
+    run.add_argument("--checkpoint-dir", help="save progress here after each batch")
+    run.add_argument("--resume", action="store_true",
+                     help="continue from the checkpoint in --checkpoint-dir")
+
+    sw = sub.add_parser("sweep", help="grid of seed counts x recrawl budgets")
+    common(sw)
+    sw.add_argument("--seeds", type=int, nargs="+", required=True)
+    sw.add_argument("--budgets", type=float, nargs="+", required=True, help="visits/day")
+    sw.add_argument("--out", default="../output/recrawl_sweep.csv")
+
+    args = parser.parse_args(argv)
+    if args.command == "run" and args.policy == "budget" and args.budget is None:
+        parser.error("--policy budget needs --budget")
+    if args.command == "run" and args.resume and not args.checkpoint_dir:
+        parser.error("--resume needs --checkpoint-dir")
+    graph = _load(args)
+    sim = dict(horizon=args.horizon, inlinks=args.inlinks, link_spread=args.link_spread)
+    t0 = time.perf_counter()
+
+    if args.command == "sweep":
+        print("=" * 80)
+        print(f"RECRAWL SWEEP: {graph.n_nodes:,} pages, {args.domains:,} new domains, "
+              f"{args.policy} policy, {args.hops} hop(s)")
+        print("=" * 80)
+        df = sweep(graph, args.seeds, args.budgets, args.policy, args.hops, args.domains,
+                   args.seed_strategy, args.seed, **sim)
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(out, index=False)
+        print(f"  Time: {time.perf_counter() - t0:.1f}s")
+        print(f"✓ Saved: {out}")
+        return
+
+    lam = change_rates(graph.out_degree(), seed=args.seed)
+    dist = crawl_set(graph, pick_seeds(graph, args.seeds, args.seed_strategy, args.seed),
+                     args.hops)
+    rate = visit_rates(args.policy, dist, lam, args.budget, args.seed_interval,
+                       args.page_interval, args.visits_per_change)
+    checkpoint = None
+    if args.checkpoint_dir:
+        checkpoint = Checkpointer(CheckpointStore(args.checkpoint_dir), "recrawl",
+                                  resume=args.resume)
+    res = simulate(dist, lam, rate, args.domains, seed=args.seed, checkpoint=checkpoint, **sim)
+    seconds = time.perf_counter() - t0
+    sketch = res.pop("sketch")
+    tau_hop = load_model_params()["tau_hop"]
+    static = estimate_ttfi(graph.n_edges / graph.n_nodes, args.seeds, graph.n_nodes, tau_hop)
+
+    print("=" * 80)
+    print(f"RECRAWL SIMULATION: {graph.n_nodes:,} pages, {args.seeds:,} seeds, "
+          f"{args.policy} policy")
+    print("=" * 80)
+    print(f"  Crawl set:        {res['crawl_pages']:,} pages within {args.hops - 1} hop(s), "
+          f"{res['link_flow_covered']:.1%} of new links land there")
+    print(f"  Recrawl cost:     {res['visits_per_day']:,.0f} visits/day")
+    print(f"  Mean visit delay: {_fmt_days(res['mean_visit_delay_days'])} per new link")
+    print(f"  New domains:      {res['n_domains']:,} over {args.horizon:g} days "
+          f"in {seconds:.1f}s")
+    print(f"  Found:            {res['found_frac']:.1%} "
+          f"(within 1 day {res['within_1d']:.1%}, 7 days {res['within_7d']:.1%})")
+    print(f"  TTFI:             mean {_fmt_days(res['mean_ttfi_days'])}, "
+          + ", ".join(f"p{round(q * 100)} {_fmt_days(res[f'p{round(q * 100)}_days'])}"
+                      for q in QUANTILES))
+    print(f"  Static model:     {static:.1f}s (estimate_ttfi, no revisit delay)")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps({"policy": args.policy, "budget": args.budget, **res,
+                                   "ttfi_sketch": sketch.to_dict()}, indent=2))
+        print(f"✓ Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
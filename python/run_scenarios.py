@@ -3,109 +3,198 @@ run_scenarios.py
 
 Run multiple simulation scenarios for UK and SE with different seed counts
 and hop depths (2-hop vs 3-hop).
+
+With --graph UK=DIR, a country's cells are computed on its link graph
+instead; engine_planner picks the engine (compressed, out-of-core
+or sampling) that fits the memory budget, so country-scale
+graphs run without exhausting RAM.
 """
 
+import argparse
+import time
+
 import pandas as pd
+from checkpoint import CheckpointStore, Checkpointer
+from engine_planner import PRECISIONS, plan_query, run_query
+from model_params import load_model_params
 from webgraph_simulation import estimate_coverage, estimate_ttfi
+from traversal_metrics import (CompositeObserver, JsonLinesObserver,
+                               PrometheusTextfileObserver, new_run_id)
 
 # Configuration
 N_UK = 8_400_000
 N_SE = 1_500_000
 AVG_EDGES = 25
-DEDUP_R = 0.6
-DEDUP_S = 0.45
-OVERLAP_THETA = 0.3
-BASE_HOP_LATENCY = 3.0
+PARAMS = load_model_params()
+DEDUP_R = PARAMS["r"]
+DEDUP_S = PARAMS["s"]
+OVERLAP_THETA = PARAMS["theta"]
+BASE_HOP_LATENCY = PARAMS["tau_hop"]
 
 # Seed configurations
 seeds_UK = [100, 1_000, 5_000, 50_000]
 seeds_SE = [10, 100, 500, 1_000, 5_000]
 
-def run_all_scenarios():
-    """Run all UK and SE scenarios for 2-hop and 3-hop models."""
-    
-    results = []
-    
-    # UK scenarios
-    for num_seeds in seeds_UK:
-        # 2-hop
-        cov_2hop, disc_2hop = estimate_coverage(
-            N_UK, AVG_EDGES, num_seeds,
-            hops=2, r=DEDUP_R, s=DEDUP_S, theta=OVERLAP_THETA
-        )
-        ttfi_2hop = estimate_ttfi(
-            AVG_EDGES, num_seeds, N_UK, base_hop_latency=BASE_HOP_LATENCY
-        )
-        
-        # 3-hop
-        cov_3hop, disc_3hop = estimate_coverage(
-            N_UK, AVG_EDGES, num_seeds,
-            hops=3, r=DEDUP_R, s=DEDUP_S, theta=OVERLAP_THETA
-        )
-        ttfi_3hop = estimate_ttfi(
-            AVG_EDGES, num_seeds, N_UK, base_hop_latency=BASE_HOP_LATENCY
-        )
-        
-        results.append({
-            "Country": "UK",
-            "Seeds": num_seeds,
-            "Hops": 2,
-            "Coverage_%": round(cov_2hop * 100, 2),
-            "Discovered": int(disc_2hop),
-            "TTFI_s": round(ttfi_2hop, 2)
-        })
-        
-        results.append({
-            "Country": "UK",
-            "Seeds": num_seeds,
-            "Hops": 3,
-            "Coverage_%": round(cov_3hop * 100, 2),
-            "Discovered": int(disc_3hop),
-            "TTFI_s": round(ttfi_3hop, 2)
-        })
-    
-    # SE scenarios
-    for num_seeds in seeds_SE:
-        # 2-hop
-        cov_2hop, disc_2hop = estimate_coverage(
-            N_SE, AVG_EDGES, num_seeds,
-            hops=2, r=DEDUP_R, s=DEDUP_S, theta=OVERLAP_THETA
-        )
-        ttfi_2hop = estimate_ttfi(
-            AVG_EDGES, num_seeds, N_SE, base_hop_latency=BASE_HOP_LATENCY
-        )
-        
-        # 3-hop
-        cov_3hop, disc_3hop = estimate_coverage(
-            N_SE, AVG_EDGES, num_seeds,
-            hops=3, r=DEDUP_R, s=DEDUP_S, theta=OVERLAP_THETA
+def scenario_rows(country: str, n_total: int, num_seeds: int) -> list[dict]:
+    """
+    2-hop and 3-hop result rows for one (country, seed count) cell.
+    """
+    rows = []
+    for hops in (2, 3):
+        cov, disc = estimate_coverage(
+            n_total, AVG_EDGES, num_seeds,
+            hops=hops, r=DEDUP_R, s=DEDUP_S, theta=OVERLAP_THETA
         )
-        ttfi_3hop = estimate_ttfi(
-            AVG_EDGES, num_seeds, N_SE, base_hop_latency=BASE_HOP_LATENCY
+        ttfi = estimate_ttfi(
+            AVG_EDGES, num_seeds, n_total, base_hop_latency=BASE_HOP_LATENCY
         )
-        
-        results.append({
-            "Country": "SE",
-            "Seeds": num_seeds,
-            "Hops": 2,
-            "Coverage_%": round(cov_2hop * 100, 2),
-            "Discovered": int(disc_2hop),
-            "TTFI_s": round(ttfi_2hop, 2)
-        })
-        
-        results.append({
-            "Country": "SE",
+        rows.append({
+            "Country": country,
             "Seeds": num_seeds,
-            "Hops": 3,
-            "Coverage_%": round(cov_3hop * 100, 2),
-            "Discovered": int(disc_3hop),
-            "TTFI_s": round(ttfi_3hop, 2)
+            "Hops": hops,
+            "Coverage_%": round(cov * 100, 2),
+            "Discovered": int(disc),
+            "TTFI_s": round(ttfi, 2)
         })
-    
+    return rows
+
+
+def graph_scenario_rows(country: str, graph_dir, plan, num_seeds: int,
+                        seed: int = 42, observer=None) -> list[dict]:
+    """
+    2-hop and 3-hop rows for one cell, measured on a graph with the
+    engine chosen by engine_planner (one 3-hop query covers both).
+    The observer receives the exact engines' per-hop events.
+    """
+    result = run_query(plan, graph_dir, n_seeds=num_seeds, hops=3, seed=seed,
+                       observer=observer)
+    return [{
+        "Country": country,
+        "Seeds": num_seeds,
+        "Hops": hops,
+        "Coverage_%": round(result["coverage"][hops] * 100, 2),
+        "Discovered": result["discovered"][hops],
+        "TTFI_s": round(result["ttfi_mean_s"], 2),
+        "Engine": result["engine"],
+    } for hops in (2, 3)]
+
+
+def plan_graphs(graphs: dict, precision: str = "exact",
+                memory_budget: float | None = None) -> dict:
+    """engine_planner plan per country graph, sized for the largest seed count."""
+    seeds = {"UK": seeds_UK, "SE": seeds_SE}
+    return {country: plan_query(directory, max(seeds.get(country, [1])), 3,
+                                precision, memory_budget)
+            for country, directory in graphs.items()}
+
+
+def run_all_scenarios(observer=None, checkpoint=None, graphs=None, plans=None):
+    """
+    Run all UK and SE scenarios for 2-hop and 3-hop models.
+
+    graphs maps a country to a graph directory and plans to its
+    engine_planner.Plan (see plan_graphs); those countries are measured
+    on the graph and every row gains an Engine column.
+
+    If an observer (see traversal_metrics.py) is given, it receives the
+    wall time of each country block as a phase event, and in graph mode
+    the per-hop events of every BFS the engines run.
+
+    With a checkpoint.Checkpointer, the rows of every completed
+    (country, seeds) cell are saved after the cell; a resumed run skips
+    the cells already done and returns the same table.
+    """
+    countries = [("UK", N_UK, seeds_UK), ("SE", N_SE, seeds_SE)]
+    cells = [(country, n_total, num_seeds)
+             for country, n_total, seeds in countries for num_seeds in seeds]
+
+    results = []
+    done = set()
+    if checkpoint is not None:
+        saved = checkpoint.restore({"cells": [[c, n] for c, _, n in cells],
+                                    "params": PARAMS,
+                                    "graphs": {c: [str(d), plans[c].engine]
+                                               for c, d in (graphs or {}).items()}})
+        if saved is not None:
+            results = saved[1]["rows"]
+            done = {tuple(cell) for cell in saved[1]["done"]}
+
+    run_id = new_run_id("scenarios")
+    if observer is not None:
+        observer.on_run_start({"run_id": run_id, "engine": "scenarios",
+                               "n_scenarios": 2 * len(cells),
+                               "resumed_cells": len(done)})
+    t_start = t0 = time.perf_counter()
+
+    for i, (country, n_total, num_seeds) in enumerate(cells):
+        if (country, num_seeds) not in done:
+            if graphs and country in graphs:
+                results += graph_scenario_rows(country, graphs[country],
+                                               plans[country], num_seeds,
+                                               observer=observer)
+            elif graphs:
+                results += [{**row, "Engine": "analytical"}
+                            for row in scenario_rows(country, n_total, num_seeds)]
+            else:
+                results += scenario_rows(country, n_total, num_seeds)
+            done.add((country, num_seeds))
+            if checkpoint is not None:
+                checkpoint.maybe_save(len(done), {},
+                                      {"rows": results, "done": sorted(done)})
+
+        last_of_country = i + 1 == len(cells) or cells[i + 1][0] != country
+        if observer is not None and last_of_country:
+            observer.on_phase(run_id, "country", time.perf_counter() - t0,
+                              labels={"country": country})
+            t0 = time.perf_counter()
+
+    if observer is not None:
+        observer.on_run_end({"run_id": run_id, "engine": "scenarios",
+                             "seconds": time.perf_counter() - t_start})
+
     return pd.DataFrame(results)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run UK/SE coverage scenarios")
+    parser.add_argument("--metrics-jsonl", help="append run metrics as JSON lines")
+    parser.add_argument("--metrics-prom", help="write a Prometheus textfile")
+    parser.add_argument("--checkpoint-dir", help="save completed cells here after each one")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the checkpoint in --checkpoint-dir")
+    parser.add_argument("--graph", nargs="+", default=[], metavar="COUNTRY=DIR",
+                        help="measure a country on its graph, e.g. UK=../output/uk_graph")
+    parser.add_argument("--precision", choices=PRECISIONS, default="exact",
+                        help="least precise engine the planner may pick for --graph")
+    parser.add_argument("--memory-gb", type=float, default=None,
+                        help="memory budget for --graph (default: share of available)")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume needs --checkpoint-dir")
+    graphs = {}
+    for spec in args.graph:
+        country, sep, directory = spec.partition("=")
+        if not sep or country not in ("UK", "SE"):
+            parser.error(f"--graph expects UK=DIR or SE=DIR, got {spec!r}")
+        graphs[country] = directory
+    plans = {}
+    if graphs:
+        try:
+            plans = plan_graphs(graphs, args.precision,
+                                args.memory_gb * 2**30 if args.memory_gb else None)
+        except MemoryError as exc:
+            raise SystemExit(str(exc))
+    checkpoint = None
+    if args.checkpoint_dir:
+        checkpoint = Checkpointer(CheckpointStore(args.checkpoint_dir), "scenarios",
+                                  resume=args.resume)
+    observer = None
+    if args.metrics_jsonl or args.metrics_prom:
+        observer = CompositeObserver(
+            JsonLinesObserver(args.metrics_jsonl) if args.metrics_jsonl else None,
+            PrometheusTextfileObserver(args.metrics_prom) if args.metrics_prom else None,
+        )
+
     print("=" * 80)
     print("MULTI-SCENARIO SIMULATION: UK AND SE (2-HOP VS 3-HOP)")
     print("=" * 80)
@@ -121,11 +210,16 @@ if __name__ == "__main__":
     print()
     print(f"  UK Seeds:          {seeds_UK}")
     print(f"  SE Seeds:          {seeds_SE}")
+    for country, plan in plans.items():
+        print()
+        print(f"  {country} graph:          {graphs[country]} ({plan.n_nodes:,} nodes, "
+              f"{plan.n_edges:,} links)")
+        print(plan.report())
     print()
     print("-" * 80)
     
     # Run all scenarios
-    df = run_all_scenarios()
+    df = run_all_scenarios(observer, checkpoint, graphs, plans)
     
     # Display UK results
     print("\n🇬🇧 UK (.co.uk) RESULTS")
@@ -158,7 +252,8 @@ if __name__ == "__main__":
         print(f"  {num_seeds:>6,} seeds: {cov_2:6.2f}% → {cov_3:6.2f}% (+{boost:5.2f}%)")
     
     # Save to CSV
-    output_file = "../output/scenario_comparison.csv"
+    output_file = ("../output/scenario_comparison_graph.csv" if graphs
+                   else "../output/scenario_comparison.csv")
     df.to_csv(output_file, index=False)
     print(f"\n✓ Results saved to: {output_file}")
     
@@ -0,0 +1,388 @@
+"""
+seed_robustness.py
+
+How much of the planned coverage survives seed-list rot. Seeds go
+offline or block crawlers, other sites disappear, pages drop outlinks;
+this module samples many failure scenarios and reports the spread of
+coverage and TTFI across them:
+
+    - in every scenario each seed fails with probability seed_fail,
+      every other node with node_fail, every link with edge_fail
+    - scenarios are bit-parallel: bit s of word w is scenario 64 w + s,
+      so one traversal over (n, W) uint64 words runs 64 W scenarios
+    - each hop ORs the frontier's new bits into every successor over
+      the transposed graph (traversal_kernels.or_pull with numba; in
+      numpy only the links out of the frontier are gathered), ANDed
+      with per-link alive words when links fail and masked by the
+      per-node alive words
+    - the failure bits are not stored: a node's or link's alive word is
+      a counter-based hash of (ID, word index), turned into Bernoulli
+      bits by the binary expansion of the survival probability, so the
+      same scenario always sees the same failures
+
+Scenarios are processed BLOCK_WORDS words at a time; 1,000 scenarios
+are 16 words, so they cost about as many edge passes per hop as 16
+single BFS runs (fewer blocks when memory allows).
+
+Usage:
+    python seed_robustness.py --synthetic 1000000 --seeds 1000 --seed-fail 0.2 --edge-fail 0.05
+    python seed_robustness.py --graph ../output/uk_graph --seed-file seeds.txt --scenarios 1000 \\
+        --seed-fail 0.1 --node-fail 0.05 --compare
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from model_params import load_model_params
+from traversal_kernels import or_pull, resolve_backend
+from webgraph_bfs import MAX_HOPS, multi_source_bfs
+
+SCENARIOS = 1000
+BLOCK_WORDS = 4                # 256 scenarios per traversal
+BLOCK_EDGES = 8_000_000        # transposed edges gathered per pull block
+COUNT_ROWS = 1 << 16           # rows unpacked at once when counting bits
+PRECISION = 16                 # bits of the survival probabilities
+MAX_HOPS_DEFAULT = 3
+QUANTILES = (0.05, 0.5, 0.95)
+
+_NODE_SALT = np.uint64(0x243F6A8885A308D3)
+_EDGE_SALT = np.uint64(0x13198A2E03707344)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MASK64 = (1 << 64) - 1
+
+
+# --------------------------
+# Counter-based failure bits
+# --------------------------
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser, element-wise on uint64."""
+    x = x + _GOLDEN
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def bernoulli_words(keys: np.ndarray, p: float, precision: int = PRECISION) -> np.ndarray:
+    """
+    One uint64 per key whose bits are independently 1 with probability
+    p (rounded to `precision` binary digits), a pure function of the
+    key. Digits of p are applied least significant first: x = x | r for
+    a 1 digit, x & r for a 0 digit, with a fresh hash word r each.
+    """
+    keys = np.asarray(keys, dtype=np.uint64)
+    m = int(round(min(max(p, 0.0), 1.0) * (1 << precision)))
+    if m == 0:
+        return np.zeros(keys.shape, dtype=np.uint64)
+    if m == 1 << precision:
+        return np.full(keys.shape, ~np.uint64(0), dtype=np.uint64)
+    base = _mix(keys)
+    x = np.zeros(keys.shape, dtype=np.uint64)
+    low = (m & -m).bit_length() - 1          # trailing zero digits leave x at 0
+    for j in range(low, precision):
+        r = _mix(base + np.uint64((j + 1) * int(_GOLDEN) & _MASK64))
+        x = (x | r) if (m >> j) & 1 else (x & r)
+    return x
+
+
+def node_alive(nodes: np.ndarray, words: np.ndarray, n_words: int, p: float,
+               salt: np.uint64 = _NODE_SALT) -> np.ndarray:
+    """(len(nodes), len(words)) alive words of the given nodes."""
+    keys = nodes.astype(np.uint64)[:, None] * np.uint64(n_words) + words.astype(np.uint64)
+    return bernoulli_words(keys ^ salt, p)
+
+
+def edge_alive(src: np.ndarray, dst: np.ndarray, n: int, words: np.ndarray,
+               n_words: int, p: float) -> np.ndarray:
+    """(len(src), len(words)) alive words of the links src -> dst."""
+    link = src.astype(np.uint64) * np.uint64(n) + dst.astype(np.uint64)
+    keys = link[:, None] * np.uint64(n_words) + words.astype(np.uint64)
+    return bernoulli_words(keys ^ _EDGE_SALT, p)
+
+
+# --------------------------
+# Bit-parallel traversal
+# --------------------------
+
+def _row_blocks(indptr: np.ndarray, max_edges: int = BLOCK_EDGES):
+    n = len(indptr) - 1
+    lo = 0
+    while lo < n:
+        hi = int(np.searchsorted(indptr, indptr[lo] + max_edges, side="right")) - 1
+        hi = min(max(hi, lo + 1), n)
+        yield lo, hi
+        lo = hi
+
+
+def _sparse_pull(reverse, frontier: np.ndarray, in_frontier: np.ndarray, lo: int, hi: int,
+                 words: np.ndarray, n_words: int, p_edge: float):
+    """
+    (rows, words) of rows lo..hi-1 that have a predecessor in the
+    frontier: the OR of those predecessors' frontier words, each link
+    only carrying the bits of the scenarios in which it survives.
+    Gathers only links out of the frontier, unlike the dense or_pull.
+    """
+    indptr = reverse.indptr
+    a, b = int(indptr[lo]), int(indptr[hi])
+    preds = reverse.indices[a:b]
+    live = np.flatnonzero(in_frontier[preds])
+    if live.size == 0:
+        return live, None
+    rows = np.searchsorted(indptr[lo:hi + 1], live + a, side="right") - 1 + lo
+    preds = preds[live]
+    vals = frontier[preds]
+    if p_edge < 1.0:
+        vals &= edge_alive(preds, rows, reverse.n_nodes, words, n_words, p_edge)
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    return rows[starts], np.bitwise_or.reduceat(vals, starts, axis=0)
+
+
+def _count_bits(words: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Per-scenario (bit) count of set bits over the given rows."""
+    counts = np.zeros(words.shape[1] * 64, dtype=np.int64)
+    for i in range(0, rows.size, COUNT_ROWS):
+        chunk = words[rows[i:i + COUNT_ROWS]].astype("<u8").view(np.uint8)
+        counts += np.unpackbits(chunk, axis=1, bitorder="little").sum(axis=0, dtype=np.int64)
+    return counts
+
+
+def failure_reach(graph, seeds, scenarios: int = SCENARIOS,
+                  max_hops: int = MAX_HOPS_DEFAULT, seed_fail: float = 0.0,
+                  node_fail: float = 0.0, edge_fail: float = 0.0,
+                  reverse=None, block_words: int = BLOCK_WORDS,
+                  backend: str | None = None, verbose: bool = False) -> np.ndarray:
+    """
+    (scenarios, max_hops + 1) cumulative count of nodes reached within
+    h hops of the surviving seeds, over surviving nodes and links.
+    """
+    n = graph.n_nodes
+    limit = min(max_hops, MAX_HOPS)
+    if reverse is None:
+        csr = graph if hasattr(graph, "transpose") else graph.to_csr()
+        reverse = csr.transpose()
+    seed_ids = np.unique(graph.node_ids(seeds))
+    n_words = -(-scenarios // 64)
+    blocks = list(_row_blocks(reverse.indptr))
+    # the compiled or_pull scans every link each hop; the numpy path
+    # only gathers links out of the frontier
+    dense = edge_fail <= 0 and resolve_backend(backend) == "numba"
+    reached = np.zeros((n_words * 64, limit + 1), dtype=np.int64)
+
+    for w0 in range(0, n_words, block_words):
+        t0 = time.perf_counter()
+        words = np.arange(w0, min(w0 + block_words, n_words))
+        width = words.size
+        seed_words = node_alive(seed_ids, words, n_words, 1.0 - seed_fail)
+        alive = None
+        if node_fail > 0 or seed_fail > 0:
+            # a failed seed is offline, not just unused: no other seed reaches it
+            alive = np.full((n, width), ~np.uint64(0), dtype=np.uint64)
+            for lo in range(0, n if node_fail > 0 else 0, COUNT_ROWS * 16):
+                ids = np.arange(lo, min(lo + COUNT_ROWS * 16, n))
+                alive[ids] = node_alive(ids, words, n_words, 1.0 - node_fail)
+            alive[seed_ids] = seed_words
+        reach = np.zeros((n, width), dtype=np.uint64)
+        reach[seed_ids] = seed_words
+        frontier = reach.copy()
+        cols = slice(w0 * 64, (w0 + width) * 64)
+        reached[cols, 0] = _count_bits(reach, seed_ids)
+
+        in_frontier = np.zeros(n, dtype=bool)
+        in_frontier[seed_ids] = True
+        for hop in range(1, limit + 1):
+            touched = []
+            new_frontier = np.zeros_like(frontier)
+            for lo, hi in blocks:
+                if dense:
+                    new = or_pull(reverse.indptr, reverse.indices, frontier, lo, hi, backend)
+                    rows = lo + np.flatnonzero(new.any(axis=1))
+                    new = new[rows - lo]
+                else:
+                    rows, new = _sparse_pull(reverse, frontier, in_frontier, lo, hi,
+                                             words, n_words, 1.0 - edge_fail)
+                    if new is None:
+                        continue
+                new &= ~reach[rows]
+                if alive is not None:
+                    new &= alive[rows]
+                hit = new.any(axis=1)
+                rows, new = rows[hit], new[hit]
+                if rows.size:
+                    reach[rows] |= new
+                    new_frontier[rows] = new
+                    touched.append(rows)
+            frontier = new_frontier
+            rows = np.concatenate(touched) if touched else np.zeros(0, dtype=np.int64)
+            in_frontier[:] = False
+            in_frontier[rows] = True
+            reached[cols, hop] = reached[cols, hop - 1] + _count_bits(frontier, rows)
+            if not rows.size:
+                reached[cols, hop + 1:] = reached[cols, hop][:, None]
+                break
+        if verbose:
+            print(f"  scenarios {w0 * 64:,}-{min((w0 + width) * 64, scenarios) - 1:,}: "
+                  f"{time.perf_counter() - t0:.1f}s")
+    return reached[:scenarios]
+
+
+def scenario_graph(graph, scenario: int, scenarios: int, seeds, seed_fail: float = 0.0,
+                   node_fail: float = 0.0, edge_fail: float = 0.0):
+    """
+    The surviving graph, active bitmap and surviving seeds of one
+    scenario, for checking failure_reach against multi_source_bfs.
+    """
+    from webgraph_bfs import pack_mask
+    from webgraph_csr import CSRGraph
+
+    n = graph.n_nodes
+    n_words = -(-scenarios // 64)
+    word = np.array([scenario // 64])
+    bit = np.uint64(1) << np.uint64(scenario % 64)
+    nodes = np.arange(n)
+    active = (node_alive(nodes, word, n_words, 1.0 - node_fail)[:, 0] & bit) != 0
+    seed_ids = np.unique(graph.node_ids(seeds))
+    seed_ok = (node_alive(seed_ids, word, n_words, 1.0 - seed_fail)[:, 0] & bit) != 0
+    active[seed_ids] = seed_ok
+
+    deg = np.diff(graph.indptr)
+    src = np.repeat(nodes, deg)
+    keep = (edge_alive(src, graph.indices, n, word, n_words, 1.0 - edge_fail)[:, 0] & bit) != 0
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src[keep], minlength=n), out=indptr[1:])
+    return CSRGraph(indptr, graph.indices[keep]), pack_mask(active), seed_ids[seed_ok]
+
+
+# --------------------------
+# Summary
+# --------------------------
+
+def scenario_table(reached: np.ndarray, n: int, tau_hop: float) -> pd.DataFrame:
+    """
+    Per-scenario coverage within h hops and mean TTFI of the nodes
+    reached at hops 1..h (seeds left out, as in engine_planner.run_query;
+    inf if the surviving seeds reach nothing).
+    """
+    hops = reached.shape[1] - 1
+    df = pd.DataFrame({"scenario": np.arange(reached.shape[0]),
+                       "seeds_alive": reached[:, 0]})
+    for h in range(1, hops + 1):
+        df[f"coverage_h{h}"] = reached[:, h] / float(n)
+    new = np.diff(reached, axis=1)
+    beyond = reached[:, -1] - reached[:, 0]
+    df["mean_ttfi_s"] = np.divide(tau_hop * (new * np.arange(1, hops + 1)).sum(axis=1), beyond,
+                                  out=np.full(beyond.size, np.inf), where=beyond > 0)
+    return df
+
+
+def summarize(df: pd.DataFrame, baseline: dict, k: int, target: float | None = None) -> dict:
+    """Quantiles of coverage within k hops and of TTFI, against the no-failure run."""
+    cov = df[f"coverage_h{k}"]
+    out = {"scenarios": len(df), "baseline_coverage": baseline["coverage"],
+           "baseline_ttfi_s": baseline["ttfi_s"],
+           "mean_coverage": float(cov.mean()), "mean_ttfi_s": float(df["mean_ttfi_s"].mean())}
+    for q in QUANTILES:
+        out[f"coverage_p{round(q * 100)}"] = float(cov.quantile(q))
+        out[f"ttfi_p{round(q * 100)}_s"] = float(df["mean_ttfi_s"].quantile(q))
+    if target is not None:
+        out["p_meets_target"] = float((cov >= target).mean())
+    return out
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coverage / TTFI under random seed and link failures")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", help="directory from save_csr / save_compressed")
+    src.add_argument("--synthetic", type=int, metavar="N_NODES")
+    seeds = parser.add_mutually_exclusive_group(required=True)
+    seeds.add_argument("--seeds", type=int, help="number of random seeds")
+    seeds.add_argument("--seed-file", help="one domain name or ID per line")
+    parser.add_argument("--scenarios", type=int, default=SCENARIOS)
+    parser.add_argument("--seed-fail", type=float, default=0.1, help="seed failure rate")
+    parser.add_argument("--node-fail", type=float, default=0.0, help="other-site failure rate")
+    parser.add_argument("--edge-fail", type=float, default=0.0, help="link failure rate")
+    parser.add_argument("--max-hops", type=int, default=MAX_HOPS_DEFAULT)
+    parser.add_argument("--target", type=float, default=None,
+                        help="coverage target; reports the share of scenarios meeting it")
+    parser.add_argument("--block-words", type=int, default=BLOCK_WORDS)
+    parser.add_argument("--compare", action="store_true",
+                        help="check a few scenarios against multi_source_bfs on their surviving graph")
+    parser.add_argument("--out", default="../output/seed_robustness.csv")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.graph:
+        from webgraph_compressed import load_graph
+        graph = load_graph(args.graph, mmap=True)
+    else:
+        from webgraph_csr import synthetic_webgraph
+        graph = synthetic_webgraph(args.synthetic, seed=args.seed)
+    n = graph.n_nodes
+    if args.seed_file:
+        from domain_names import load_seed_list
+        seed_ids = load_seed_list(args.seed_file, graph.names)
+    else:
+        seed_ids = np.random.default_rng(args.seed).choice(n, size=args.seeds, replace=False)
+    tau_hop = load_model_params()["tau_hop"]
+    k = args.max_hops
+    failures = dict(seed_fail=args.seed_fail, node_fail=args.node_fail, edge_fail=args.edge_fail)
+
+    print("=" * 80)
+    print(f"SEED ROBUSTNESS: {n:,} nodes, {len(seed_ids):,} seeds, {args.scenarios:,} scenarios")
+    print(f"  failure rates: seeds {args.seed_fail:.0%}, other sites {args.node_fail:.0%}, "
+          f"links {args.edge_fail:.0%}")
+    print("=" * 80)
+
+    t0 = time.perf_counter()
+    dist = multi_source_bfs(graph, seed_ids, k)
+    bfs_seconds = time.perf_counter() - t0
+    hist = np.bincount(dist, minlength=256)[:k + 1]
+    baseline = {"coverage": hist.sum() / float(n),
+                "ttfi_s": (tau_hop * float((hist[1:] * np.arange(1, k + 1)).sum() / hist[1:].sum())
+                           if hist[1:].sum() else float("inf"))}
+
+    t0 = time.perf_counter()
+    reached = failure_reach(graph, seed_ids, args.scenarios, k, reverse=None,
+                            block_words=args.block_words, verbose=True, **failures)
+    seconds = time.perf_counter() - t0
+    df = scenario_table(reached, n, tau_hop)
+    summary = summarize(df, baseline, k, args.target)
+
+    print(f"  Time:      {seconds:.1f}s ({seconds / bfs_seconds:.0f}x one BFS of {bfs_seconds:.2f}s)")
+    print(f"  Coverage within {k} hop(s): planned {summary['baseline_coverage']:.2%}, "
+          f"mean {summary['mean_coverage']:.2%} "
+          f"(p5 {summary['coverage_p5']:.2%}, p50 {summary['coverage_p50']:.2%}, "
+          f"p95 {summary['coverage_p95']:.2%})")
+    print(f"  Mean TTFI: planned {summary['baseline_ttfi_s']:.2f}s, "
+          f"mean {summary['mean_ttfi_s']:.2f}s "
+          f"(p5 {summary['ttfi_p5_s']:.2f}s, p95 {summary['ttfi_p95_s']:.2f}s)")
+    if args.target is not None:
+        print(f"  Scenarios meeting {args.target:.0%}: {summary['p_meets_target']:.1%}")
+
+    if args.compare:
+        if not hasattr(graph, "indptr"):
+            graph = graph.to_csr()
+        for s in sorted({0, 63, args.scenarios // 2, args.scenarios - 1}):
+            sub, active, alive_seeds = scenario_graph(graph, s, args.scenarios, seed_ids,
+                                                      **failures)
+            d = multi_source_bfs(sub, alive_seeds, k, active=active)
+            expect = np.cumsum(np.bincount(d, minlength=256)[:k + 1])
+            if not np.array_equal(expect, reached[s]):
+                raise SystemExit(f"  Scenario {s}: {reached[s]} != multi_source_bfs {expect}")
+        print("  multi_source_bfs on surviving graphs: identical")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out, index=False)
+    print(f"✓ Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
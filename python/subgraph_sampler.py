@@ -0,0 +1,546 @@
+"""
+subgraph_sampler.py
+
+Small, representative subgraphs of a large domain graph for the toy
+figures. generate_toy_graphs.py draws a 100-node Erdos-Renyi graph
+(p = 0.05) and colours a random share of it as covered. This module
+instead samples nodes from the real (or synthetic) graph and colours
+them with the real seed set's hop distances:
+
+    forest_fire   Leskovec & Faloutsos (KDD'06): from an ambassador
+                  node, burn Geometric(mean p / (1 - p)) random outlinks
+                  of every burning node, wave by wave; restart from a
+                  new random node when the fire dies out
+    random_walk   random walk with restart: many walkers step to a
+                  random successor, jump back to their start with
+                  probability `restart` (or at dead ends)
+
+Both only touch the successor lists of the nodes they visit, so a
+100 - 5,000 node sample of a 10M-node graph takes well under a second.
+
+The induced subgraph of such a sample keeps about one link per node
+(mean out-degree ~1 vs ~10) and over-represents covered nodes, since
+the samplers follow links much like a crawler. Two corrections make the
+sample representative:
+
+    - stratification: given the seed set's hop classes (hop_classes),
+      each class gets its full-graph share of the sample, so the
+      projected coverage matches the full graph's
+    - degree_preserving_subgraph: links leaving the sample are
+      redirected to a sampled node of the same hop class, picked by
+      preferential attachment on in-degree, so every node keeps its
+      full-graph out-degree and in-degree stays heavy-tailed
+
+sample_stats reports the sample's degree skew (graph_profile.degree_stats)
+and hop profile; --validate compares them and the coverage with the full
+graph and exits with status 1 when any is more than DIVERGENCE off.
+
+Usage:
+    python subgraph_sampler.py --synthetic 10000000 --seeds 1000 --size 500 --plot
+    python subgraph_sampler.py --graph ../output/couk_graph --seed-file seeds.txt \\
+        --size 2000 --method random-walk --hops 2 --validate --plot
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from graph_profile import degree_stats
+from webgraph_bfs import UNREACHED, multi_source_bfs
+from webgraph_csr import CSRGraph
+
+METHODS = ("forest-fire", "random-walk")
+P_FORWARD = 0.7          # forest fire: mean burned outlinks p / (1 - p)
+RESTART = 0.15           # random walk: jump-back probability per step
+WALKERS = 64
+STALL_STEPS = 200        # walk steps without a new node before new starts
+HOP_SOURCES = 16         # BFS sources for the hop profile
+SIZE = 500
+PA_ROUNDS = 8            # preferential-attachment rounds for redirected links
+DIVERGENCE = 2.0         # --validate fails past this ratio (sample vs full)
+STAT_KEYS = ("mean", "p90", "max", "gini", "top_share", "zero_share", "tail_alpha")
+
+
+# --------------------------
+# Sampling
+# --------------------------
+
+def _out_links(graph, rows: np.ndarray):
+    """(src, dst) int64 arrays of every link out of `rows`."""
+    rows = np.asarray(rows, dtype=np.int64)
+    if hasattr(graph, "indptr"):
+        deg = np.asarray(graph.indptr[rows + 1] - graph.indptr[rows])
+        return np.repeat(rows, deg), np.asarray(graph.successors(rows), dtype=np.int64)
+    src, dst = graph._decode(rows, with_src=True)
+    return src, dst.astype(np.int64)
+
+
+def _ranked(src: np.ndarray, rng) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Links in random order within each source: (order, rank) where rank
+    is the position of link order[i] among its source's links.
+    """
+    order = np.lexsort((rng.random(src.size), src))
+    s = src[order]
+    starts = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+    rank = np.arange(s.size) - np.repeat(starts, np.diff(np.r_[starts, s.size]))
+    return order, rank
+
+
+class _Strata:
+    """
+    Room left per hop class in a sample stratified by the seed set's
+    distances: class c gets size * (share of c in the full graph) nodes,
+    rounded by largest remainder, so the sample's coverage matches.
+    """
+
+    def __init__(self, classes: np.ndarray, size: int, rng):
+        self.classes = classes
+        self.rng = rng
+        counts = np.bincount(classes)
+        exact = size * counts / counts.sum()
+        self.room = np.floor(exact).astype(np.int64)
+        self.room[np.argsort(self.room - exact)[:size - self.room.sum()]] += 1
+        self._members: dict[int, np.ndarray] = {}
+
+    def admit(self, cand: np.ndarray) -> np.ndarray:
+        """The candidates (in the given order) that still fit their class."""
+        c = self.classes[cand].astype(np.int64)
+        order = np.argsort(c, kind="stable")
+        sc = c[order]
+        keep = np.zeros(cand.size, dtype=bool)
+        keep[order] = np.arange(sc.size) - np.searchsorted(sc, sc) < self.room[sc]
+        self.room -= np.bincount(c[keep], minlength=self.room.size)
+        return cand[keep]
+
+    def start(self) -> int:
+        """A random node of a class that still has room."""
+        c = int(self.rng.choice(self.room.size, p=self.room / self.room.sum()))
+        if c not in self._members:
+            self._members[c] = np.flatnonzero(self.classes == c)
+        return int(self.rng.choice(self._members[c]))
+
+
+def _new_nodes(cand: np.ndarray, sampled: set, rng, room: int, strata=None) -> np.ndarray:
+    """
+    Distinct candidates not sampled yet, at most `room` (or what fits
+    the strata), in random order.
+    """
+    cand = np.unique(cand)
+    cand = rng.permutation(cand[np.fromiter((int(c) not in sampled for c in cand),
+                                            bool, cand.size)])
+    return strata.admit(cand) if strata is not None else cand[:room]
+
+
+def forest_fire(graph, size: int, p_forward: float = P_FORWARD, starts=None,
+                seed: int = 42, classes=None) -> np.ndarray:
+    """
+    Sorted IDs of `size` nodes burned by a forward forest fire. Fires
+    start from `starts` (in random order) and then from random nodes.
+    With per-node `classes` (hop classes, see hop_classes) the sample
+    is stratified: nodes of a full class are not burned, and new fires
+    start in classes that still have room.
+    """
+    rng = np.random.default_rng(seed)
+    n = graph.n_nodes
+    size = min(size, n)
+    strata = _Strata(classes, size, rng) if classes is not None else None
+    pool = list(rng.permutation(np.asarray(starts, dtype=np.int64))) if starts is not None else []
+    sampled: set[int] = set()
+    frontier = np.zeros(0, dtype=np.int64)
+    while len(sampled) < size:
+        if frontier.size == 0:
+            if pool:
+                amb = int(pool.pop())
+            else:
+                amb = strata.start() if strata is not None else int(rng.integers(n))
+            if amb in sampled or (strata is not None and not strata.admit(np.array([amb])).size):
+                continue
+            sampled.add(amb)
+            frontier = np.array([amb])
+            continue
+        src, dst = _out_links(graph, frontier)
+        if src.size == 0:
+            frontier = np.zeros(0, dtype=np.int64)
+            continue
+        burn = rng.geometric(1.0 - p_forward, frontier.size) - 1
+        order, rank = _ranked(src, rng)
+        limit = burn[np.searchsorted(frontier, src[order])]
+        new = _new_nodes(dst[order][rank < limit], sampled, rng, size - len(sampled), strata)
+        sampled.update(int(v) for v in new)
+        frontier = np.sort(new)
+    return np.array(sorted(sampled), dtype=np.int64)
+
+
+def random_walk(graph, size: int, restart: float = RESTART, walkers: int = WALKERS,
+                starts=None, seed: int = 42, classes=None) -> np.ndarray:
+    """
+    Sorted IDs of `size` nodes visited by random walks with restart.
+    Walkers start at `starts` (or random nodes) and get fresh random
+    starts when STALL_STEPS steps bring no new node. With `classes`
+    the sample is stratified as in forest_fire: walkers pass through
+    nodes of full classes without sampling them.
+    """
+    rng = np.random.default_rng(seed)
+    n = graph.n_nodes
+    size = min(size, n)
+    strata = _Strata(classes, size, rng) if classes is not None else None
+
+    def fresh_starts():
+        if strata is None:
+            return rng.integers(n, size=walkers)
+        return np.array([strata.start() for _ in range(walkers)], dtype=np.int64)
+
+    if starts is None:
+        home = fresh_starts()
+    else:
+        home = rng.choice(np.asarray(starts, dtype=np.int64), size=walkers)
+    pos = home.copy()
+    sampled: set[int] = set()
+    sampled.update(int(v) for v in _new_nodes(home, sampled, rng, size, strata))
+    stall = 0
+    while len(sampled) < size:
+        nodes, inverse = np.unique(pos, return_inverse=True)
+        src, dst = _out_links(graph, nodes)
+        order, rank = _ranked(src, rng)
+        first = order[rank == 0]
+        step = np.full(nodes.size, -1, dtype=np.int64)
+        step[np.searchsorted(nodes, src[first])] = dst[first]
+        pos = step[inverse]
+        jump = (pos < 0) | (rng.random(walkers) < restart)
+        pos[jump] = home[jump]
+
+        new = _new_nodes(pos, sampled, rng, size - len(sampled), strata)
+        sampled.update(int(v) for v in new)
+        stall = 0 if new.size else stall + 1
+        if stall >= STALL_STEPS:
+            home = fresh_starts()
+            pos, stall = home.copy(), 0
+    return np.array(sorted(sampled), dtype=np.int64)
+
+
+def induced_subgraph(graph, nodes: np.ndarray) -> CSRGraph:
+    """
+    Links among `nodes` (sorted IDs) as a CSRGraph over local IDs
+    0..len(nodes)-1, in the same order; names carried over if any.
+    """
+    from webgraph_csr import from_edges
+
+    nodes = np.asarray(nodes, dtype=np.int64)
+    src, dst = _out_links(graph, nodes)
+    at = np.minimum(np.searchsorted(nodes, dst), nodes.size - 1)
+    keep = nodes[at] == dst
+    sub = from_edges(np.searchsorted(nodes, src[keep]), at[keep], nodes.size)
+    if getattr(graph, "names", None) is not None:
+        from domain_names import NameTable
+        sub.names = NameTable.from_names(graph.names.names(nodes))
+    return sub
+
+
+def degree_preserving_subgraph(graph, nodes: np.ndarray, classes=None, seed: int = 42,
+                               rounds: int = PA_ROUNDS) -> CSRGraph:
+    """
+    Sample graph over `nodes` (sorted IDs) that keeps every node's
+    full-graph out-degree. Links among `nodes` are kept. Each link
+    leaving the sample is redirected to a sampled node, of the same hop
+    class as its real target when `classes` is given. Redirected targets
+    are drawn by preferential attachment on in-degree in `rounds`
+    vectorised rounds, which restores a heavy-tailed in-degree without
+    the transpose. Self-loops and duplicate links are dropped.
+    """
+    from webgraph_csr import from_edges
+
+    rng = np.random.default_rng(seed)
+    nodes = np.asarray(nodes, dtype=np.int64)
+    k = nodes.size
+    src, dst = _out_links(graph, nodes)
+    at = np.minimum(np.searchsorted(nodes, dst), k - 1)
+    inside = nodes[at] == dst
+    local_src = np.searchsorted(nodes, src)
+    local_dst = np.where(inside, at, -1)
+    if classes is not None:
+        target_cls, node_cls = classes[dst].astype(np.int64), classes[nodes].astype(np.int64)
+    else:
+        target_cls, node_cls = np.zeros(dst.size, np.int64), np.zeros(k, np.int64)
+    in_deg = np.bincount(at[inside], minlength=k).astype(np.float64)
+    pending = rng.permutation(np.flatnonzero(~inside))
+    for links in np.array_split(pending, rounds):
+        for c in np.unique(target_cls[links]):
+            group = links[target_cls[links] == c]
+            pool = np.flatnonzero(node_cls == c)
+            if pool.size == 0:
+                pool = np.arange(k)
+            w = in_deg[pool] + 1.0
+            local_dst[group] = rng.choice(pool, group.size, p=w / w.sum())
+        in_deg += np.bincount(local_dst[links], minlength=k)
+    keep = local_src != local_dst
+    pairs = np.unique(local_src[keep] * k + local_dst[keep])
+    sub = from_edges(pairs // k, pairs % k, k)
+    if getattr(graph, "names", None) is not None:
+        from domain_names import NameTable
+        sub.names = NameTable.from_names(graph.names.names(nodes))
+    return sub
+
+
+def hop_classes(dist: np.ndarray, max_hops: int) -> np.ndarray:
+    """Per-node hop class: 0 (seeds) .. max_hops, max_hops + 1 = not reached."""
+    return np.minimum(dist, max_hops + 1)
+
+
+def sample(graph, size: int = SIZE, method: str = "forest-fire", starts=None,
+           seed: int = 42, classes=None, induced: bool = False,
+           **kwargs) -> tuple[np.ndarray, CSRGraph]:
+    """
+    (sorted original IDs, sample graph) of one sample, stratified by
+    `classes` if given. The graph is degree_preserving_subgraph, or the
+    plain induced_subgraph with induced=True.
+    """
+    if method == "forest-fire":
+        nodes = forest_fire(graph, size, starts=starts, seed=seed, classes=classes, **kwargs)
+    elif method == "random-walk":
+        nodes = random_walk(graph, size, starts=starts, seed=seed, classes=classes, **kwargs)
+    else:
+        raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
+    if induced:
+        return nodes, induced_subgraph(graph, nodes)
+    return nodes, degree_preserving_subgraph(graph, nodes, classes, seed)
+
+
+# --------------------------
+# Representativeness
+# --------------------------
+
+def hop_profile(graph, sources, max_hops: int = 6) -> np.ndarray:
+    """
+    Share of (source, reached node) pairs at each hop 1..max_hops, from
+    single-source BFS runs.
+    """
+    hist = np.zeros(max_hops + 1, dtype=np.int64)
+    for s in sources:
+        dist = multi_source_bfs(graph, [int(s)], max_hops)
+        hist += np.bincount(dist, minlength=256)[:max_hops + 1]
+    hist = hist[1:]
+    return hist / max(hist.sum(), 1)
+
+
+def sample_stats(sub: CSRGraph, max_hops: int = 6, seed: int = 42) -> dict:
+    """Degree skew and hop profile of a (sub)graph."""
+    out_deg = np.diff(sub.indptr)
+    in_deg = np.bincount(sub.indices, minlength=sub.n_nodes)
+    sources = np.random.default_rng(seed).choice(sub.n_nodes, min(HOP_SOURCES, sub.n_nodes),
+                                                 replace=False)
+    hops = hop_profile(sub, sources, max_hops)
+    return {
+        "n_nodes": sub.n_nodes, "n_edges": sub.n_edges,
+        "out_degree": {k: v for k, v in degree_stats(np.bincount(out_deg)).items() if k in STAT_KEYS},
+        "in_degree": {k: v for k, v in degree_stats(np.bincount(in_deg)).items() if k in STAT_KEYS},
+        "hop_share": [round(float(x), 4) for x in hops],
+        "mean_hops": float((hops * np.arange(1, max_hops + 1)).sum()),
+    }
+
+
+def full_stats(graph, nodes: np.ndarray, max_hops: int = 6, seed: int = 42) -> dict:
+    """
+    The same statistics on the full graph: out-degree over all nodes,
+    the sampled nodes' full-graph out-degree (what the sample cuts
+    away), hop profile from the same number of sampled sources.
+    """
+    out_deg = np.diff(graph.indptr) if hasattr(graph, "indptr") else graph.out_degree()
+    node_deg = out_deg[nodes]
+    sources = np.random.default_rng(seed).choice(nodes, min(HOP_SOURCES, nodes.size),
+                                                 replace=False)
+    hops = hop_profile(graph, sources, max_hops)
+    return {
+        "n_nodes": graph.n_nodes, "n_edges": graph.n_edges,
+        "out_degree": {k: v for k, v in degree_stats(np.bincount(out_deg)).items() if k in STAT_KEYS},
+        "sampled_out_degree": {k: v for k, v in degree_stats(np.bincount(node_deg)).items()
+                               if k in STAT_KEYS},
+        "hop_share": [round(float(x), 4) for x in hops],
+        "mean_hops": float((hops * np.arange(1, max_hops + 1)).sum()),
+    }
+
+
+def divergence(stats: dict, full: dict, sub_cov: float, full_cov: float,
+               limit: float = DIVERGENCE) -> list[str]:
+    """
+    Where the sample misrepresents the full graph by more than a factor
+    `limit`: mean out-degree, mean hop distance, seed coverage.
+    """
+    pairs = (("mean out-degree", stats["out_degree"]["mean"], full["out_degree"]["mean"]),
+             ("mean hops", stats["mean_hops"], full["mean_hops"]),
+             ("coverage", sub_cov, full_cov))
+    issues = []
+    for what, got, want in pairs:
+        lo, hi = sorted((got, want))
+        if hi > 0 and (lo == 0 or hi / lo > limit):
+            issues.append(f"{what} {got:.4g} in the sample vs {want:.4g} in the full graph")
+    return issues
+
+
+# --------------------------
+# Figure
+# --------------------------
+
+def draw_sample(sub: CSRGraph, dist: np.ndarray, max_hops: int, filename,
+                title: str = "", layout: str = "spring", seed: int = 42):
+    """
+    Draw the sample with networkx, nodes coloured by the real hop
+    distance (coverage_raster.hop_colors). layout="shell" puts hop
+    classes on concentric rings; "spring" falls back to it when
+    networkx's large-graph spring layout is unavailable (needs scipy).
+    """
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    from matplotlib.patches import Patch
+
+    from coverage_raster import hop_colors
+
+    cls = np.minimum(dist, max_hops + 1)
+    G = nx.DiGraph()
+    G.add_nodes_from(range(sub.n_nodes))
+    G.add_edges_from(zip(np.repeat(np.arange(sub.n_nodes), np.diff(sub.indptr)).tolist(),
+                         sub.indices.tolist()))
+    pos = None
+    if layout == "spring":
+        try:
+            pos = nx.spring_layout(G.to_undirected(), seed=seed,
+                                   k=1.5 / np.sqrt(max(sub.n_nodes, 1)), iterations=50)
+        except ImportError:
+            print("  spring layout needs scipy for this size; using hop shells")
+    if pos is None:
+        shells = [np.flatnonzero(cls == c).tolist() for c in range(max_hops + 2)]
+        pos = nx.shell_layout(G, [s for s in shells if s])
+
+    colors = hop_colors(max_hops)
+    size = max(8.0, 3000.0 / max(sub.n_nodes, 1) ** 0.5)
+    plt.figure(figsize=(8, 8))
+    nx.draw_networkx_edges(G, pos=pos, edge_color="#95a5a6", width=0.4, alpha=0.35,
+                           arrows=False)
+    nx.draw_networkx_nodes(G, pos=pos, node_color=colors[cls], node_size=size,
+                           edgecolors="#34495e", linewidths=0.5 if size > 20 else 0.0)
+    counts = np.bincount(cls, minlength=max_hops + 2)
+    labels = ["seeds"] + [f"hop {h}" for h in range(1, max_hops + 1)] + ["not reached"]
+    handles = [Patch(facecolor=colors[i], edgecolor="#34495e", label=f"{labels[i]} ({counts[i]:,})")
+               for i in range(max_hops + 2)]
+    plt.legend(handles=handles, loc="upper right", fontsize=10)
+    if title:
+        plt.title(title, fontsize=14, fontweight="bold", pad=20)
+    plt.axis("off")
+    plt.tight_layout()
+    Path(filename).parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(filename, dpi=300, bbox_inches="tight")
+    plt.close()
+    print(f"✓ Saved: {filename}")
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def _fmt(stats: dict) -> str:
+    d = stats["out_degree"]
+    return (f"mean {d['mean']:.2f}, p90 {d['p90']}, max {d['max']:,}, gini {d['gini']:.2f}, "
+            f"top 1% {d['top_share']['0.01']:.0%}; mean hops {stats['mean_hops']:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Representative toy subgraph with real coverage")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", help="directory from save_csr / save_compressed")
+    src.add_argument("--synthetic", type=int, metavar="N_NODES")
+    seeds = parser.add_mutually_exclusive_group(required=True)
+    seeds.add_argument("--seeds", type=int, help="number of random seeds")
+    seeds.add_argument("--seed-file", help="one domain name or ID per line")
+    parser.add_argument("--hops", type=int, default=2)
+    parser.add_argument("--size", type=int, default=SIZE)
+    parser.add_argument("--method", choices=METHODS, default="forest-fire")
+    parser.add_argument("--p-forward", type=float, default=P_FORWARD)
+    parser.add_argument("--restart", type=float, default=RESTART)
+    parser.add_argument("--start", choices=("random", "seeds"), default="random",
+                        help="where fires / walks start")
+    parser.add_argument("--induced", action="store_true",
+                        help="keep only the links among sampled nodes (no degree correction)")
+    parser.add_argument("--validate", action="store_true",
+                        help="compare degree skew, hop profile and coverage with the full "
+                             f"graph; exit 1 if any is more than {DIVERGENCE:g}x off")
+    parser.add_argument("--plot", nargs="?", const="auto", default=None, metavar="PNG")
+    parser.add_argument("--layout", choices=("spring", "shell"), default="spring")
+    parser.add_argument("--save", default=None, help="save_csr the sample (plus nodes.npy)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.graph:
+        from webgraph_compressed import load_graph
+        graph = load_graph(args.graph, mmap=True)
+        label = Path(args.graph).name
+    else:
+        from webgraph_csr import synthetic_webgraph
+        graph = synthetic_webgraph(args.synthetic, seed=args.seed)
+        label = f"synthetic {args.synthetic:,}"
+    n = graph.n_nodes
+    if args.seed_file:
+        from domain_names import load_seed_list
+        seed_ids = load_seed_list(args.seed_file, graph.names)
+    else:
+        seed_ids = np.random.default_rng(args.seed).choice(n, size=args.seeds, replace=False)
+
+    t0 = time.perf_counter()
+    dist = multi_source_bfs(graph, seed_ids, args.hops)
+    bfs_seconds = time.perf_counter() - t0
+
+    params = ({"p_forward": args.p_forward} if args.method == "forest-fire"
+              else {"restart": args.restart})
+    t0 = time.perf_counter()
+    nodes, sub = sample(graph, args.size, args.method,
+                        seed_ids if args.start == "seeds" else None, args.seed,
+                        classes=hop_classes(dist, args.hops), induced=args.induced, **params)
+    sample_seconds = time.perf_counter() - t0
+    sub_dist = dist[nodes]
+    full_cov = float((dist != UNREACHED).mean())
+    sub_cov = float((sub_dist != UNREACHED).mean())
+
+    stats = sample_stats(sub, seed=args.seed)
+    print("=" * 80)
+    print(f"SUBGRAPH SAMPLE: {sub.n_nodes:,} of {n:,} nodes ({args.method}), "
+          f"{sub.n_edges:,} links")
+    print("=" * 80)
+    print(f"  Sampling:  {sample_seconds:.2f}s   (coverage BFS on the full graph {bfs_seconds:.1f}s)")
+    print(f"  Sample:    {_fmt(stats)}")
+    if args.validate:
+        full = full_stats(graph, nodes, seed=args.seed)
+        d = full["sampled_out_degree"]
+        print(f"  Full:      {_fmt(full)}")
+        print(f"  Sampled nodes in the full graph: mean out-degree {d['mean']:.2f}, "
+              f"p90 {d['p90']}, max {d['max']:,}")
+        print(f"  Hop share: sample {stats['hop_share']}")
+        print(f"             full   {full['hop_share']}")
+    print(f"  Coverage within {args.hops} hop(s): full graph {full_cov:.2%}, "
+          f"sample {sub_cov:.2%}")
+    if args.validate:
+        issues = divergence(stats, full, sub_cov, full_cov)
+        if issues:
+            print(f"  The sample is not representative (> {DIVERGENCE:g}x off):")
+            for issue in issues:
+                print(f"    - {issue}")
+            raise SystemExit(1)
+        print(f"  Validation: within {DIVERGENCE:g}x of the full graph")
+
+    if args.save:
+        from webgraph_csr import save_csr
+        out = save_csr(sub, args.save)
+        np.save(Path(out) / "nodes.npy", nodes)
+        print(f"✓ Saved: {out}")
+    if args.plot:
+        filename = args.plot
+        if filename == "auto":
+            filename = (f"../output/toy_sample_{args.method}_{sub.n_nodes}"
+                        f"_{len(seed_ids)}_seeds_{args.hops}hop.png")
+        title = (f"{label}: {len(seed_ids):,} seeds, {args.hops}-hop\n"
+                 f"{full_cov:.2%} coverage ({sub.n_nodes:,}-node {args.method} sample)")
+        draw_sample(sub, sub_dist, args.hops, filename, title, args.layout, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+tld_allocation.py
+
+Joint multi-TLD coverage model and global seed-budget allocator.
+
+Each TLD i has a size N_i, its own D, r, s, theta and a cross-TLD link
+fraction c_i. A seed in TLD i discovers a_i = T_k(D_i, r_i, s_i) /
+(1 - theta_i) domains; a share (1 - c_i) of them stays in TLD i and the
+rest spills into the other TLDs in proportion to their size:
+
+    discovered_i = (1 - c_i) a_i n_i + w_i * sum_j c_j a_j n_j
+    covered_i    = min(N_i, discovered_i),       w_i = N_i / sum N
+
+Two allocation objectives over a budget B = sum n_i:
+
+    coverage : maximise sum covered_i. The marginal gain of a seed is
+               constant between saturation events, so an event-driven
+               greedy places seeds in bulk (one vectorised step per
+               saturating TLD, at most n_tlds + 1 steps).
+    ttfi     : minimise max_i TTFI_i. TTFI_i is decreasing in n_i with
+               the closed-form inverse n_i(t) = N_i / ((D_i + 1)^(t/tau) - 1),
+               so the optimum is found by bisection on t.
+
+Usage:
+    python tld_allocation.py --tlds tlds.csv --budget 2000000 --objective coverage
+    python tld_allocation.py --synthetic 1500 --budget 5000000 --objective ttfi
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from generate_tables_and_figures import (T_k_array, estimate_ttfi_array,
+                                         N_UK, N_SE, PARAMS)
+
+COLUMNS = ["tld", "N", "D", "r", "s", "theta", "cross_link", "tau_hop"]
+DEFAULT_CROSS_LINK = 0.1
+BISECT_STEPS = 100
+REFINE_ROUNDS = 20     # excess-reclaim passes after the coverage greedy
+
+
+# --------------------------
+# TLD tables
+# --------------------------
+
+def load_tld_table(path) -> pd.DataFrame:
+    """
+    Read a CSV with at least `tld,N`; missing D, r, s, theta, tau_hop
+    columns (or empty cells) fall back to model_params, cross_link to
+    DEFAULT_CROSS_LINK.
+    """
+    return _fill_defaults(pd.read_csv(path))
+
+
+def _fill_defaults(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    defaults = {**PARAMS, "cross_link": DEFAULT_CROSS_LINK}
+    for col in COLUMNS[2:]:
+        if col not in df:
+            df[col] = defaults[col]
+        df[col] = df[col].fillna(defaults[col]).astype(float)
+    if (df["N"] <= 0).any():
+        raise ValueError("Every TLD needs N > 0")
+    return df[COLUMNS].reset_index(drop=True)
+
+
+def synthetic_tld_table(n_tlds: int = 1500, seed: int = 42) -> pd.DataFrame:
+    """
+    Seeded table with .uk and .se at their paper sizes plus n_tlds - 2
+    log-normally sized TLDs with jittered model parameters.
+    """
+    rng = np.random.default_rng(seed)
+    m = max(n_tlds - 2, 0)
+    df = pd.DataFrame({
+        "tld": ["uk", "se"] + [f"tld{i:04d}" for i in range(m)],
+        "N": np.r_[N_UK, N_SE, np.maximum(1000, rng.lognormal(11.0, 1.8, m)).astype(int)],
+        "D": np.r_[PARAMS["D"], PARAMS["D"], rng.uniform(6.0, 14.0, m)],
+        "r": np.r_[PARAMS["r"], PARAMS["r"], rng.uniform(0.4, 0.8, m)],
+        "s": np.r_[PARAMS["s"], PARAMS["s"], rng.uniform(0.3, 0.6, m)],
+        "theta": np.r_[PARAMS["theta"], PARAMS["theta"], rng.uniform(0.2, 0.4, m)],
+        "cross_link": np.r_[DEFAULT_CROSS_LINK, DEFAULT_CROSS_LINK,
+                            rng.uniform(0.02, 0.3, m)],
+    })
+    return _fill_defaults(df)
+
+
+def _arrays(table: pd.DataFrame, k: int):
+    N = table["N"].to_numpy(float)
+    a = T_k_array(table["D"].to_numpy(), table["r"].to_numpy(),
+                  table["s"].to_numpy(), k) / (1.0 - table["theta"].to_numpy())
+    c = table["cross_link"].to_numpy(float)
+    return N, a, c, N / N.sum()
+
+
+# --------------------------
+# Joint model
+# --------------------------
+
+def discovered(table: pd.DataFrame, seeds: np.ndarray, k: int = 2) -> np.ndarray:
+    """
+    Domains discovered per TLD (before the min(N_i, .) cap), including
+    spillover from every other TLD's cross links.
+    """
+    N, a, c, w = _arrays(table, k)
+    seeds = np.asarray(seeds, dtype=float)
+    return (1.0 - c) * a * seeds + w * np.dot(c * a, seeds)
+
+
+def evaluate_allocation(table: pd.DataFrame, seeds: np.ndarray, k: int = 2) -> pd.DataFrame:
+    """
+    Per-TLD seeds, coverage and TTFI for an allocation.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64)
+    N = table["N"].to_numpy(float)
+    cov = np.minimum(1.0, discovered(table, seeds, k) / N)
+    with np.errstate(divide="ignore"):
+        ttfi = np.where(seeds > 0,
+                        estimate_ttfi_array(table["D"].to_numpy(), N,
+                                            np.maximum(seeds, 1),
+                                            table["tau_hop"].to_numpy()),
+                        np.inf)
+    return pd.DataFrame({"tld": table["tld"], "N": table["N"], "Seeds": seeds,
+                         "Coverage_%": cov * 100, "TTFI_s": ttfi})
+
+
+# --------------------------
+# Allocation
+# --------------------------
+
+def _greedy_fill(seeds, remaining, N, a, c, w) -> np.ndarray:
+    """
+    Event-driven greedy: add `remaining` seeds on top of `seeds` (in place).
+    """
+    disc = (1.0 - c) * a * seeds + w * np.dot(c * a, seeds)
+    while remaining > 0:
+        open_ = disc < N
+        if not open_.any():
+            break
+        gain = a * ((1.0 - c) * open_ + c * w[open_].sum())
+        j = int(np.argmax(gain))
+        if gain[j] <= 0.0:
+            break
+
+        rate = w * (c[j] * a[j])
+        rate[j] += (1.0 - c[j]) * a[j]
+        with np.errstate(divide="ignore"):
+            to_event = np.where(open_ & (rate > 0), (N - disc) / rate, np.inf)
+        x = min(remaining, max(1, int(np.ceil(to_event.min()))))
+        seeds[j] += x
+        disc += rate * x
+        remaining -= x
+    return seeds
+
+
+def allocate_coverage(table: pd.DataFrame, budget: int, k: int = 2) -> np.ndarray:
+    """
+    Greedy allocation maximising total covered domains.
+
+    Between events every seed in TLD j has the same marginal gain
+
+        g_j = a_j * ((1 - c_j) [j unsaturated] + c_j * sum_{i unsaturated} w_i)
+
+    so the best TLD receives seeds in one bulk step, up to the point where
+    the next TLD saturates (or the budget runs out). Each step saturates at
+    least one TLD.
+
+    Spillover placed later can push an already-saturated TLD past N_i, so
+    its own seeds are partly wasted; refinement rounds reclaim that excess
+    and re-run the greedy while total coverage improves.
+    """
+    N, a, c, w = _arrays(table, k)
+    seeds = _greedy_fill(np.zeros(len(N), dtype=np.int64), int(budget), N, a, c, w)
+    best = np.minimum(N, discovered(table, seeds, k)).sum()
+
+    for _ in range(REFINE_ROUNDS):
+        excess = np.maximum(discovered(table, seeds, k) - N, 0.0)
+        excess = np.minimum(np.floor(excess / ((1.0 - c) * a)).astype(np.int64), seeds)
+        if excess.sum() == 0:
+            break
+        candidate = _greedy_fill(seeds - excess, int(excess.sum()), N, a, c, w)
+        covered = np.minimum(N, discovered(table, candidate, k)).sum()
+        if covered <= best:
+            break
+        seeds, best = candidate, covered
+    return seeds
+
+
+def seeds_for_ttfi(table: pd.DataFrame, t: float) -> np.ndarray:
+    """
+    Fewest seeds per TLD with TTFI_i <= t (inverse of estimate_ttfi_array
+    without a hop horizon); at least one seed per TLD.
+    """
+    N = table["N"].to_numpy(float)
+    branch = np.maximum(table["D"].to_numpy(float), 2.0)
+    hops = np.maximum(t / table["tau_hop"].to_numpy(float), 1.0)
+    need = np.ceil(N / ((branch + 1.0) ** hops - 1.0))
+    return np.clip(need, 1, N).astype(np.int64)
+
+
+def allocate_minimax_ttfi(table: pd.DataFrame, budget: int):
+    """
+    Allocation minimising the worst TTFI across TLDs. Returns
+    (seeds, worst_ttfi). Any budget left after rounding stays unused.
+    """
+    if budget < len(table):
+        raise ValueError(f"Budget {budget:,} is below one seed per TLD ({len(table):,})")
+    N = table["N"].to_numpy(float)
+    tau = table["tau_hop"].to_numpy(float)
+    lo = tau.max()      # one hop everywhere: the fastest possible
+    hi = float(estimate_ttfi_array(table["D"].to_numpy(), N, 1.0, tau).max())
+    if seeds_for_ttfi(table, lo).sum() <= budget:
+        hi = lo
+    for _ in range(BISECT_STEPS):
+        if hi - lo <= 1e-9 * hi:
+            break
+        mid = 0.5 * (lo + hi)
+        if seeds_for_ttfi(table, mid).sum() <= budget:
+            hi = mid
+        else:
+            lo = mid
+    seeds = seeds_for_ttfi(table, hi)
+    worst = float(estimate_ttfi_array(table["D"].to_numpy(), N, seeds, tau).max())
+    return seeds, worst
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-TLD seed budget allocation")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--tlds", help="CSV: tld,N[,D,r,s,theta,cross_link,tau_hop]")
+    src.add_argument("--synthetic", type=int, metavar="N_TLDS")
+    parser.add_argument("--budget", type=int, required=True)
+    parser.add_argument("--objective", choices=["coverage", "ttfi"], default="coverage")
+    parser.add_argument("--hops", type=int, default=2)
+    parser.add_argument("--out", default="../output/tld_allocation.csv")
+    args = parser.parse_args(argv)
+
+    table = load_tld_table(args.tlds) if args.tlds else synthetic_tld_table(args.synthetic)
+    t0 = time.perf_counter()
+    if args.objective == "coverage":
+        seeds = allocate_coverage(table, args.budget, args.hops)
+    else:
+        seeds, _ = allocate_minimax_ttfi(table, args.budget)
+    elapsed = time.perf_counter() - t0
+
+    df = evaluate_allocation(table, seeds, args.hops)
+    covered = (df["Coverage_%"] / 100 * df["N"]).sum()
+    print("=" * 80)
+    print(f"TLD ALLOCATION ({args.objective}): {len(table):,} TLDs, "
+          f"budget {args.budget:,}, {args.hops}-hop, solved in {elapsed * 1000:.1f} ms")
+    print("=" * 80)
+    print(f"  Seeds used:      {int(seeds.sum()):,}")
+    print(f"  Total coverage:  {covered / df['N'].sum():.2%} "
+          f"({covered:,.0f} of {int(df['N'].sum()):,} domains)")
+    unseeded = int((seeds == 0).sum())
+    print(f"  Worst TTFI:      {df['TTFI_s'][seeds > 0].max():.2f}s"
+          + (f" ({unseeded:,} TLDs without seeds)" if unseeded else ""))
+    print("\nLargest allocations")
+    print(df.sort_values("Seeds", ascending=False).head(10).to_string(index=False))
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out, index=False)
+    print(f"\n✓ Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+traversal_kernels.py
+
+Inner loops of the traversal engines as swappable kernels, with two
+backends:
+
+    numpy  -- vectorised reference, always available
+    numba  -- JIT-compiled loops with threaded (prange) outer loops,
+              used automatically when numba is installed
+
+Kernels (all over CSR arrays indptr / indices):
+
+    bfs_step      expand a sorted frontier, claim unvisited successors,
+                  return the next sorted frontier (the hop expansion of
+                  webgraph_bfs.multi_source_bfs on CSR graphs and of
+                  external_bfs.external_bfs)
+    or_pull       out[v] = words[v] | OR of words over v's successors
+                  (bit-parallel reachability, 64 sources per uint64 word;
+                  seed_robustness.py)
+    max_pull      out[v] = max(regs[v], max of regs over v's successors),
+                  element-wise (HyperLogLog sketch unions;
+                  seed_classifier.py)
+
+Both backends return identical results: distances and frontiers are
+sets, and OR / max are order-independent. `python traversal_kernels.py
+check` verifies this on a synthetic graph and `bench` reports the
+speedup per kernel.
+
+The backend is chosen per call (backend="numpy" | "numba"), else by the
+SEEDSITES_KERNELS environment variable, else numba when importable. The
+numba thread count follows NUMBA_NUM_THREADS.
+
+Usage:
+    python traversal_kernels.py check --nodes 200000
+    python traversal_kernels.py bench --nodes 10000000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from webgraph_csr import gather_segments
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:          # optional dependency
+    njit, prange = None, range
+    HAVE_NUMBA = False
+
+UNREACHED = 255               # same as webgraph_bfs.UNREACHED
+BACKENDS = ("numpy", "numba") if HAVE_NUMBA else ("numpy",)
+ENV_VAR = "SEEDSITES_KERNELS"
+
+
+def resolve_backend(backend: str | None = None) -> str:
+    """
+    Backend name for a call: explicit argument, then $SEEDSITES_KERNELS,
+    then numba if installed.
+    """
+    backend = backend or os.environ.get(ENV_VAR) or BACKENDS[-1]
+    if backend not in ("numpy", "numba"):
+        raise ValueError(f"Unknown kernel backend {backend!r}")
+    if backend == "numba" and not HAVE_NUMBA:
+        raise ImportError("numba backend requested but numba is not installed")
+    return backend
+
+
+# --------------------------
+# Loop kernels (compiled by numba when available)
+# --------------------------
+
+def _bfs_claim_loop(indptr, indices, frontier, offsets, dist, hop, out):
+    # Each edge has its own output slot, so threads never share a write
+    # target except dist[v]; concurrent claims of v all store `hop`, and
+    # a node claimed twice is removed by the caller's np.unique.
+    for i in prange(frontier.size):
+        u = frontier[i]
+        base = offsets[i] - indptr[u]
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if dist[v] == UNREACHED:
+                dist[v] = hop
+                out[base + j] = v
+            else:
+                out[base + j] = -1
+
+
+def _or_pull_loop(indptr, indices, words, lo, hi, out):
+    for r in prange(hi - lo):
+        v = lo + r
+        for w in range(words.shape[1]):
+            acc = words[v, w]
+            for j in range(indptr[v], indptr[v + 1]):
+                acc |= words[indices[j], w]
+            out[r, w] = acc
+
+
+def _max_pull_loop(indptr, indices, regs, lo, hi, out):
+    for r in prange(hi - lo):
+        v = lo + r
+        for w in range(regs.shape[1]):
+            out[r, w] = regs[v, w]
+        for j in range(indptr[v], indptr[v + 1]):
+            u = indices[j]
+            for w in range(regs.shape[1]):
+                if regs[u, w] > out[r, w]:
+                    out[r, w] = regs[u, w]
+
+
+if HAVE_NUMBA:
+    _nb_bfs_claim = njit(parallel=True, cache=True)(_bfs_claim_loop)
+    _nb_or_pull = njit(parallel=True, cache=True)(_or_pull_loop)
+    _nb_max_pull = njit(parallel=True, cache=True)(_max_pull_loop)
+
+
+# --------------------------
+# BFS
+# --------------------------
+
+def bfs_step(indptr, indices, frontier: np.ndarray, dist: np.ndarray, hop: int,
+             backend: str | None = None, dedup: bool = True) -> tuple[np.ndarray, int]:
+    """
+    One level-synchronous BFS hop: mark every unvisited successor of
+    `frontier` with `hop` in `dist` (uint8, in place). Returns the next
+    frontier (sorted, unique, int64) and the number of edges scanned.
+    With dedup=False the claimed nodes come back as found (unsorted,
+    possibly repeated), for callers that re-derive the frontier from
+    `dist`.
+    """
+    frontier = np.asarray(frontier, dtype=np.int64)
+    if resolve_backend(backend) == "numba":
+        deg = indptr[frontier + 1] - indptr[frontier]
+        offsets = np.zeros(frontier.size + 1, dtype=np.int64)
+        np.cumsum(deg, out=offsets[1:])
+        out = np.empty(int(offsets[-1]), dtype=np.int64)
+        _nb_bfs_claim(indptr, indices, frontier, offsets, dist, np.uint8(hop), out)
+        new = out[out >= 0]
+        return (np.unique(new) if dedup else new), int(out.size)
+    nbrs = gather_segments(indptr, indices, frontier)
+    new = nbrs[dist[nbrs] == UNREACHED]
+    dist[new] = hop
+    return (np.unique(new).astype(np.int64) if dedup else new), int(nbrs.size)
+
+
+def bfs(graph, seeds, max_hops: int | None = None,
+        backend: str | None = None) -> np.ndarray:
+    """
+    Multi-source BFS on a CSRGraph with bfs_step; same uint8 distances
+    as webgraph_bfs.multi_source_bfs.
+    """
+    limit = UNREACHED - 1 if max_hops is None else min(max_hops, UNREACHED - 1)
+    dist = np.full(graph.n_nodes, UNREACHED, dtype=np.uint8)
+    frontier = np.unique(graph.node_ids(seeds))
+    dist[frontier] = 0
+    hop = 0
+    while frontier.size and hop < limit:
+        hop += 1
+        frontier, _ = bfs_step(graph.indptr, graph.indices, frontier, dist, hop, backend)
+    return dist
+
+
+# --------------------------
+# Segment reductions (bit-parallel reach, HLL unions)
+# --------------------------
+
+def _pull_numpy(indptr, indices, values, lo, hi, reduce):
+    a, b = int(indptr[lo]), int(indptr[hi])
+    out = np.array(values[lo:hi])
+    seg = np.asarray(indptr[lo:hi + 1]) - a
+    nz = np.flatnonzero(np.diff(seg) > 0)
+    if nz.size:
+        gathered = reduce.reduceat(values[indices[a:b]], seg[nz], axis=0)
+        reduce(out[nz], gathered, out=gathered)
+        out[nz] = gathered
+    return out
+
+
+def or_pull(indptr, indices, words: np.ndarray, lo: int = 0, hi: int | None = None,
+            backend: str | None = None) -> np.ndarray:
+    """
+    Rows lo..hi-1 of words[v] | OR(words[u] for u in successors(v)), for
+    a uint64 array of shape (n,) or (n, W). Over the transposed graph
+    this is one hop of bit-parallel reachability. Callers bound the
+    block size (the numpy backend gathers its edges' rows).
+    """
+    hi = len(indptr) - 1 if hi is None else hi
+    words = np.asarray(words)
+    flat = words.ndim == 1
+    w2 = words.reshape(-1, 1) if flat else words
+    if resolve_backend(backend) == "numba":
+        out = np.empty((hi - lo, w2.shape[1]), dtype=w2.dtype)
+        _nb_or_pull(indptr, indices, w2, lo, hi, out)
+    else:
+        out = _pull_numpy(indptr, indices, w2, lo, hi, np.bitwise_or)
+    return out.ravel() if flat else out
+
+
+def max_pull(indptr, indices, regs: np.ndarray, lo: int = 0, hi: int | None = None,
+             backend: str | None = None) -> np.ndarray:
+    """
+    Rows lo..hi-1 of the element-wise max of regs[v] and regs[u] over
+    v's successors, for a (n, m) register array: the union of v's own
+    HyperLogLog sketch with its successors' sketches.
+    """
+    hi = len(indptr) - 1 if hi is None else hi
+    if resolve_backend(backend) == "numba":
+        out = np.empty((hi - lo, regs.shape[1]), dtype=regs.dtype)
+        _nb_max_pull(indptr, indices, regs, lo, hi, out)
+        return out
+    return _pull_numpy(indptr, indices, regs, lo, hi, np.maximum)
+
+
+# --------------------------
+# CLI: equivalence check and per-kernel benchmark
+# --------------------------
+
+def _workload(n_nodes: int, n_seeds: int, seed: int):
+    from webgraph_csr import synthetic_webgraph
+
+    graph = synthetic_webgraph(n_nodes, seed=seed)
+    rng = np.random.default_rng(seed)
+    seeds = rng.choice(n_nodes, size=min(n_seeds, n_nodes), replace=False)
+    reverse = graph.transpose()
+    # bit-parallel: each node starts in one of 64 random source groups
+    words = np.uint64(1) << rng.integers(0, 64, size=n_nodes).astype(np.uint64)
+    regs = rng.integers(0, 20, size=(n_nodes, 64), dtype=np.uint8)
+    return graph, reverse, seeds, words, regs
+
+
+def _kernels(graph, reverse, seeds, words, regs):
+    """
+    {kernel name: (callable(backend) -> result, items)}.
+    """
+    return {
+        "bfs": (lambda b: bfs(graph, seeds, backend=b), graph.n_edges),
+        "or_pull": (lambda b: or_pull(reverse.indptr, reverse.indices, words, backend=b),
+                    graph.n_edges),
+        "max_pull": (lambda b: max_pull(graph.indptr, graph.indices, regs, backend=b),
+                     graph.n_edges),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Traversal kernel backends")
+    parser.add_argument("cmd", choices=["check", "bench"])
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--seeds", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(f"Backends available: {', '.join(BACKENDS)} "
+          f"(default: {resolve_backend()})")
+    if not HAVE_NUMBA:
+        print("  numba not installed: only the numpy reference can run")
+    work = _workload(args.nodes, args.seeds, args.seed)
+    kernels = _kernels(*work)
+
+    if args.cmd == "check":
+        ok = True
+        for name, (fn, _) in kernels.items():
+            results = [fn(b) for b in BACKENDS]
+            same = all(np.array_equal(results[0], r) for r in results[1:])
+            ok &= same
+            print(f"  {name:<16} {'identical' if same else 'DIFFERENT'} across {len(results)} backend(s)")
+        if not ok:
+            raise SystemExit(1)
+        return
+
+    print("=" * 80)
+    print(f"KERNEL BENCHMARK: {args.nodes:,} nodes, {work[0].n_edges:,} edges, "
+          f"best of {args.repeat}")
+    print("=" * 80)
+    print(f"{'kernel':<16}" + "".join(f"{b + ' (s)':>14}" for b in BACKENDS)
+          + f"{'speedup':>10}{'Medges/s':>12}")
+    for name, (fn, items) in kernels.items():
+        best = {}
+        for b in BACKENDS:
+            fn(b)                                  # warm-up / JIT compile
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                fn(b)
+                times.append(time.perf_counter() - t0)
+            best[b] = min(times)
+        fastest = best[BACKENDS[-1]]
+        print(f"{name:<16}" + "".join(f"{best[b]:>14.4f}" for b in BACKENDS)
+              + f"{best['numpy'] / fastest:>9.1f}x{items / fastest / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+traversal_metrics.py
+
+Per-hop instrumentation for the traversal engines (webgraph_bfs.py)
+and the scenario runner (run_scenarios.py).
+
+Engines call an observer with one HopStats record per hop:
+
+    - frontier size, edges scanned, newly discovered nodes
+    - duplicate-hit ratio = 1 - new / edges_scanned
+    - dedup_factor = new / (n_seeds * D^h), i.e. the empirical
+      counterpart of 1 (h = 1), r (h = 2) and s (h >= 3) in T_k
+    - seconds and bytes allocated per phase (expand / filter / dedup)
+
+Bytes are the sizes of the arrays each phase creates, not a heap trace,
+so instrumentation costs a few perf_counter() calls per hop and can be
+left on in production runs.
+
+Sinks:
+    JsonLinesObserver           -- one JSON object per event
+    PrometheusTextfileObserver  -- node_exporter textfile collector format
+    CollectingObserver          -- keeps records in memory
+"""
+
+import itertools
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+METRIC_PREFIX = "seedsites"
+_run_counter = itertools.count()
+
+
+def new_run_id(engine: str) -> str:
+    """
+    Unique-enough run label: engine, pid, wall-clock ms and a counter.
+    """
+    return f"{engine}-{os.getpid()}-{int(time.time() * 1000)}-{next(_run_counter)}"
+
+
+@dataclass
+class HopStats:
+    """
+    Statistics for a single hop of a level-synchronous traversal.
+    """
+    run_id: str
+    engine: str
+    hop: int
+    frontier_size: int
+    edges_scanned: int
+    new_nodes: int
+    duplicate_ratio: float
+    dedup_factor: float
+    phase_seconds: dict = field(default_factory=dict)
+    phase_bytes: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_counts(cls, run_id: str, engine: str, hop: int,
+                    frontier_size: int, edges_scanned: int, new_nodes: int,
+                    n_seeds: int, avg_deg: float,
+                    phase_seconds: dict, phase_bytes: dict) -> "HopStats":
+        dup = 1.0 - new_nodes / edges_scanned if edges_scanned else 0.0
+        expected = n_seeds * avg_deg ** hop
+        factor = new_nodes / expected if expected > 0 else 0.0
+        return cls(run_id, engine, hop, frontier_size, edges_scanned,
+                   new_nodes, dup, factor, phase_seconds, phase_bytes)
+
+
+# --------------------------
+# Observer interface
+# --------------------------
+
+class TraversalObserver:
+    """
+    Callback interface; every method is optional (no-op by default).
+    """
+
+    def on_run_start(self, meta: dict):
+        pass
+
+    def on_hop(self, stats: HopStats):
+        pass
+
+    def on_phase(self, run_id: str, name: str, seconds: float,
+                 nbytes: int = 0, labels: dict | None = None):
+        pass
+
+    def on_run_end(self, summary: dict):
+        pass
+
+
+class CompositeObserver(TraversalObserver):
+    """
+    Fan every event out to several observers.
+    """
+
+    def __init__(self, *observers: TraversalObserver):
+        self.observers = [o for o in observers if o is not None]
+
+    def on_run_start(self, meta):
+        for o in self.observers:
+            o.on_run_start(meta)
+
+    def on_hop(self, stats):
+        for o in self.observers:
+            o.on_hop(stats)
+
+    def on_phase(self, run_id, name, seconds, nbytes=0, labels=None):
+        for o in self.observers:
+            o.on_phase(run_id, name, seconds, nbytes, labels)
+
+    def on_run_end(self, summary):
+        for o in self.observers:
+            o.on_run_end(summary)
+
+
+class CollectingObserver(TraversalObserver):
+    """
+    Keep every event in memory (handy in notebooks).
+    """
+
+    def __init__(self):
+        self.runs: list[dict] = []
+        self.hops: list[HopStats] = []
+        self.phases: list[dict] = []
+        self.summaries: list[dict] = []
+
+    def on_run_start(self, meta):
+        self.runs.append(meta)
+
+    def on_hop(self, stats):
+        self.hops.append(stats)
+
+    def on_phase(self, run_id, name, seconds, nbytes=0, labels=None):
+        self.phases.append({"run_id": run_id, "phase": name,
+                            "seconds": seconds, "bytes": nbytes,
+                            "labels": labels or {}})
+
+    def on_run_end(self, summary):
+        self.summaries.append(summary)
+
+
+# --------------------------
+# Sinks
+# --------------------------
+
+class JsonLinesObserver(TraversalObserver):
+    """
+    Append one JSON object per event to `path` (flushed per line).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a", buffering=1)
+
+    def _write(self, event: str, payload: dict):
+        record = {"event": event, "ts": time.time(), **payload}
+        self._fh.write(json.dumps(record) + "\n")
+
+    def on_run_start(self, meta):
+        self._write("run_start", meta)
+
+    def on_hop(self, stats):
+        self._write("hop", asdict(stats))
+
+    def on_phase(self, run_id, name, seconds, nbytes=0, labels=None):
+        self._write("phase", {"run_id": run_id, "phase": name,
+                              "seconds": seconds, "bytes": nbytes,
+                              "labels": labels or {}})
+
+    def on_run_end(self, summary):
+        self._write("run_end", summary)
+
+    def close(self):
+        self._fh.close()
+
+
+def _prom_escape(value) -> str:
+    """Label value with backslash, double quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels: dict) -> str:
+    inner = ",".join(f'{k}="{_prom_escape(v)}"' for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+def _prom_value(value: float) -> str:
+    """
+    Exact sample value: integers (counts, bytes) in full, other floats
+    round-trip via repr, NaN / +Inf / -Inf as the text format spells them.
+    """
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    if value.is_integer() and abs(value) < 2**53:
+        return str(int(value))
+    return repr(value)
+
+
+class PrometheusTextfileObserver(TraversalObserver):
+    """
+    Keep the latest values as gauges and rewrite `path` atomically at
+    the end of every run, for node_exporter's textfile collector.
+    """
+
+    HOP_FIELDS = {
+        "frontier_size": "Frontier size at the start of the hop",
+        "edges_scanned": "Edges scanned during the hop",
+        "new_nodes": "Nodes first discovered during the hop",
+        "duplicate_ratio": "Share of scanned edges hitting visited nodes",
+        "dedup_factor": "Empirical dedup factor new / (n_seeds * D^h)",
+    }
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._gauges: dict[tuple[str, str], float] = {}
+        self._help: dict[str, str] = {}
+
+    def _set(self, name: str, help_text: str, labels: dict, value: float):
+        full = f"{METRIC_PREFIX}_{name}"
+        self._help[full] = help_text
+        self._gauges[(full, _prom_labels(labels))] = float(value)
+
+    def on_run_start(self, meta):
+        # a new run of this engine replaces its previous per-hop gauges,
+        # so a shorter run leaves no stale deeper hops behind
+        engine = f'engine="{_prom_escape(meta.get("engine", "unknown"))}"'
+        hop_prefix = f"{METRIC_PREFIX}_hop_"
+        self._gauges = {key: value for key, value in self._gauges.items()
+                        if not (key[0].startswith(hop_prefix) and engine in key[1])}
+
+    def on_hop(self, stats):
+        labels = {"engine": stats.engine, "hop": stats.hop}
+        for name, help_text in self.HOP_FIELDS.items():
+            self._set(f"hop_{name}", help_text, labels, getattr(stats, name))
+        for phase, secs in stats.phase_seconds.items():
+            self._set("hop_phase_seconds", "Seconds spent per hop phase",
+                      {**labels, "phase": phase}, secs)
+        for phase, nbytes in stats.phase_bytes.items():
+            self._set("hop_phase_bytes", "Bytes allocated per hop phase",
+                      {**labels, "phase": phase}, nbytes)
+
+    def on_phase(self, run_id, name, seconds, nbytes=0, labels=None):
+        labels = {"phase": name, **(labels or {})}
+        self._set("phase_seconds", "Seconds spent per phase", labels, seconds)
+        self._set("phase_bytes", "Bytes allocated per phase", labels, nbytes)
+
+    def on_run_end(self, summary):
+        engine = summary.get("engine", "unknown")
+        for key in ("hops", "seconds", "reached"):
+            if key in summary:
+                self._set(f"run_{key}", f"Run total: {key}",
+                          {"engine": engine}, summary[key])
+        self.flush()
+
+    def flush(self):
+        lines = []
+        for full in sorted({name for name, _ in self._gauges}):
+            lines.append(f"# HELP {full} {self._help[full]}")
+            lines.append(f"# TYPE {full} gauge")
+            for (name, labels), value in sorted(self._gauges.items()):
+                if name == full:
+                    lines.append(f"{name}{labels} {_prom_value(value)}")
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
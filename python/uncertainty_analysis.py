@@ -0,0 +1,299 @@
+"""
+uncertainty_analysis.py
+
+Monte Carlo uncertainty propagation and Sobol sensitivity analysis for
+the analytical coverage / TTFI / seeds-required model.
+
+Instead of three hand-picked scenarios (Conservative / Baseline /
+Optimistic), D, r, s, theta, active share and tau_hop are drawn from
+distributions and pushed through the batched model functions of
+generate_tables_and_figures.py:
+
+    coverage       = min(1, n * T_k / ((1 - theta) * N_total * active))
+    ttfi           = tau_hop * min(E[dist], k)
+    seeds_required = target * N_total * active * (1 - theta) / T_k
+
+Sobol indices use the Saltelli (2010) radial design: two sample matrices
+A and B plus one A_B^(i) per parameter, i.e. N * (p + 2) evaluations.
+First-order S_i (Saltelli 2010) and total ST_i (Jansen 1999) are
+accumulated from running sums chunk by chunk, and the output quantiles
+from one KLL sketch per output (quantile_sketch.py), so memory does not
+grow with N. The sketches are saved so separate runs can be merged.
+
+Usage:
+    python uncertainty_analysis.py --samples 10000000 --seeds 10000 --hops 2
+    python uncertainty_analysis.py --spec my_distributions.json
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from generate_tables_and_figures import T_k_array, estimate_ttfi_array, PARAMS
+from quantile_sketch import KLLSketch
+
+N_COUK_TOTAL = 8_395_329   # total .co.uk domains (Figure 1)
+CHUNK = 1_000_000          # base samples per chunk
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+SKETCH_K = 1000            # KLL size per output: ~0.3% rank error
+
+OUTPUTS = ("coverage", "ttfi_s", "seeds_required")
+
+# name -> (distribution, *args); see sample_param for the supported kinds
+DEFAULT_SPEC = {
+    "D": ("triangular", 8.0, PARAMS["D"], 13.0),
+    "r": ("uniform", 0.4, 0.8),
+    "s": ("uniform", 0.3, 0.6),
+    "theta": ("uniform", 0.2, 0.4),
+    "active_share": ("uniform", 0.43, 0.50),
+    "tau_hop": ("lognormal", float(np.log(PARAMS["tau_hop"])), 0.25),
+}
+
+
+# --------------------------
+# Sampling
+# --------------------------
+
+def sample_param(rng: np.random.Generator, dist, size: int) -> np.ndarray:
+    """
+    Draw `size` values for one parameter. Supported:
+        ("fixed", v), ("uniform", lo, hi), ("normal", mu, sd),
+        ("truncnormal", mu, sd, lo, hi), ("lognormal", mu, sigma),
+        ("triangular", lo, mode, hi), ("beta", a, b[, lo, hi])
+    """
+    kind, *args = dist
+    if kind == "fixed":
+        return np.full(size, float(args[0]))
+    if kind == "uniform":
+        return rng.uniform(args[0], args[1], size)
+    if kind == "normal":
+        return rng.normal(args[0], args[1], size)
+    if kind == "truncnormal":
+        mu, sd, lo, hi = args
+        return np.clip(rng.normal(mu, sd, size), lo, hi)
+    if kind == "lognormal":
+        return rng.lognormal(args[0], args[1], size)
+    if kind == "triangular":
+        return rng.triangular(args[0], args[1], args[2], size)
+    if kind == "beta":
+        a, b, lo, hi = (list(args) + [0.0, 1.0])[:4]
+        return lo + (hi - lo) * rng.beta(a, b, size)
+    raise ValueError(f"Unknown distribution kind: {kind!r}")
+
+
+def sample_matrix(rng, spec: dict, size: int) -> np.ndarray:
+    """
+    (n_params, size) array; one contiguous row per parameter.
+    """
+    return np.stack([sample_param(rng, dist, size) for dist in spec.values()])
+
+
+# --------------------------
+# Model
+# --------------------------
+
+def evaluate(X: np.ndarray, names: list, num_seeds: int, k: int,
+             target: float, n_total: int) -> np.ndarray:
+    """
+    Evaluate all outputs for a (n_params, m) sample; returns (3, m).
+    """
+    p = dict(zip(names, X))
+    defaults = {"active_share": 1.0, **PARAMS}
+    D, r, s, theta, active, tau = (p.get(key, defaults[key]) for key in
+                                   ("D", "r", "s", "theta", "active_share", "tau_hop"))
+    N = n_total * active
+    T = T_k_array(D, r, s, k)
+    pool = (1.0 - theta) * N
+    out = np.empty((3, X.shape[1]))
+    np.minimum(1.0, num_seeds * T / pool, out=out[0])
+    out[1] = estimate_ttfi_array(D, N, num_seeds, tau, k_horizon=k)
+    np.multiply(target, pool / T, out=out[2])
+    return out
+
+
+# --------------------------
+# Analysis
+# --------------------------
+
+def run_analysis(spec: dict = DEFAULT_SPEC, n_samples: int = 1_000_000,
+                 num_seeds: int = 10_000, k: int = 2, target: float = 0.9,
+                 n_total: int = N_COUK_TOTAL, seed: int = 42,
+                 chunk: int = CHUNK, sobol: bool = True) -> dict:
+    """
+    Monte Carlo quantiles plus (optionally) Sobol S_i / ST_i for every
+    output. n_samples is the number of base samples N. Quantiles come
+    from the KLL sketches returned under "sketches" (one per output,
+    filled from every A sample).
+    """
+    names = list(spec)
+    p = len(names)
+    rng = np.random.default_rng(seed)
+
+    shift = None
+    s1 = np.zeros(3)          # sum (f - shift) over A and B
+    s2 = np.zeros(3)          # sum (f - shift)^2 over A and B
+    first = np.zeros((p, 3))  # sum f_B * (f_ABi - f_A)
+    total = np.zeros((p, 3))  # sum (f_A - f_ABi)^2
+    sketches = {out: KLLSketch(SKETCH_K, seed=seed) for out in OUTPUTS}
+    total_f = np.zeros(3)
+    count = 0
+
+    for lo in range(0, n_samples, chunk):
+        m = min(chunk, n_samples - lo)
+        A = sample_matrix(rng, spec, m)
+        fA = evaluate(A, names, num_seeds, k, target, n_total)
+        for j, out in enumerate(OUTPUTS):
+            sketches[out].update(fA[j])
+        total_f += fA.sum(axis=1)
+        if not sobol:
+            continue
+
+        B = sample_matrix(rng, spec, m)
+        fB = evaluate(B, names, num_seeds, k, target, n_total)
+        if shift is None:
+            shift = fA.mean(axis=1, keepdims=True)
+        for f in (fA, fB):
+            d = f - shift
+            s1 += d.sum(axis=1)
+            s2 += np.einsum("ij,ij->i", d, d)
+        count += m
+        for i in range(p):
+            col = A[i].copy()
+            A[i] = B[i]
+            fABi = evaluate(A, names, num_seeds, k, target, n_total)
+            A[i] = col
+            diff = fABi - fA
+            first[i] += np.einsum("ij,ij->i", fB, diff)
+            total[i] += np.einsum("ij,ij->i", diff, diff)
+
+    quant = {out: sketches[out].quantile(QUANTILES) for out in OUTPUTS}
+    result = {"names": names, "n_samples": n_samples, "quantiles": quant,
+              "mean": total_f / n_samples, "sketches": sketches}
+
+    if sobol:
+        mean = s1 / (2 * count)
+        var = s2 / (2 * count) - mean ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            S = np.where(var > 0, first / count / var, 0.0)
+            ST = np.where(var > 0, 0.5 * total / count / var, 0.0)
+        result["S1"] = S
+        result["ST"] = ST
+        result["evaluations"] = count * (p + 2)
+    return result
+
+
+def quantile_bands(spec: dict = DEFAULT_SPEC, seeds_grid=None, n_samples: int = 100_000,
+                   k: int = 2, target: float = 0.9, n_total: int = N_COUK_TOTAL,
+                   seed: int = 42) -> pd.DataFrame:
+    """
+    Coverage and TTFI quantile bands across a seed-count grid (replaces
+    the three fixed scenario lines in Figures 2 and 4).
+    """
+    if seeds_grid is None:
+        seeds_grid = np.unique(np.logspace(3, 6, 31).astype(int))
+    rng = np.random.default_rng(seed)
+    X = sample_matrix(rng, spec, n_samples)
+    names = list(spec)
+    rows = []
+    for n in seeds_grid:
+        f = evaluate(X, names, int(n), k, target, n_total)
+        row = {"Seeds": int(n)}
+        for j, out in enumerate(OUTPUTS[:2]):
+            for q, v in zip(QUANTILES, np.quantile(f[j], QUANTILES)):
+                row[f"{out}_p{round(q * 100)}"] = v
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def plot_bands(bands: pd.DataFrame, filename: str, hops: int):
+    import matplotlib.pyplot as plt
+
+    plt.figure()
+    seeds = bands["Seeds"].to_numpy()
+    plt.fill_between(seeds, bands["coverage_p5"] * 100, bands["coverage_p95"] * 100,
+                     alpha=0.2, label="5–95%")
+    plt.fill_between(seeds, bands["coverage_p25"] * 100, bands["coverage_p75"] * 100,
+                     alpha=0.4, label="25–75%")
+    plt.plot(seeds, bands["coverage_p50"] * 100, label="median")
+    plt.xscale("log")
+    plt.xlabel("Number of seed sites")
+    plt.ylabel("Coverage (%)")
+    plt.title(f"{hops}-hop coverage vs seeds: uncertainty bands")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(filename, dpi=300)
+    plt.close()
+    print(f"✓ Saved: {filename}")
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def load_spec(path) -> dict:
+    spec = dict(DEFAULT_SPEC)
+    spec.update({k: tuple(v) for k, v in json.loads(Path(path).read_text()).items()})
+    return spec
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo + Sobol analysis")
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--seeds", type=int, default=10_000)
+    parser.add_argument("--hops", type=int, default=2)
+    parser.add_argument("--target", type=float, default=0.9)
+    parser.add_argument("--n-total", type=int, default=N_COUK_TOTAL)
+    parser.add_argument("--spec", help="JSON file: {param: [kind, args...]}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="../output")
+    args = parser.parse_args(argv)
+
+    spec = load_spec(args.spec) if args.spec else DEFAULT_SPEC
+    t0 = time.perf_counter()
+    res = run_analysis(spec, args.samples, args.seeds, args.hops, args.target,
+                       args.n_total, args.seed)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 80)
+    print(f"UNCERTAINTY ANALYSIS: {args.samples:,} base samples, "
+          f"{res['evaluations']:,} model evaluations in {elapsed:.1f}s")
+    print(f"  {args.seeds:,} seeds, {args.hops}-hop, target coverage {args.target:.0%}")
+    print("=" * 80)
+
+    print("\nQuantiles")
+    header = "".join(f"{f'p{round(q * 100)}':>14}" for q in QUANTILES)
+    print(f"{'output':<16}{header}")
+    for out in OUTPUTS:
+        print(f"{out:<16}" + "".join(f"{v:>14.4g}" for v in res["quantiles"][out]))
+    print(f"(KLL sketches, rank error ±{res['sketches']['coverage'].rank_error():.2%})")
+
+    rows = []
+    for i, name in enumerate(res["names"]):
+        for j, out in enumerate(OUTPUTS):
+            rows.append({"param": name, "output": out,
+                         "S1": res["S1"][i, j], "ST": res["ST"][i, j]})
+    df = pd.DataFrame(rows)
+    print("\nSobol indices (first-order S1 / total ST)")
+    print(df.pivot(index="param", columns="output", values=["S1", "ST"])
+            .round(3).to_string())
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out_dir / "sobol_indices.csv", index=False)
+    (out_dir / "uncertainty_sketches.json").write_text(
+        json.dumps({out: s.to_dict() for out, s in res["sketches"].items()}))
+    bands = quantile_bands(spec, k=args.hops, target=args.target,
+                           n_total=args.n_total, seed=args.seed)
+    bands.to_csv(out_dir / "coverage_uncertainty_bands.csv", index=False)
+    plot_bands(bands, str(out_dir / f"coverage_uncertainty_{args.hops}hop.png"), args.hops)
+    print(f"✓ Saved: {out_dir / 'sobol_indices.csv'}")
+    print(f"✓ Saved: {out_dir / 'uncertainty_sketches.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+webgraph_bfs.py
+
+Graph-backed counterpart of the analytical coverage / TTFI model:
+multi-source BFS from a seed set over a CSRGraph (see webgraph_csr.py).
+
+    - coverage within k hops = fraction of nodes with dist <= k
+    - simulated TTFI         = tau_hop * dist(nearest seed -> node)
+
+Distances are stored as uint8 (one byte per node); UNREACHED marks
+nodes that no seed reaches within the hop limit.
+
+direction_optimizing_bfs gives the same distances but switches to
+bottom-up steps over the transposed graph on the large middle hops
+(Beamer et al., "Direction-Optimizing Breadth-First Search", SC'12).
+
+On CSR graphs multi_source_bfs expands each hop with the compiled
+traversal_kernels.bfs_step when the numba backend is selected (see
+traversal_kernels.resolve_backend); otherwise, and on compressed
+graphs, it runs the equivalent numpy loop.
+
+Both engines take an optional `active` mask (a packed bitmap, see
+active_bitmap): inactive nodes are never reached and so never pass
+links on, as if they were removed from the graph. active_share.py
+sweeps the active share without one BFS per share.
+"""
+
+import hashlib
+import time
+
+import numpy as np
+
+from checkpoint import seed_fingerprint
+from traversal_kernels import bfs_step, resolve_backend
+from traversal_metrics import HopStats, new_run_id
+
+UNREACHED = 255
+MAX_HOPS = UNREACHED - 1
+
+# Direction-optimizing switch thresholds (Beamer et al.)
+DO_ALPHA = 14.0     # go bottom-up once frontier edges > unexplored edges / alpha
+DO_BETA = 24.0      # back to top-down once frontier < n / beta
+BU_ROUNDS = 8       # early-exit rounds before the remaining predecessors
+                    # are checked in one batch
+
+
+# --------------------------
+# Traversal
+# --------------------------
+
+def multi_source_bfs(graph, seeds, max_hops: int | None = None,
+                     observer=None, checkpoint=None, active=None,
+                     backend: str | None = None) -> np.ndarray:
+    """
+    Level-synchronous BFS from all seeds at once, following outlinks.
+    Seeds may be node IDs or, if the graph has a name table, domain names.
+
+    Returns a uint8 array of hop distances to the nearest seed
+    (0 for seeds themselves, UNREACHED if not reached within max_hops).
+
+    If an observer (see traversal_metrics.py) is given, it receives one
+    HopStats record per hop plus run start / end events. With a
+    checkpoint.Checkpointer, distances and frontier are saved after each
+    hop (per its policy) and a resumed run continues from the last save.
+
+    With an `active` bitmap, inactive seeds are dropped and inactive
+    nodes stay UNREACHED. `backend` selects the traversal kernel for
+    CSR graphs (traversal_kernels.resolve_backend).
+    """
+    n = graph.n_nodes
+    compiled = hasattr(graph, "indptr") and resolve_backend(backend) == "numba"
+    limit = MAX_HOPS if max_hops is None else min(max_hops, MAX_HOPS)
+    dist = np.full(n, UNREACHED, dtype=np.uint8)
+
+    frontier = np.unique(graph.node_ids(seeds))
+    if active is not None:
+        frontier = frontier[_test_bits(active, frontier)]
+    dist[frontier] = 0
+    hop, examined = 0, 0
+    if checkpoint is not None:
+        saved = checkpoint.restore(seed_fingerprint(n, frontier, engine="bfs", max_hops=limit,
+                                                    **_mask_key(active)))
+        if saved is not None:
+            arrays, state = saved
+            dist[:] = arrays["dist"]
+            frontier = np.array(arrays["frontier"])
+            hop, examined = state["hop"], state["edges_examined"]
+
+    if observer is not None:
+        run_id = new_run_id("bfs")
+        avg_deg = graph.n_edges / float(max(n, 1))
+        n_seeds = int(frontier.size)
+        t_start = time.perf_counter()
+        reached = n_seeds if hop == 0 else int((dist != UNREACHED).sum())
+        observer.on_run_start({"run_id": run_id, "engine": "bfs",
+                               "n_nodes": n, "n_edges": graph.n_edges,
+                               "n_seeds": n_seeds, "max_hops": limit,
+                               "resumed_at_hop": hop})
+
+    while frontier.size and hop < limit:
+        hop += 1
+        t0 = time.perf_counter()
+        if compiled:
+            # expand, claim and dedup in one compiled step; inactive
+            # claims are undone afterwards
+            next_frontier, scanned = bfs_step(graph.indptr, graph.indices, frontier,
+                                              dist, hop, "numba")
+            t1 = t2 = time.perf_counter()
+            if active is not None:
+                on = _test_bits(active, next_frontier)
+                dist[next_frontier[~on]] = UNREACHED
+                next_frontier = next_frontier[on]
+                t2 = time.perf_counter()
+            t3 = t2
+            nbytes = {"expand": 8 * scanned, "dedup": next_frontier.nbytes}
+        else:
+            nbrs = graph.successors(frontier)
+            scanned = int(nbrs.size)
+            t1 = time.perf_counter()
+            new = nbrs[dist[nbrs] == UNREACHED]
+            if active is not None:
+                new = new[_test_bits(active, new)]
+            dist[new] = hop
+            t2 = time.perf_counter()
+            next_frontier = np.unique(new)
+            t3 = time.perf_counter()
+            nbytes = {"expand": nbrs.nbytes, "filter": new.nbytes,
+                      "dedup": next_frontier.nbytes}
+        examined += scanned
+
+        if observer is not None:
+            reached += int(next_frontier.size)
+            observer.on_hop(HopStats.from_counts(
+                run_id, "bfs", hop,
+                frontier_size=int(frontier.size),
+                edges_scanned=scanned,
+                new_nodes=int(next_frontier.size),
+                n_seeds=n_seeds, avg_deg=avg_deg,
+                phase_seconds={"expand": t1 - t0, "filter": t2 - t1,
+                               "dedup": t3 - t2},
+                phase_bytes=nbytes,
+            ))
+        frontier = next_frontier
+        if checkpoint is not None:
+            checkpoint.maybe_save(hop, {"dist": dist, "frontier": frontier},
+                                  {"hop": hop, "edges_examined": examined},
+                                  force=not frontier.size or hop == limit)
+
+    if observer is not None:
+        observer.on_run_end({"run_id": run_id, "engine": "bfs", "hops": hop,
+                             "reached": reached, "edges_examined": examined,
+                             "seconds": time.perf_counter() - t_start})
+    return dist
+
+
+# --------------------------
+# Packed bitmaps and active masks
+# --------------------------
+
+def _bitmap(n: int) -> np.ndarray:
+    return np.zeros((n + 7) >> 3, dtype=np.uint8)
+
+
+def _set_bits(bitmap: np.ndarray, idx: np.ndarray):
+    np.bitwise_or.at(bitmap, idx >> 3, np.left_shift(1, idx & 7).astype(np.uint8))
+
+
+def _test_bits(bitmap: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    return ((bitmap[idx >> 3] >> (idx & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+def active_bitmap(n: int, share: float | None = None, prob=None,
+                  seed: int = 42) -> np.ndarray:
+    """
+    Packed bitmap (bit i of byte i >> 3, little bit order) marking each
+    node active independently, with probability `share`, or `prob[i]`
+    for a per-node activity probability. A boolean array of length n
+    can be packed the same way with pack_mask.
+    """
+    if (share is None) == (prob is None):
+        raise ValueError("give exactly one of share / prob")
+    p = share if prob is None else np.asarray(prob, dtype=np.float64)
+    return pack_mask(np.random.default_rng(seed).random(n) < p)
+
+
+def pack_mask(mask: np.ndarray) -> np.ndarray:
+    return np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+
+
+def unpack_mask(bitmap: np.ndarray, n: int) -> np.ndarray:
+    return np.unpackbits(bitmap, count=n, bitorder="little").astype(bool)
+
+
+def _mask_key(active) -> dict:
+    """Checkpoint fingerprint entry for an active mask (none if unmasked)."""
+    if active is None:
+        return {}
+    return {"active_hash": hashlib.blake2b(np.ascontiguousarray(active).tobytes(),
+                                           digest_size=8).hexdigest()}
+
+
+# --------------------------
+# Direction-optimizing traversal
+# --------------------------
+
+
+def _bottom_up_step(reverse, frontier_bits: np.ndarray, visited: np.ndarray, n: int):
+    """
+    One bottom-up hop: every unvisited node looks through its predecessors
+    for one in the frontier and stops at the first hit.
+
+    Early exit is vectorised as rounds: round j tests the j-th predecessor
+    of every node still unresolved. After BU_ROUNDS rounds the few
+    remaining nodes (mostly hubs with long in-lists) test all their
+    remaining predecessors at once. Returns (new_nodes, edges_examined).
+    """
+    cand = np.flatnonzero(~np.unpackbits(visited, count=n, bitorder="little").astype(bool))
+    ptr = reverse.indptr[cand]
+    end = reverse.indptr[cand + 1]
+    live = ptr < end
+    cand, ptr, end = cand[live], ptr[live], end[live]
+    found, examined = [], 0
+
+    for _ in range(BU_ROUNDS):
+        if cand.size == 0:
+            break
+        hit = _test_bits(frontier_bits, reverse.indices[ptr])
+        examined += int(cand.size)
+        found.append(cand[hit])
+        ptr += 1
+        keep = ~hit & (ptr < end)
+        cand, ptr, end = cand[keep], ptr[keep], end[keep]
+
+    if cand.size:
+        lengths = end - ptr
+        total = int(lengths.sum())
+        base = np.repeat(ptr - (np.cumsum(lengths) - lengths), lengths)
+        preds = reverse.indices[base + np.arange(total, dtype=np.int64)]
+        owner = np.repeat(np.arange(cand.size), lengths)
+        hits = np.bincount(owner, weights=_test_bits(frontier_bits, preds),
+                           minlength=cand.size)
+        examined += total
+        found.append(cand[hits > 0])
+
+    new = np.sort(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+    return new, examined
+
+
+def direction_optimizing_bfs(graph, seeds, max_hops: int | None = None,
+                             observer=None, reverse=None,
+                             alpha: float = DO_ALPHA,
+                             beta: float = DO_BETA,
+                             checkpoint=None, active=None) -> np.ndarray:
+    """
+    Multi-source BFS that runs top-down on small frontiers and bottom-up
+    (over `reverse`, the transposed graph) on large ones. Visited set and
+    bottom-up frontiers are packed bitmaps (one bit per node).
+
+    Returns exactly the same uint8 distances as multi_source_bfs. Pass
+    `reverse` to reuse a (possibly memory-mapped) transpose; otherwise it
+    is built once here.
+
+    Switching rule per hop, with m_f = out-edges of the frontier and
+    m_u = in-edges of unvisited nodes:
+
+        top-down -> bottom-up  if m_f > m_u / alpha
+        bottom-up -> top-down  if |frontier| < n / beta
+
+    `checkpoint` and `active` work as in multi_source_bfs (the visited
+    bitmap is rebuilt from the saved distances; inactive nodes start
+    out marked visited, so neither direction ever claims them).
+    """
+    n = graph.n_nodes
+    limit = MAX_HOPS if max_hops is None else min(max_hops, MAX_HOPS)
+    if reverse is None:
+        csr = graph if hasattr(graph, "transpose") else graph.to_csr()
+        reverse = csr.transpose()
+    out_deg = np.diff(graph.indptr) if hasattr(graph, "indptr") else graph.out_degree()
+    in_deg = np.diff(reverse.indptr)
+
+    dist = np.full(n, UNREACHED, dtype=np.uint8)
+    frontier = np.unique(graph.node_ids(seeds))
+    unexplored = int(reverse.n_edges)
+    if active is None:
+        visited = _bitmap(n)
+    else:
+        frontier = frontier[_test_bits(active, frontier)]
+        visited = pack_mask(~unpack_mask(active, n))
+        unexplored -= int(in_deg[unpack_mask(visited, n)].sum())
+    dist[frontier] = 0
+    unexplored -= int(in_deg[frontier].sum())
+    hop, examined, bottom_up = 0, 0, False
+    if checkpoint is not None:
+        saved = checkpoint.restore(seed_fingerprint(n, frontier, engine="bfs_do", max_hops=limit,
+                                                    alpha=alpha, beta=beta, **_mask_key(active)))
+        if saved is not None:
+            arrays, state = saved
+            dist[:] = arrays["dist"]
+            frontier = np.array(arrays["frontier"])
+            hop, examined = state["hop"], state["edges_examined"]
+            bottom_up, unexplored = state["bottom_up"], state["unexplored"]
+    _set_bits(visited, frontier if hop == 0 else np.flatnonzero(dist != UNREACHED))
+
+    if observer is not None:
+        run_id = new_run_id("bfs_do")
+        avg_deg = graph.n_edges / float(max(n, 1))
+        n_seeds = int(frontier.size)
+        t_start = time.perf_counter()
+        observer.on_run_start({"run_id": run_id, "engine": "bfs_do",
+                               "n_nodes": n, "n_edges": graph.n_edges,
+                               "n_seeds": n_seeds, "max_hops": limit,
+                               "alpha": alpha, "beta": beta})
+
+    reached = int(frontier.size) if hop == 0 else int((dist != UNREACHED).sum())
+    while frontier.size and hop < limit:
+        hop += 1
+        frontier_edges = int(out_deg[frontier].sum())
+        if bottom_up:
+            bottom_up = frontier.size >= n / beta
+        else:
+            bottom_up = frontier_edges > unexplored / alpha
+
+        t0 = time.perf_counter()
+        if bottom_up:
+            frontier_bits = _bitmap(n)
+            _set_bits(frontier_bits, frontier)
+            next_frontier, scanned = _bottom_up_step(reverse, frontier_bits, visited, n)
+            phases = {"bottom_up": time.perf_counter() - t0}
+            nbytes = {"bottom_up": frontier_bits.nbytes + visited.nbytes}
+        else:
+            nbrs = graph.successors(frontier)
+            t1 = time.perf_counter()
+            new = nbrs[~_test_bits(visited, nbrs)]
+            t2 = time.perf_counter()
+            next_frontier = np.unique(new)
+            scanned = int(nbrs.size)
+            phases = {"expand": t1 - t0, "filter": t2 - t1,
+                      "dedup": time.perf_counter() - t2}
+            nbytes = {"expand": nbrs.nbytes, "filter": new.nbytes,
+                      "dedup": next_frontier.nbytes}
+
+        dist[next_frontier] = hop
+        _set_bits(visited, next_frontier)
+        unexplored -= int(in_deg[next_frontier].sum())
+        examined += scanned
+        reached += int(next_frontier.size)
+
+        if observer is not None:
+            observer.on_hop(HopStats.from_counts(
+                run_id, "bfs_do", hop,
+                frontier_size=int(frontier.size), edges_scanned=scanned,
+                new_nodes=int(next_frontier.size),
+                n_seeds=n_seeds, avg_deg=avg_deg,
+                phase_seconds=phases, phase_bytes=nbytes,
+            ))
+        frontier = next_frontier
+        if checkpoint is not None:
+            checkpoint.maybe_save(hop, {"dist": dist, "frontier": frontier},
+                                  {"hop": hop, "edges_examined": examined,
+                                   "bottom_up": bottom_up, "unexplored": unexplored},
+                                  force=not frontier.size or hop == limit)
+
+    if observer is not None:
+        observer.on_run_end({"run_id": run_id, "engine": "bfs_do", "hops": hop,
+                             "reached": reached, "edges_examined": examined,
+                             "seconds": time.perf_counter() - t_start})
+    return dist
+
+
+# --------------------------
+# Summaries
+# --------------------------
+
+def coverage_by_hop(dist: np.ndarray, max_hops: int) -> np.ndarray:
+    """
+    Cumulative number of nodes reached within h hops, for h = 0..max_hops.
+    """
+    counts = np.bincount(dist, minlength=256)[:max_hops + 1]
+    return np.cumsum(counts)
+
+
+def simulated_coverage(dist: np.ndarray, k: int) -> tuple[float, int]:
+    """
+    (coverage_fraction, discovered_nodes) within k hops -- the graph-backed
+    analogue of estimate_coverage.
+    """
+    discovered = int(coverage_by_hop(dist, k)[-1])
+    return discovered / float(dist.size), discovered
+
+
+def ttfi_summary(dist: np.ndarray,
+                 tau_hop: float = 3.0,
+                 quantiles=(0.5, 0.95, 0.99),
+                 sketch=None) -> dict:
+    """
+    TTFI statistics over reached nodes, using TTFI = tau_hop * dist.
+
+    Quantiles are exact: they come from the 256-bin hop histogram
+    rather than a sort of the per-node array. If a
+    quantile_sketch.KLLSketch is given, the histogram is also added to
+    it (as weighted items), so TTFI across many runs or workers can be
+    merged without keeping any distance array.
+    """
+    hist = np.bincount(dist, minlength=256)[:UNREACHED].astype(np.int64)
+    if sketch is not None:
+        sketch.update(tau_hop * np.arange(UNREACHED), weights=hist)
+    reached = int(hist.sum())
+    out = {"reached": reached, "reached_frac": reached / float(dist.size)}
+    if reached == 0:
+        out["mean_s"] = float("inf")
+        for q in quantiles:
+            out[f"p{round(q * 100)}_s"] = float("inf")
+        return out
+
+    hops = np.arange(UNREACHED)
+    out["mean_s"] = float(tau_hop * (hist * hops).sum() / reached)
+    cdf = np.cumsum(hist)
+    for q in quantiles:
+        h = int(np.searchsorted(cdf, q * reached))
+        out[f"p{round(q * 100)}_s"] = float(tau_hop * h)
+    return out
@@ -0,0 +1,544 @@
+"""
+webgraph_compressed.py
+
+Compressed adjacency format for domain web graphs, in the spirit of the
+WebGraph framework (Boldi & Vigna): sorted successor lists stored as
+gap-encoded varints, with optional reference/copy compression.
+
+Layout (all flat numpy arrays, saved as .npy and memory-mappable):
+
+    data      : uint8[]          -- residual varints, node by node
+    off_base  : int64[N / 64 + 1] \  byte offset of node u in data =
+    off_rel   : uint32[N + 1]    /   off_base[u >> 6] + off_rel[u]
+    ref_nodes : int32[R]         -- sorted nodes that copy from a reference
+    ref_delta : uint8[R]         -- reference = node - delta (1..REF_WINDOW)
+    copy_off  : int64[R + 1]     -- copy mask of ref_nodes[i] is copy_bits[copy_off[i]:copy_off[i+1]]
+    copy_bits : uint8[]          -- packed bits, one per successor of the reference
+
+Residuals of node u are its successors that are not copied, sorted:
+
+    zigzag(v_0 - u), v_1 - v_0 - 1, v_2 - v_1 - 1, ...
+
+each as a little-endian base-128 varint (high bit set = more bytes follow).
+The number of successors in a segment is the number of terminator bytes,
+so no separate degree array is needed, and the two-level offsets cost
+~4 bytes per node instead of 8. References have chain depth 1 (a
+reference is never itself a copying node), so any frontier decodes in at
+most two vectorised passes.
+
+Successor lists are sets: parallel edges are dropped on compression.
+BFS distances are identical to the source CSR graph.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from domain_names import NameTable
+from webgraph_csr import CSRGraph, gather_segments
+
+REF_WINDOW = 3          # candidate references: u-1 .. u-REF_WINDOW
+MIN_COPY_GAIN = 2       # min estimated bytes saved before a reference is used
+BYTES_PER_COPY = 2      # rough varint size of a copied successor
+ENCODE_CHUNK = 4_000_000   # edges per vectorised encode step
+DECODE_ROWS = 1_000_000    # nodes per block in whole-graph decodes
+VARINT_MAX_BYTES = 5
+REF_OVERHEAD = 13       # ref_nodes + ref_delta + copy_off bytes per reference
+
+VARINT_MASKS32 = np.array([0] + [(1 << (7 * n)) - 1 for n in range(1, 5)], dtype=np.uint32)
+VARINT_MASKS64 = np.array([0] + [(1 << (7 * n)) - 1 for n in range(1, VARINT_MAX_BYTES + 1)],
+                          dtype=np.uint64)
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int64)
+
+OFFSET_SHIFT = 6        # 64 nodes share one int64 base offset
+
+FILES = ("data", "off_base", "off_rel", "ref_nodes", "ref_delta", "copy_off", "copy_bits")
+
+
+# --------------------------
+# Varints
+# --------------------------
+
+def zigzag(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.int64)
+    return (x << 1) ^ (x >> 63)
+
+
+def unzigzag(z: np.ndarray) -> np.ndarray:
+    z = np.asarray(z, dtype=np.int64)
+    return (z >> 1) ^ -(z & 1)
+
+
+def varint_lengths(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.int64)
+    n = np.ones(values.shape, dtype=np.int64)
+    for j in range(1, VARINT_MAX_BYTES):
+        n += values >= (1 << (7 * j))
+    return n
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorised base-128 varint encoding of non-negative int64 values.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    nb = varint_lengths(values)
+    ends = np.cumsum(nb)
+    out = np.empty(int(ends[-1]) if values.size else 0, dtype=np.uint8)
+    starts = ends - nb
+    for j in range(VARINT_MAX_BYTES):
+        sel = nb > j
+        if not sel.any():
+            break
+        byte = (values[sel] >> (7 * j)) & 0x7F
+        byte |= np.where(nb[sel] - 1 > j, 0x80, 0)
+        out[starts[sel] + j] = byte
+    return out
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """
+    Vectorised decoding of a byte run made of whole varints.
+    """
+    return _decode_stream(np.asarray(data, dtype=np.uint8))[0].astype(np.int64)
+
+
+def _decode_stream(data: np.ndarray):
+    """
+    (values, ends): decoded varints and the index of each one's last byte.
+
+    Every varint is read with one unaligned little-endian word load at its
+    first byte (a stride-1 view), then the 7-bit groups are packed
+    together with a few shifts and masks. Values fit in uint32 as long as
+    no varint is longer than 4 bytes (IDs and gaps below 2^28); longer
+    runs take the uint64 path.
+    """
+    if data.size == 0:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    wide = lengths.max() > 4
+    dtype, groups = (np.uint64, VARINT_MAX_BYTES) if wide else (np.uint32, 4)
+
+    padded = np.concatenate((data, np.zeros(8, dtype=np.uint8)))
+    words = np.ndarray(shape=(data.size,), dtype=np.dtype(dtype).newbyteorder("<"),
+                       buffer=padded, strides=(1,))[starts]
+    out = words & dtype(0x7F)
+    tmp = np.empty_like(words)
+    for j in range(1, groups):
+        np.right_shift(words, dtype(j), out=tmp)
+        tmp &= dtype(0x7F << (7 * j))
+        out |= tmp
+    out &= (VARINT_MASKS64 if wide else VARINT_MASKS32)[lengths]
+    return out, ends
+
+
+# --------------------------
+# Graph container
+# --------------------------
+
+class CompressedGraph:
+    """
+    Read-only compressed graph with the CSRGraph traversal interface
+    (n_nodes, n_edges, node_ids, successors), so multi_source_bfs and
+    the other engines run on it unchanged.
+    """
+
+    def __init__(self, data, off_base, off_rel, ref_nodes, ref_delta, copy_off,
+                 copy_bits, n_edges: int, names: NameTable | None = None):
+        self.data = data
+        self.off_base = off_base
+        self.off_rel = off_rel
+        self.offsets = BlockOffsets(off_base, off_rel)
+        self.ref_nodes = ref_nodes
+        self.ref_delta = ref_delta
+        self.copy_off = copy_off
+        self.copy_bits = copy_bits
+        self._n_edges = int(n_edges)
+        self.names = names
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def n_edges(self) -> int:
+        return self._n_edges
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, f).nbytes for f in FILES))
+
+    def node_ids(self, nodes) -> np.ndarray:
+        if self.names is None:
+            return np.asarray(nodes, dtype=np.int64)
+        return self.names.resolve(nodes)
+
+    # -- decoding --
+
+    def _residuals(self, rows: np.ndarray):
+        """
+        (values, counts): decoded residual successors of `rows`,
+        concatenated in row order, and the number per row.
+        """
+        raw = gather_segments(self.offsets, self.data, rows)
+        vals, ends = _decode_stream(raw)
+        counts = _row_counts(self.offsets, ends, rows)
+        if vals.size == 0:
+            return np.zeros(0, dtype=np.int64), counts
+        vals = vals.astype(np.int64)
+
+        # gaps carry a -1; the first value of each row is zigzag(v0 - u)
+        nonempty = counts > 0
+        first_pos = (np.cumsum(counts) - counts)[nonempty]
+        steps = vals + 1
+        steps[first_pos] = unzigzag(vals[first_pos]) + rows[nonempty]
+        total = np.cumsum(steps)
+        base = np.repeat(total[first_pos] - steps[first_pos], counts[nonempty])
+        return total - base, counts
+
+    def _decode(self, rows: np.ndarray, with_src: bool = False):
+        rows = np.asarray(rows, dtype=np.int64)
+        resid, counts = self._residuals(rows)
+        src = np.repeat(rows, counts) if with_src else None
+        if self.ref_nodes.size == 0 or rows.size == 0:
+            return src, resid
+
+        pos = np.minimum(np.searchsorted(self.ref_nodes, rows), self.ref_nodes.size - 1)
+        hit = self.ref_nodes[pos] == rows
+        if not hit.any():
+            return src, resid
+        idx = pos[hit]
+        refs = rows[hit] - self.ref_delta[idx].astype(np.int64)
+        ref_succ, ref_counts = self._residuals(refs)   # references never copy
+
+        # masks are padded to whole bytes: drop the padding bits
+        bits = np.unpackbits(gather_segments(self.copy_off, self.copy_bits, idx))
+        padded = 8 * (self.copy_off[idx + 1] - self.copy_off[idx])
+        within = np.arange(bits.size) - np.repeat(np.cumsum(padded) - padded, padded)
+        take = bits[within < np.repeat(ref_counts, padded)].astype(bool)
+
+        succ = np.concatenate((ref_succ[take], resid))
+        if with_src:
+            src = np.concatenate((np.repeat(rows[hit], ref_counts)[take], src))
+        return src, succ
+
+    def successors(self, frontier: np.ndarray) -> np.ndarray:
+        """
+        Concatenated successor sets of every node in `frontier`.
+        """
+        return self._decode(frontier)[1]
+
+    def out_degree(self) -> np.ndarray:
+        deg = np.zeros(self.n_nodes, dtype=np.int64)
+        for lo in range(0, self.n_nodes, DECODE_ROWS):
+            rows = np.arange(lo, min(lo + DECODE_ROWS, self.n_nodes))
+            raw = gather_segments(self.offsets, self.data, rows)
+            ends = np.flatnonzero(raw < 0x80)
+            deg[lo:lo + rows.size] = _row_counts(self.offsets, ends, rows)
+        if self.ref_nodes.size:
+            ones = np.concatenate(([0], np.cumsum(POPCOUNT[self.copy_bits])))
+            deg[self.ref_nodes] += ones[self.copy_off[1:]] - ones[self.copy_off[:-1]]
+        return deg
+
+    def to_csr(self) -> CSRGraph:
+        """
+        Decompress to a CSRGraph with sorted successor lists.
+        """
+        deg = self.out_degree()
+        indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+        np.cumsum(deg, out=indptr[1:])
+        indices = np.empty(int(indptr[-1]), dtype=np.int32)
+        for lo in range(0, self.n_nodes, DECODE_ROWS):
+            hi = min(lo + DECODE_ROWS, self.n_nodes)
+            src, dst = self._decode(np.arange(lo, hi), with_src=True)
+            order = np.lexsort((dst, src))
+            indices[indptr[lo]:indptr[hi]] = dst[order]
+        return CSRGraph(indptr, indices, self.names)
+
+
+def _row_counts(offsets, ends, rows) -> np.ndarray:
+    """
+    Successors per row = varints whose last byte (`ends`, indices into the
+    gathered bytes of `rows`) falls inside that row's segment.
+    """
+    seg_ends = np.cumsum(offsets[rows + 1] - offsets[rows])
+    return np.diff(np.searchsorted(ends, seg_ends), prepend=0)
+
+
+class BlockOffsets:
+    """
+    Two-level byte offsets indexed like a flat int64 array:
+    offsets[u] = base[u >> OFFSET_SHIFT] + rel[u].
+    """
+
+    def __init__(self, base: np.ndarray, rel: np.ndarray):
+        self.base = base
+        self.rel = rel
+
+    @classmethod
+    def from_absolute(cls, offsets: np.ndarray) -> "BlockOffsets":
+        base = offsets[::1 << OFFSET_SHIFT].astype(np.int64)
+        rel = offsets - np.repeat(base, 1 << OFFSET_SHIFT)[:offsets.size]
+        if rel.size and rel.max() > np.iinfo(np.uint32).max:
+            raise ValueError("A block of nodes exceeds 4 GiB of adjacency data")
+        return cls(base, rel.astype(np.uint32))
+
+    def __len__(self) -> int:
+        return len(self.rel)
+
+    def __getitem__(self, idx):
+        idx = np.asarray(idx, dtype=np.int64)
+        return self.base[idx >> OFFSET_SHIFT] + self.rel[idx]
+
+
+# --------------------------
+# Compression
+# --------------------------
+
+def _chunk_bounds(indptr: np.ndarray, max_edges: int):
+    """
+    Node ranges [lo, hi) holding roughly max_edges edges each.
+    """
+    n = len(indptr) - 1
+    lo = 0
+    while lo < n:
+        hi = int(np.searchsorted(indptr, indptr[lo] + max_edges, side="right")) - 1
+        hi = min(max(hi, lo + 1), n)
+        yield lo, hi
+        lo = hi
+
+
+def _unique_edges(graph: CSRGraph, lo: int, hi: int):
+    """
+    Sorted, de-duplicated (src, dst) of nodes [lo, hi) as int64 keys
+    src * n + dst.
+    """
+    n = graph.n_nodes
+    a, b = int(graph.indptr[lo]), int(graph.indptr[hi])
+    src = np.repeat(np.arange(lo, hi, dtype=np.int64), np.diff(graph.indptr[lo:hi + 1]))
+    keys = src * n + np.asarray(graph.indices[a:b], dtype=np.int64)
+    keys.sort()
+    keep = np.ones(keys.size, dtype=bool)
+    keep[1:] = keys[1:] != keys[:-1]
+    return keys[keep]
+
+
+def _choose_references(keys, lo, hi, n, prev_refs):
+    """
+    Pick at most one reference u - r (1 <= r <= REF_WINDOW) per node in
+    [lo, hi), using the overlap of successor sets to estimate the bytes
+    saved, then drop references until no chosen reference is itself a
+    copying node (chain depth 1). `prev_refs` flags whether the
+    REF_WINDOW nodes before lo copy. Returns (delta, copied_edge_mask).
+    """
+    src = keys // n
+    mine = src >= lo
+    m = hi - lo
+    local_deg = np.bincount(src - (lo - REF_WINDOW), minlength=m + REF_WINDOW)
+
+    best_gain = np.zeros(m)
+    best_r = np.zeros(m, dtype=np.int64)
+    for r in range(1, REF_WINDOW + 1):
+        q = keys[mine] - r * n
+        pos = np.minimum(np.searchsorted(keys, q), keys.size - 1)
+        overlap = np.bincount(src[mine] - lo, weights=keys[pos] == q, minlength=m)
+        ref_deg = local_deg[np.arange(m) + REF_WINDOW - r]
+        gain = overlap * BYTES_PER_COPY - (np.ceil(ref_deg / 8.0) + REF_OVERHEAD)
+        gain[np.arange(m) + lo - r < 0] = 0.0
+        better = gain > best_gain
+        best_gain[better] = gain[better]
+        best_r[better] = r
+
+    use = best_gain >= MIN_COPY_GAIN
+    # chain depth 1: a copying node's reference must not copy
+    while True:
+        y = np.flatnonzero(use)
+        x = y - best_r[y]                      # local index, may be < 0
+        inside = x >= 0
+        x_copies = np.zeros(y.size, dtype=bool)
+        x_copies[inside] = use[x[inside]]
+        x_copies[~inside] = prev_refs[x[~inside] + REF_WINDOW]
+        if not x_copies.any():
+            break
+        cy, cx = y[x_copies], x[x_copies]
+        drop_x = inside[x_copies] & (best_gain[np.maximum(cx, 0)] < best_gain[cy])
+        use[cx[drop_x]] = False
+        use[cy[~drop_x]] = False
+
+    delta = np.where(use, best_r, 0)
+    # edges of copying nodes that also appear in their reference's list
+    d = np.zeros(keys.size, dtype=np.int64)
+    d[mine] = delta[src[mine] - lo]
+    q = keys - d * n
+    pos = np.minimum(np.searchsorted(keys, q), keys.size - 1)
+    copied = mine & (d > 0) & (keys[pos] == q)
+    return delta, copied
+
+
+def _copy_masks(keys, delta, lo, ctx, hi, n):
+    """
+    Packed copy masks (bit i = i-th successor of the reference is also a
+    successor of the copying node) for every copying node in [lo, hi),
+    each padded to whole bytes. Returns (copiers, packed, bytes_per_mask).
+    """
+    src = keys // n
+    local_ptr = np.searchsorted(src, np.arange(ctx, hi + 1))
+    copiers = np.flatnonzero(delta) + lo
+    refs = copiers - delta[copiers - lo]
+    ref_keys = gather_segments(local_ptr, keys, refs - ctx)
+    lengths = local_ptr[refs - ctx + 1] - local_ptr[refs - ctx]
+
+    want = np.repeat(copiers, lengths) * n + (ref_keys - (ref_keys // n) * n)
+    pos = np.minimum(np.searchsorted(keys, want), keys.size - 1)
+    bits = keys[pos] == want
+
+    padded = (lengths + 7) // 8 * 8
+    out = np.zeros(int(padded.sum()), dtype=np.uint8)
+    slot = np.repeat(np.cumsum(padded) - padded - (np.cumsum(lengths) - lengths), lengths)
+    out[slot + np.arange(bits.size)] = bits
+    return copiers, np.packbits(out), padded // 8
+
+
+def compress(graph: CSRGraph, references: bool = True) -> CompressedGraph:
+    """
+    Compress a CSRGraph. With references=True nodes may copy part of the
+    successor set of one of the previous REF_WINDOW nodes.
+    """
+    n = graph.n_nodes
+    data_parts, node_bytes = [], np.zeros(n, dtype=np.int64)
+    ref_nodes, ref_delta, mask_parts, mask_sizes = [], [], [], []
+    prev_refs = np.zeros(REF_WINDOW, dtype=bool)
+    n_edges = 0
+
+    for lo, hi in _chunk_bounds(graph.indptr, ENCODE_CHUNK):
+        ctx = max(lo - REF_WINDOW, 0)
+        keys = _unique_edges(graph, ctx, hi)
+        if references:
+            delta, copied = _choose_references(keys, lo, hi, n, prev_refs)
+        else:
+            delta = np.zeros(hi - lo, dtype=np.int64)
+            copied = np.zeros(keys.size, dtype=bool)
+
+        src = keys // n
+        mine = src >= lo
+        n_edges += int(mine.sum())
+        if delta.any():
+            copiers, packed, sizes = _copy_masks(keys, delta, lo, ctx, hi, n)
+            ref_nodes.append(copiers)
+            ref_delta.append(delta[copiers - lo])
+            mask_parts.append(packed)
+            mask_sizes.append(sizes)
+
+        keep = mine & ~copied
+        s, v = src[keep], keys[keep] - src[keep] * n
+        first = np.ones(s.size, dtype=bool)
+        first[1:] = s[1:] != s[:-1]
+        vals = np.empty(s.size, dtype=np.int64)
+        vals[first] = zigzag(v[first] - s[first])
+        vals[~first] = v[~first] - v[np.flatnonzero(~first) - 1] - 1
+        if vals.size:
+            data_parts.append(encode_varints(vals))
+            node_bytes[lo:hi] = np.bincount(s - lo, weights=varint_lengths(vals),
+                                            minlength=hi - lo)
+
+        prev_refs = np.concatenate((prev_refs, delta > 0))[-REF_WINDOW:]
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(node_bytes, out=offsets[1:])
+    data = np.concatenate(data_parts) if data_parts else np.zeros(0, dtype=np.uint8)
+    copy_off = np.zeros(sum(len(x) for x in mask_sizes) + 1, dtype=np.int64)
+    if mask_sizes:
+        np.cumsum(np.concatenate(mask_sizes), out=copy_off[1:])
+    offsets = BlockOffsets.from_absolute(offsets)
+    return CompressedGraph(
+        data, offsets.base, offsets.rel,
+        np.concatenate(ref_nodes).astype(np.int32) if ref_nodes else np.zeros(0, np.int32),
+        np.concatenate(ref_delta).astype(np.uint8) if ref_delta else np.zeros(0, np.uint8),
+        copy_off,
+        np.concatenate(mask_parts) if mask_parts else np.zeros(0, np.uint8),
+        n_edges, graph.names)
+
+
+# --------------------------
+# On-disk format
+# --------------------------
+
+def save_compressed(graph: CompressedGraph, directory) -> Path:
+    """
+    Write one .npy per array plus meta.json (and the name table, if any).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for f in FILES:
+        np.save(directory / f"{f}.npy", getattr(graph, f))
+    meta = {"format": "compressed", "n_nodes": graph.n_nodes,
+            "n_edges": graph.n_edges, "ref_window": REF_WINDOW,
+            "n_references": int(graph.ref_nodes.size)}
+    (directory / "meta.json").write_text(json.dumps(meta, indent=2))
+    if graph.names is not None:
+        graph.names.save(directory)
+    return directory
+
+
+def load_compressed(directory, mmap: bool = True) -> CompressedGraph:
+    """
+    Load a graph written by save_compressed; with mmap=True every array
+    is memory-mapped and decoded straight from the page cache.
+    """
+    directory = Path(directory)
+    meta = json.loads((directory / "meta.json").read_text())
+    if meta.get("format") != "compressed":
+        raise ValueError(f"{directory} is not a compressed graph "
+                         f"(format {meta.get('format')!r})")
+    mode = "r" if mmap else None
+    arrays = [np.load(directory / f"{f}.npy", mmap_mode=mode) for f in FILES]
+    names = NameTable.load(directory, mmap) if NameTable.exists(directory) else None
+    return CompressedGraph(*arrays, n_edges=meta["n_edges"], names=names)
+
+
+def load_graph(directory, mmap: bool = True):
+    """
+    Load a CSR or compressed graph directory, whichever meta.json says.
+    """
+    meta = json.loads((Path(directory) / "meta.json").read_text())
+    if meta.get("format") == "compressed":
+        return load_compressed(directory, mmap)
+    from webgraph_csr import load_csr
+    return load_csr(directory, mmap)
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compress a CSR graph directory")
+    parser.add_argument("src", help="directory written by save_csr")
+    parser.add_argument("dst", help="output directory")
+    parser.add_argument("--no-references", action="store_true",
+                        help="gap + varint only, no copy lists")
+    args = parser.parse_args(argv)
+
+    from webgraph_csr import load_csr
+    graph = load_csr(args.src, mmap=True)
+    packed = compress(graph, references=not args.no_references)
+    save_compressed(packed, args.dst)
+    print(f"Nodes: {graph.n_nodes:,}  edges: {graph.n_edges:,} "
+          f"({packed.n_edges:,} distinct)")
+    print(f"CSR:        {graph.nbytes / 1e6:,.1f} MB")
+    print(f"Compressed: {packed.nbytes / 1e6:,.1f} MB "
+          f"({graph.nbytes / max(packed.nbytes, 1):.2f}x smaller, "
+          f"{8 * packed.data.nbytes / max(packed.n_edges, 1):.1f} bits/edge residuals, "
+          f"{packed.ref_nodes.size:,} copy lists)")
+    print(f"✓ Saved: {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
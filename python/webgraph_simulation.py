@@ -25,6 +25,8 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import numpy as np
 
+from model_params import load_model_params
+
 # --------------------------
 # User-configurable defaults
 # --------------------------
@@ -37,14 +39,15 @@ AVG_EDGES = 25            # average outbound links per website (D)
 
 NUM_SEEDS = 10_000        # seed sites in the graph
 
-# Model parameters
-HOPS = 2                  # 2 or 3
-DEDUP_R = 0.6             # second-hop deduplication factor r
-DEDUP_S = 0.45            # third-hop deduplication factor s (if HOPS = 3)
-OVERLAP_THETA = 0.3       # cross-seed overlap θ
+# Model parameters (versioned file, see model_params.py)
+PARAMS = load_model_params()
+HOPS = 2                             # 2 or 3
+DEDUP_R = PARAMS["r"]                # second-hop deduplication factor r
+DEDUP_S = PARAMS["s"]                # third-hop deduplication factor s (if HOPS = 3)
+OVERLAP_THETA = PARAMS["theta"]      # cross-seed overlap θ
 
 # TTFI model parameters
-BASE_HOP_LATENCY = 3.0    # seconds per hop, rough latency scale
+BASE_HOP_LATENCY = PARAMS["tau_hop"] # seconds per hop, rough latency scale
 
 # --------------------------------
 # Core model: coverage and TTFI
@@ -54,9 +57,9 @@ def estimate_coverage(n_nodes: int,
                       avg_deg: float,
                       num_seeds: int,
                       hops: int = 2,
-                      r: float = 0.6,
-                      s: float = 0.45,
-                      theta: float = 0.3):
+                      r: float = DEDUP_R,
+                      s: float = DEDUP_S,
+                      theta: float = OVERLAP_THETA):
     """
     Estimate coverage fraction and number of discovered nodes
     for a given number of seeds, using your T2/T3 formulas:
@@ -85,7 +88,7 @@ def estimate_coverage(n_nodes: int,
 def estimate_ttfi(avg_deg: float,
                   num_seeds: int,
                   graph_size: int,
-                  base_hop_latency: float = 3.0):
+                  base_hop_latency: float = BASE_HOP_LATENCY):
     """
     Very simple TTFI model:
 
@@ -177,7 +180,7 @@ def plot_coverage_vs_seeds(total_nodes: int,
 
 def plot_ttfi_vs_seeds(total_nodes: int,
                        avg_deg: float,
-                       base_hop_latency: float = 3.0):
+                       base_hop_latency: float = BASE_HOP_LATENCY):
     """
     Plot TTFI vs seed sites for a range of seed counts.
     """